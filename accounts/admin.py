@@ -58,30 +58,23 @@ if User and hasattr(User, 'role'):
 
 # VerificationRequest admin
 if VerificationRequest:
+    from .verification import process_requests
+    
     @admin.register(VerificationRequest)
     class VerificationRequestAdmin(admin.ModelAdmin):
         list_display = ['user', 'requested_at', 'is_approved', 'processed_by', 'processed_at']
-        list_filter = ['is_approved', 'requested_at']
+        list_filter = ['is_approved', 'requested_at', 'user__role', 'user__grade', 'user__class_name']
+        list_select_related = ['user', 'processed_by']
         search_fields = ['user__username', 'user__email']
         readonly_fields = ['requested_at']
         
         def approve_request(self, request, queryset):
-            for verification_request in queryset:
-                verification_request.user.is_verified = True
-                verification_request.user.save()
-                verification_request.is_approved = True
-                verification_request.processed_by = request.user
-                verification_request.processed_at = timezone.now()
-                verification_request.save()
-            self.message_user(request, f'{queryset.count()} requests approved.')
+            result = process_requests(queryset, True, request.user)
+            self.message_user(request, f"{result['processed']} requests approved.")
         
         def reject_request(self, request, queryset):
-            for verification_request in queryset:
-                verification_request.is_approved = False
-                verification_request.processed_by = request.user
-                verification_request.processed_at = timezone.now()
-                verification_request.save()
-            self.message_user(request, f'{queryset.count()} requests rejected.')
+            result = process_requests(queryset, False, request.user)
+            self.message_user(request, f"{result['processed']} requests rejected.")
         
         approve_request.short_description = "Approve selected requests"
         reject_request.short_description = "Reject selected requests"
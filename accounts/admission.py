@@ -0,0 +1,107 @@
+"""
+Login uchun kirish nazorati (admission control).
+
+Parol xeshlash (PBKDF2) CPU'ni to'liq band qiladi. Imtihon boshida butun sinf
+bir daqiqa ichida kirganda cheklanmagan parallel xeshlash barcha so'rovlarni
+sekinlashtiradi va ular timeout'ga tushadi. LoginGate bir vaqtda bajariladigan
+loginlar sonini barcha worker'lar bo'yicha LOGIN_MAX_CONCURRENCY bilan
+cheklaydi: navbatda LOGIN_QUEUE_WAIT soniyadan ko'p kutgan so'rov 503 va
+Retry-After bilan qaytariladi, brauzer esa shu vaqtdan keyin qayta urinadi.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from mytest.caching import lock_dir
+
+GATE_POLL_INTERVAL = 0.02
+
+
+class LoginGate:
+    """Worker'lar orasidagi hisoblovchi semafor.
+
+    POSIX'da har bir o'rin alohida fayl qulfi (jarayon o'lsa OS o'zi
+    bo'shatadi), aks holda jarayon ichidagi semafor.
+    """
+
+    def __init__(self, name, slots, wait):
+        self.name = name
+        self.slots = slots
+        self.wait = wait
+        self._semaphore = threading.BoundedSemaphore(slots)
+
+    def _slot_path(self, slot):
+        return os.path.join(lock_dir(), f'{self.name}-{slot}.lock')
+
+    def _try_slots(self):
+        # Har bir urinishda yangi fayl deskriptori - bir jarayondagi oqimlar ham bir-biridan ajratiladi
+        start = random.randrange(self.slots)
+        for offset in range(self.slots):
+            slot_file = open(self._slot_path((start + offset) % self.slots), 'a')
+            try:
+                fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot_file
+            except BlockingIOError:
+                slot_file.close()
+        return None
+
+    @contextmanager
+    def admit(self):
+        """O'rin olinsa True, wait ichida olinmasa False beradi"""
+        if fcntl is None:
+            acquired = self._semaphore.acquire(timeout=self.wait)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    self._semaphore.release()
+            return
+
+        deadline = time.monotonic() + self.wait
+        slot_file = self._try_slots()
+        while slot_file is None:
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(GATE_POLL_INTERVAL)
+            slot_file = self._try_slots()
+        try:
+            yield True
+        finally:
+            fcntl.flock(slot_file, fcntl.LOCK_UN)
+            slot_file.close()
+
+
+login_gate = LoginGate('login', settings.LOGIN_MAX_CONCURRENCY, settings.LOGIN_QUEUE_WAIT)
+
+
+def admission_controlled(gate):
+    """POST so'rovlarini gate orqali o'tkazish; navbat to'lsa 503 + Retry-After"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view(request, *args, **kwargs)
+            with gate.admit() as admitted:
+                if admitted:
+                    return view(request, *args, **kwargs)
+            retry_after = settings.LOGIN_RETRY_AFTER
+            response = JsonResponse({
+                'error': "Server band, iltimos bir necha soniyadan keyin qayta urinib ko'ring",
+                'retry_after': retry_after
+            }, status=503)
+            response['Retry-After'] = str(retry_after)
+            return response
+        return wrapper
+    return decorator
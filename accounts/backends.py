@@ -0,0 +1,107 @@
+"""
+Autentifikatsiya backend'i.
+
+Login username yoki email bo'yicha bitta so'rov va bitta parol xeshi bilan
+tekshiriladi. Har bir so'rovda AuthenticationMiddleware yuklaydigan
+foydalanuvchi esa umumiy keshdagi proyeksiyadan (view'lar ishlatadigan
+maydonlar) tiklanadi - polling va javob yuborish yo'lida User qatori uchun
+DB so'rovi bo'lmaydi. Foydalanuvchi saqlanganda yoki o'chirilganda kesh
+signallar orqali o'chiriladi (accounts/signals.py).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from .models import User
+
+USER_CACHE_TIMEOUT = 10 * 60  # 10 daqiqa
+USER_PROJECTION_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'role', 'grade', 'class_name', 'is_verified',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+def _user_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def _projection(user):
+    # Parol o'rniga sessiya xeshi saqlanadi
+    data = {field: getattr(user, field) for field in USER_PROJECTION_FIELDS}
+    data['session_auth_hash'] = user.get_session_auth_hash()
+    return data
+
+
+def cache_user(user):
+    """Foydalanuvchi proyeksiyasini keshga yozish"""
+    cache.set(_user_key(user.pk), _projection(user), USER_CACHE_TIMEOUT)
+
+
+def cache_users(users):
+    """Ko'p foydalanuvchini bitta set_many bilan keshga yozish (imtihon oldidan isitish)"""
+    data = {_user_key(user.pk): _projection(user) for user in users}
+    cache.set_many(data, USER_CACHE_TIMEOUT)
+    return len(data)
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+def invalidate_users(user_ids):
+    """queryset.update() dan keyin (signal yuborilmaydi)"""
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
+
+
+def user_from_projection(data):
+    """Keshdagi proyeksiyadan User. Qolgan maydonlar deferred - murojaat qilinsa DB'dan o'qiladi"""
+    # from_db qiymatlarni modeldagi maydonlar tartibida kutadi
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in data]
+    user = User.from_db(DEFAULT_DB_ALIAS, fields, [data[field] for field in fields])
+    user._cached_session_auth_hash = data['session_auth_hash']
+    return user
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """Username yoki email bo'yicha autentifikatsiya.
+
+    Foydalanuvchi bitta so'rov bilan (ikkala maydon ham unique indeksli)
+    topiladi va parol faqat bir marta xeshlanadi. Foydalanuvchi topilmasa ham
+    bitta xesh bajariladi - javob vaqti bo'yicha login mavjudligini bilib
+    bo'lmasligi uchun (ModelBackend kabi).
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        candidates = list(User._default_manager.filter(Q(username=username) | Q(email=username))[:2])
+        # Bir foydalanuvchining username'i boshqasining email'iga teng bo'lsa username ustun
+        user = next((candidate for candidate in candidates if candidate.username == username), None)
+        if user is None and candidates:
+            user = candidates[0]
+
+        if user is None:
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        data = cache.get(_user_key(user_id))
+        if data is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache_user(user)
+            return user
+        user = user_from_projection(data)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
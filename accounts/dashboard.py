@@ -0,0 +1,84 @@
+"""
+O'quvchi dashboard'i uchun xulosa - StudentStats qatoridan o'qiladi va keshlanadi.
+
+Kesh finish_test (va avtomatik yakunlash) paytida o'chiriladi.
+"""
+from django.core.cache import cache
+
+DASHBOARD_CACHE_TIMEOUT = 10 * 60  # 10 daqiqa
+
+NO_BEST_RESULT = {
+    'test_name': 'No tests completed',
+    'score': 0,
+    'max_score': 0,
+    'percentage': 0,
+    'grade': 'No grade'
+}
+
+
+def _dashboard_key(student_id):
+    return f'dashboard:student:{student_id}'
+
+
+def _grade(percentage):
+    from tests_app.grading import grade_for_percentage
+    return grade_for_percentage(percentage)
+
+
+def build_student_summary(student_id):
+    """total_tests, average_score, best_result va recent_results.
+
+    Umumiy ko'rsatkichlar StudentStats qatoridan o'qiladi (finish_test'da
+    yangilanadi), oxirgi 5 ta natija - bitta select_related so'rovi.
+    """
+    from tests_app.models import TestAttempt, StudentStats
+
+    stats = StudentStats.objects.filter(student_id=student_id).select_related('best_attempt__test').first()
+
+    recent_results = []
+    attempts = TestAttempt.objects.filter(student_id=student_id, result__isnull=False)
+    for attempt in attempts.select_related('test').order_by('-started_at')[:5]:
+        if attempt.score is not None and attempt.total_points:
+            percentage = attempt.score / attempt.total_points * 100
+        else:
+            percentage = 0
+        recent_results.append({
+            'test_name': attempt.test.title,
+            'score': attempt.score,
+            'max_score': attempt.total_points,
+            'percentage': percentage,
+            'grade': _grade(percentage),
+            'created_at': attempt.started_at,
+            'test_id': attempt.test_id
+        })
+
+    best_result = NO_BEST_RESULT
+    if stats and stats.best_attempt and stats.best_percentage > 0:
+        best = stats.best_attempt
+        best_result = {
+            'test_name': best.test.title,
+            'score': best.score,
+            'max_score': best.total_points,
+            'percentage': stats.best_percentage,
+            'grade': _grade(stats.best_percentage)
+        }
+
+    return {
+        'total_tests': stats.attempts_count if stats else 0,
+        'average_score': stats.average_percentage if stats else 0,
+        'best_result': best_result,
+        'recent_results': recent_results,
+    }
+
+
+def get_student_summary(student_id):
+    key = _dashboard_key(student_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_student_summary(student_id)
+        cache.set(key, summary, DASHBOARD_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_student_summaries(student_ids):
+    cache.delete_many([_dashboard_key(student_id) for student_id in set(student_ids)])
@@ -0,0 +1,168 @@
+import json
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.utils.crypto import get_random_string
+
+from accounts.admission import login_gate
+from accounts.models import User
+
+PASSWORD = 'bench-password-123'
+MAX_CLIENT_RETRIES = 5
+PROBE_INTERVAL = 0.5
+
+
+def _run_worker(logins, start_at, threads, gated, request_timeout):
+    """Bitta gthread worker: logins ro'yxatidagi [(kelish vaqti, login)] so'rovlarni bajaradi.
+
+    Mijoz 503 olsa Retry-After (+ tasodifiy qo'shimcha) dan keyin qayta urinadi.
+    """
+    if not gated:
+        login_gate.slots = threads * 64
+    hashes = [0]
+    encode = PBKDF2PasswordHasher.encode
+
+    def counting_encode(self, *args, **kwargs):
+        hashes[0] += 1
+        return encode(self, *args, **kwargs)
+
+    PBKDF2PasswordHasher.encode = counting_encode
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def client(arrival, username):
+        time.sleep(max(0, start_at + arrival - time.time()))
+        arrived = time.time()
+        rejected = 0
+        slow = 0
+        status = None
+        for attempt in range(MAX_CLIENT_RETRIES + 1):
+            csrf_token = get_random_string(32)
+            environ = factory.post(
+                '/accounts/login/', json.dumps({'username': username, 'password': PASSWORD}),
+                content_type='application/json', HTTP_HOST='localhost',
+                HTTP_COOKIE=f'csrftoken={csrf_token}', HTTP_X_CSRFTOKEN=csrf_token,
+            ).environ
+            started = time.time()
+            response_headers = {}
+
+            def start_response(status_line, headers):
+                response_headers['status'] = int(status_line.split()[0])
+                response_headers.update(headers)
+
+            response = handler(environ, start_response)
+            b''.join(response)
+            response.close()
+            if time.time() - started > request_timeout:
+                slow += 1
+            status = response_headers['status']
+            if status != 503:
+                break
+            rejected += 1
+            retry_after = int(response_headers.get('Retry-After', 3))
+            time.sleep(retry_after + random.random() * retry_after)
+        connection.close()
+        return status, time.time() - arrived, rejected, slow
+
+    probes = []
+    finished = threading.Event()
+
+    def probe():
+        """Login to'lqini paytida boshqa (xeshsiz) so'rovlar qanchalik tez javob beradi"""
+        while not finished.wait(PROBE_INTERVAL):
+            environ = factory.get('/accounts/login/', HTTP_HOST='localhost').environ
+            started = time.time()
+            response = handler(environ, lambda status_line, headers: None)
+            b''.join(response)
+            response.close()
+            probes.append(time.time() - started)
+        connection.close()
+
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda item: client(*item), logins))
+    finished.set()
+    probe_thread.join()
+    return results, hashes[0], probes
+
+
+class Command(BaseCommand):
+    help = ("Imtihon boshidagi login to'lqinini simulyatsiya qilish: N ta o'quvchi T soniya ichida "
+            "(yarmi email bilan) kiradi; kirish nazorati bilan va usiz solishtiriladi")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=500, help="Loginlar soni")
+        parser.add_argument('--duration', type=float, default=60, help="Loginlar shu soniyalar ichida keladi")
+        parser.add_argument('--workers', type=int, default=3, help="Worker jarayonlari soni")
+        parser.add_argument('--threads', type=int, default=8, help="Har bir worker'dagi oqimlar (gthread)")
+        parser.add_argument('--timeout', type=float, default=60, help="Worker timeout (shundan uzoq so'rov uzilgan hisoblanadi)")
+        parser.add_argument('--mode', choices=['both', 'gated', 'ungated'], default='both')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench_login_{suffix}_{i}', email=f'bench_login_{suffix}_{i}@student.buxorobilimdonlar.uz',
+                password=password, role='student', grade=0, is_verified=True
+            )
+            for i in range(options['logins'])
+        ])
+        self.stdout.write(
+            f"{options['logins']} ta login {options['duration']:.0f} s ichida, "
+            f"{options['workers']} worker x {options['threads']} oqim, gate: {login_gate.slots} o'rin"
+        )
+        try:
+            modes = {'both': [True, False], 'gated': [True], 'ungated': [False]}[options['mode']]
+            for gated in modes:
+                self.report('gate bilan' if gated else 'gate siz', self.run(users, gated, options))
+        finally:
+            User.objects.filter(username__startswith=f'bench_login_{suffix}_').delete()
+
+    def run(self, users, gated, options):
+        interval = options['duration'] / len(users)
+        logins = [
+            (i * interval, user.email if i % 2 else user.username)
+            for i, user in enumerate(users)
+        ]
+        per_worker = [logins[w::options['workers']] for w in range(options['workers'])]
+        connections.close_all()
+        start_at = time.time() + 1
+        with multiprocessing.get_context('fork').Pool(options['workers']) as pool:
+            outputs = pool.starmap(_run_worker, [
+                (chunk, start_at, options['threads'], gated, options['timeout']) for chunk in per_worker
+            ])
+        results = [result for worker_results, _, _ in outputs for result in worker_results]
+        hashes = sum(worker_hashes for _, worker_hashes, _ in outputs)
+        probes = sorted(probe for _, _, worker_probes in outputs for probe in worker_probes)
+        return results, hashes, probes, time.time() - start_at
+
+    def report(self, label, run):
+        results, hashes, probes, elapsed = run
+        ok = [latency for status, latency, _, _ in results if status == 200]
+        failed = len(results) - len(ok)
+        rejected = sum(result[2] for result in results)
+        slow = sum(result[3] for result in results)
+        latencies = sorted(latency for _, latency, _, _ in results)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:>11}: {len(ok)}/{len(results)} muvaffaqiyatli, {failed} xato, {slow} ta so'rov timeout'dan uzoq, "
+            f"{rejected} ta 503; login vaqti p50 {statistics.median(latencies):.1f} s, p95 {p95:.1f} s, "
+            f"maks {latencies[-1]:.1f} s; {hashes / len(results):.2f} xesh/login; jami {elapsed:.0f} s"
+        )
+        if probes:
+            self.stdout.write(
+                f"{'':>11}  boshqa so'rovlar (login sahifasi GET): p50 {statistics.median(probes) * 1000:.0f} ms, "
+                f"p95 {probes[int(len(probes) * 0.95) - 1] * 1000:.0f} ms"
+            )
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts.roster import RosterError, import_roster, process_roster_queue, read_roster
+
+HASH_CHUNK_SIZE = 16
+PARALLEL_HASH_MIN_ROWS = 32  # kichik ro'yxat uchun pul ochish arzonroq emas
+
+
+def hash_passwords(passwords, processes=None):
+    """Parollarni jarayonlar pulida xeshlash (PBKDF2 CPU'ni band qiladi, GIL bu yerda to'siq).
+
+    Faqat shu buyruqda - web worker ichida fork qilish xavfli.
+    """
+    passwords = list(passwords)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(passwords) < PARALLEL_HASH_MIN_ROWS:
+        return [make_password(password) for password in passwords]
+    # fork: bola jarayonlar sozlangan Django'ni meros oladi. Ochiq DB ulanishlari
+    # bola jarayonlarga o'tmasligi uchun oldin yopiladi (keyingi so'rovda qayta ochiladi)
+    connections.close_all()
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork')) as pool:
+        return list(pool.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+class Command(BaseCommand):
+    help = (
+        "O'quvchilar ro'yxatini (CSV/XLSX) import qilish - foydalanuvchilar tasdiqlangan holda yaratiladi. "
+        "--queue: admin sahifasidan navbatga qo'yilgan fayllarni import qilish"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help=".csv yoki .xlsx fayl")
+        parser.add_argument('--queue', action='store_true', help="Navbatdagi (ROSTER_QUEUE_DIR) fayllarni import qilish")
+        parser.add_argument('--loop', action='store_true', help="--queue bilan: to'xtovsiz ishlash (scheduler rejimi)")
+        parser.add_argument('--interval', type=int, default=30, help="--loop rejimida tekshirishlar orasidagi soniyalar")
+        parser.add_argument('--processes', type=int, default=None, help="Parol xeshlash jarayonlari (standart: CPU soni)")
+        parser.add_argument('--skip-invalid', action='store_true', help="Xato qatorlarni tashlab qolganlarini import qilish")
+        parser.add_argument('--dry-run', action='store_true', help="Faqat tekshirish, hech narsa yozilmaydi")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        hasher = partial(hash_passwords, processes=options['processes'])
+        if options['queue']:
+            while True:
+                self.import_queue(hasher, options['batch_size'])
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+        if not options['path']:
+            raise CommandError("Fayl yo'li yoki --queue ko'rsatilishi kerak")
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as roster_file:
+                rows = read_roster(roster_file, options['path'])
+        except (OSError, RosterError) as e:
+            raise CommandError(str(e))
+
+        result = import_roster(
+            rows,
+            hash_passwords=hasher,
+            skip_invalid=options['skip_invalid'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size']
+        )
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"{error['row']}-qator: {error['error']}"))
+
+        elapsed = time.monotonic() - started
+        if result['errors'] and not options['skip_invalid']:
+            raise CommandError(
+                f"{len(result['errors'])} ta xato qator - hech narsa import qilinmadi (--skip-invalid bilan qolganlarini import qilish mumkin)"
+            )
+        if options['dry_run']:
+            self.stdout.write(f"{result['valid']} ta qator to'g'ri ({elapsed:.1f} s)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{result['created']} ta o'quvchi yaratildi ({elapsed:.1f} s)"))
+
+    def import_queue(self, hasher, batch_size):
+        started = time.monotonic()
+        for name, result in process_roster_queue(hash_passwords=hasher, batch_size=batch_size):
+            if result is None:
+                self.stdout.write(self.style.ERROR(f"{name}: import xato bilan tugadi (.failed)"))
+                continue
+            for error in result['errors']:
+                self.stdout.write(self.style.WARNING(f"{name}, {error['row']}-qator: {error['error']}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {result['created']} ta o'quvchi yaratildi ({time.monotonic() - started:.1f} s)"
+            ))
@@ -29,6 +29,19 @@ class User(AbstractUser):
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name']
     
+    # Keshdagi proyeksiyadan tiklangan foydalanuvchi uchun (accounts/backends.py):
+    # sessiyani tekshirishda parol maydoni DB'dan yuklanmaydi
+    _cached_session_auth_hash = None
+    
+    def get_session_auth_hash(self):
+        if self._cached_session_auth_hash is not None:
+            return self._cached_session_auth_hash
+        return super().get_session_auth_hash()
+    
+    def set_password(self, raw_password):
+        self._cached_session_auth_hash = None
+        super().set_password(raw_password)
+    
     def clean(self):
         super().clean()
         # Skip email domain validation for superusers
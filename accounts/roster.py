@@ -0,0 +1,293 @@
+"""
+O'quvchilar ro'yxatini (CSV/XLSX) ommaviy import qilish.
+
+Qatorlar bazadagi mavjud username, email va student_id'lar bilan to'plam
+so'rovlari orqali bir yo'la tekshiriladi, foydalanuvchilar va tasdiqlangan
+VerificationRequest yozuvlari bulk_create bilan qo'shiladi. signup_view'dagi
+har bir o'quvchi uchun alohida saqlash va tekshirish so'rovlari bo'lmaydi.
+
+Parol xeshlash (PBKDF2, har biri ~0.3 s) web so'rovga sig'maydi: sahifa faylni
+faqat tekshiradi va navbatga (ROSTER_QUEUE_DIR) shifrlangan holda yozadi,
+import_roster --queue buyrug'i uni jarayonlar pulida xeshlab import qiladi.
+"""
+import base64
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.utils.crypto import salted_hmac
+from django.db import transaction
+from django.utils import timezone
+
+from .models import User, VerificationRequest
+
+# Ixtiyoriy ustunlar: student_id, phone_number
+REQUIRED_COLUMNS = ('username', 'email', 'password', 'first_name', 'last_name', 'grade', 'class_name')
+ALLOWED_EMAIL_DOMAINS = ('buxorobilimdonlar.uz', 'student.buxorobilimdonlar.uz')
+LOOKUP_CHUNK_SIZE = 500
+QUEUE_SUFFIX = '.job'
+
+logger = logging.getLogger(__name__)
+
+
+class RosterError(ValueError):
+    """Faylni umuman o'qib bo'lmasa (format, ustunlar)"""
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_roster(file, filename):
+    """Fayldan qatorlar: [(qator raqami, {ustun: qiymat})]"""
+    if filename.lower().endswith('.csv'):
+        content = file.read()
+        if isinstance(content, bytes):
+            content = content.decode('utf-8-sig')
+        reader = csv.reader(io.StringIO(content))
+        table = list(reader)
+    elif filename.lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        table = list(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+    else:
+        raise RosterError('Faqat .csv va .xlsx fayllar qabul qilinadi')
+
+    if not table:
+        raise RosterError("Fayl bo'sh")
+    headers = [_normalize_header(value) for value in table[0]]
+    missing = [column for column in REQUIRED_COLUMNS if column not in headers]
+    if missing:
+        raise RosterError(f"Ustunlar yo'q: {', '.join(missing)}")
+
+    rows = []
+    for row_num, values in enumerate(table[1:], 2):
+        row = {header: _clean(value) for header, value in zip(headers, values) if header}
+        if any(row.values()):
+            rows.append((row_num, row))
+    return rows
+
+
+def _existing(field, values):
+    """Bazada mavjud qiymatlar to'plami - bo'laklab bitta __in so'rovi bilan"""
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        found.update(
+            User.objects.filter(**{f'{field}__in': values[start:start + LOOKUP_CHUNK_SIZE]})
+            .values_list(field, flat=True)
+        )
+    return found
+
+
+def validate_roster(rows):
+    """Qatorlarni tekshirish. (to'g'ri qatorlar, [{'row': n, 'error': ...}]) qaytaradi"""
+    errors = []
+    valid = []
+    seen = {'username': set(), 'email': set(), 'student_id': set()}
+
+    for row_num, row in rows:
+        missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+        if missing:
+            errors.append({'row': row_num, 'error': f"Bo'sh maydonlar: {', '.join(missing)}"})
+            continue
+        if row['email'].split('@')[-1].lower() not in ALLOWED_EMAIL_DOMAINS:
+            errors.append({'row': row_num, 'error': 'Email must be from school domain'})
+            continue
+        try:
+            row['grade'] = int(row['grade'])
+        except ValueError:
+            errors.append({'row': row_num, 'error': f"Sinf raqam bo'lishi kerak: {row['grade']}"})
+            continue
+        try:
+            # AUTH_PASSWORD_VALIDATORS - signup'dagi kabi, foydalanuvchi ma'lumotlariga o'xshashlik ham
+            validate_password(row['password'], User(
+                username=row['username'], email=row['email'],
+                first_name=row['first_name'], last_name=row['last_name']
+            ))
+        except ValidationError as e:
+            errors.append({'row': row_num, 'error': ' '.join(e.messages)})
+            continue
+
+        duplicate = next(
+            (field for field in seen if row.get(field) and row[field] in seen[field]), None
+        )
+        if duplicate:
+            errors.append({'row': row_num, 'error': f"Faylda takroriy {duplicate}: {row[duplicate]}"})
+            continue
+        for field in seen:
+            if row.get(field):
+                seen[field].add(row[field])
+        valid.append((row_num, row))
+
+    existing = {field: _existing(field, values) for field, values in seen.items() if values}
+    checked = []
+    for row_num, row in valid:
+        taken = next(
+            (field for field, values in existing.items() if row.get(field) in values), None
+        )
+        if taken:
+            errors.append({'row': row_num, 'error': f"{taken} allaqachon mavjud: {row[taken]}"})
+        else:
+            checked.append((row_num, row))
+
+    errors.sort(key=lambda error: error['row'])
+    return checked, errors
+
+
+def import_roster(rows, processed_by=None, hash_passwords=None, skip_invalid=False, dry_run=False, batch_size=500):
+    """Ro'yxatni import qilish.
+
+    hash_passwords - parollar ro'yxatini xeshlaydigan funksiya (import_roster
+    buyrug'i jarayonlar pulini beradi), standart - ketma-ket make_password.
+    Xatolar bo'lsa (skip_invalid bo'lmasa) hech narsa yozilmaydi.
+    {'created': n, 'errors': [...]} qaytaradi.
+    """
+    valid, errors = validate_roster(rows)
+    if (errors and not skip_invalid) or dry_run or not valid:
+        return {'created': 0, 'valid': len(valid), 'errors': errors}
+
+    # Xeshlash tranzaksiyadan tashqarida - DB qulfi uzoq ushlanmaydi
+    passwords = [row['password'] for _, row in valid]
+    passwords = hash_passwords(passwords) if hash_passwords else [make_password(password) for password in passwords]
+    now = timezone.now()
+    users = [
+        User(
+            username=row['username'],
+            email=row['email'],
+            password=password,
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            role='student',
+            grade=row['grade'],
+            class_name=row['class_name'],
+            student_id=row.get('student_id') or None,
+            phone_number=row.get('phone_number') or None,
+            is_verified=True,
+        )
+        for (_, row), password in zip(valid, passwords)
+    ]
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+        VerificationRequest.objects.bulk_create(
+            [
+                VerificationRequest(user=user, is_approved=True, processed_by=processed_by, processed_at=now)
+                for user in users
+            ],
+            batch_size=batch_size
+        )
+    return {'created': len(users), 'valid': len(valid), 'errors': errors}
+
+
+def _queue_cipher():
+    """Navbat fayllari uchun Fernet: kalit SECRET_KEY'dan (va SECRET_KEY_FALLBACKS'dan) olinadi.
+
+    cryptography faqat shu yerda import qilinadi - sahifalarni ochish vaqtiga ta'sir qilmaydi.
+    """
+    from cryptography.fernet import Fernet, MultiFernet
+
+    secrets = [settings.SECRET_KEY, *getattr(settings, 'SECRET_KEY_FALLBACKS', [])]
+    keys = [
+        salted_hmac('accounts.roster.queue', b'', secret=secret, algorithm='sha256').digest()
+        for secret in secrets
+    ]
+    return MultiFernet([Fernet(base64.urlsafe_b64encode(key)) for key in keys])
+
+
+def queue_roster(rows, processed_by=None, skip_invalid=False):
+    """Tekshirilgan qatorlarni import_roster --queue uchun navbat fayliga yozish.
+
+    Qatorlarda ochiq parollar bor - fayl shifrlanadi (diskda ochiq parol
+    qolmaydi), faqat egasi o'qiy oladi va import qilingach o'chiriladi.
+    Navbat fayli nomini qaytaradi.
+    """
+    queue_dir = settings.ROSTER_QUEUE_DIR
+    os.makedirs(queue_dir, mode=0o700, exist_ok=True)
+    name = f"{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}{QUEUE_SUFFIX}"
+    payload = json.dumps({
+        'processed_by': processed_by.id if processed_by else None,
+        'skip_invalid': skip_invalid,
+        'rows': rows,
+    }).encode()
+    # Vaqtinchalik nomdan rename - buyruq yarim yozilgan faylni olmaydi
+    temp_path = os.path.join(queue_dir, f'.{name}.tmp')
+    descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, 'wb') as queue_file:
+        queue_file.write(_queue_cipher().encrypt(payload))
+    os.replace(temp_path, os.path.join(queue_dir, name))
+    return name
+
+
+def _store_failure(path, error=None, errors=()):
+    """Xato hisobotini .failed fayliga yozib, navbat faylini o'chirish.
+
+    Hisobotda faqat qator raqamlari va xato matnlari - parollar emas.
+    """
+    with open(f'{path}.failed', 'w', encoding='utf-8') as report:
+        json.dump({'error': error, 'errors': list(errors)}, report, ensure_ascii=False)
+    os.remove(f'{path}.processing')
+
+
+def process_roster_queue(hash_passwords=None, batch_size=500):
+    """Navbatdagi fayllarni import qilish. [(fayl, natija yoki None)] qaytaradi.
+
+    Fayl avval .processing nomiga o'tkaziladi - bir vaqtda ishlagan ikki buyruq
+    bitta faylni ikki marta import qilmaydi. Xato bilan tugagan yoki birorta
+    o'quvchi yaratilmagan navbat fayli o'chiriladi, o'rniga parolsiz .failed
+    hisoboti qoladi.
+    """
+    queue_dir = settings.ROSTER_QUEUE_DIR
+    if not os.path.isdir(queue_dir):
+        return []
+    processed = []
+    for name in sorted(os.listdir(queue_dir)):
+        if not name.endswith(QUEUE_SUFFIX):
+            continue
+        path = os.path.join(queue_dir, name)
+        processing = f'{path}.processing'
+        try:
+            os.rename(path, processing)
+        except FileNotFoundError:
+            continue
+        try:
+            with open(processing, 'rb') as queue_file:
+                job = json.loads(_queue_cipher().decrypt(queue_file.read()))
+            processed_by = User.objects.filter(id=job['processed_by']).first() if job['processed_by'] else None
+            result = import_roster(
+                [(row_num, row) for row_num, row in job['rows']],
+                processed_by=processed_by,
+                hash_passwords=hash_passwords,
+                skip_invalid=job['skip_invalid'],
+                batch_size=batch_size
+            )
+        except Exception as e:
+            logger.error(f'Error importing queued roster {name}: {str(e)}', exc_info=True)
+            _store_failure(path, error=str(e))
+            processed.append((name, None))
+            continue
+        if result['errors']:
+            logger.warning(f"Queued roster {name}: {len(result['errors'])} invalid rows, {result['created']} created")
+        if result['errors'] and not result['created']:
+            _store_failure(path, errors=result['errors'])
+        else:
+            os.remove(processing)
+        processed.append((name, result))
+    return processed
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .backends import invalidate_user
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Profil, admin yoki tasdiqlashda foydalanuvchi o'zgarsa keshdagi proyeksiyani o'chirish"""
+    user_id = instance.pk
+    invalidate_user(user_id)
+    # Tranzaksiya ichida eski qiymat qayta keshlanib qolmasligi uchun commit'dan keyin ham
+    transaction.on_commit(lambda: invalidate_user(user_id))
@@ -1,3 +1,184 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .backends import UsernameOrEmailBackend, _user_key
+from .models import User, VerificationRequest
+from .roster import read_roster, validate_roster
+from .verification import process_requests
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'accounts-tests'}}
+ROSTER_HEADER = 'username,email,password,first_name,last_name,grade,class_name\n'
+
+
+def roster_csv(*rows):
+    return (ROSTER_HEADER + ''.join(f'{row}\n' for row in rows)).encode()
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.queue_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(ROSTER_QUEUE_DIR=self.queue_dir)
+        self.settings_override.enable()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@buxorobilimdonlar.uz', password='pw12345!', role='admin'
+        )
+        self.client.force_login(self.admin)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.queue_dir)
+
+    def upload(self, content, **data):
+        return self.client.post('/accounts/roster-import/', {
+            'roster_file': SimpleUploadedFile('roster.csv', content, content_type='text/csv'), **data
+        })
+
+    def test_weak_passwords_are_rejected(self):
+        rows = read_roster(BytesIO(roster_csv(
+            'ali,ali@student.buxorobilimdonlar.uz,12345678,Ali,Valiyev,7,A',
+            'vali,vali@student.buxorobilimdonlar.uz,Kitob-Daftar-91,Vali,Aliyev,7,A',
+        )), 'roster.csv')
+
+        valid, errors = validate_roster(rows)
+
+        self.assertEqual([row['username'] for _, row in valid], ['vali'])
+        self.assertEqual([error['row'] for error in errors], [2])
+
+    def test_view_queues_without_hashing(self):
+        with mock.patch('accounts.roster.make_password') as make_password:
+            response = self.upload(roster_csv(
+                'ali,ali@student.buxorobilimdonlar.uz,Kitob-Daftar-91,Ali,Valiyev,7,A'
+            ))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['queued'], 1)
+        make_password.assert_not_called()
+        self.assertFalse(User.objects.filter(username='ali').exists())
+        [name] = os.listdir(self.queue_dir)
+        # Navbat fayli shifrlangan - diskda ochiq parol yo'q
+        with open(os.path.join(self.queue_dir, name), 'rb') as queue_file:
+            self.assertNotIn(b'Kitob-Daftar-91', queue_file.read())
+
+    def test_invalid_file_is_not_queued(self):
+        response = self.upload(roster_csv('ali,ali@gmail.com,Kitob-Daftar-91,Ali,Valiyev,7,A'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(self.queue_dir), [])
+
+    def test_command_imports_queue(self):
+        self.upload(roster_csv(
+            'ali,ali@student.buxorobilimdonlar.uz,Kitob-Daftar-91,Ali,Valiyev,7,A',
+            'vali,vali@student.buxorobilimdonlar.uz,Qalam-Sinf-7b,Vali,Aliyev,7,B',
+        ))
+
+        call_command('import_roster', queue=True, stdout=StringIO())
+        call_command('import_roster', queue=True, stdout=StringIO())
+
+        ali = User.objects.get(username='ali')
+        self.assertTrue(ali.check_password('Kitob-Daftar-91'))
+        self.assertTrue(ali.is_verified)
+        self.assertEqual(ali.verificationrequest.processed_by, self.admin)
+        self.assertEqual(User.objects.filter(role='student').count(), 2)
+        self.assertEqual(os.listdir(self.queue_dir), [])
+
+    def test_failed_job_keeps_only_report(self):
+        self.upload(roster_csv('ali,ali@student.buxorobilimdonlar.uz,Kitob-Daftar-91,Ali,Valiyev,7,A'))
+        # Navbatga qo'yilgandan keyin shu username band bo'ldi - import xato bilan tugaydi
+        User.objects.create_user(username='ali', email='ali2@buxorobilimdonlar.uz', password='pw12345!')
+
+        call_command('import_roster', queue=True, stdout=StringIO())
+
+        [name] = os.listdir(self.queue_dir)
+        self.assertTrue(name.endswith('.failed'))
+        with open(os.path.join(self.queue_dir, name), 'rb') as report:
+            content = report.read()
+        self.assertNotIn(b'Kitob-Daftar-91', content)
+        self.assertEqual(json.loads(content)['errors'][0]['row'], 2)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class CachedUserTests(TestCase):
+    """Keshdagi foydalanuvchi proyeksiyasi (UsernameOrEmailBackend.get_user) eskirmasligi"""
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(
+            username='ali', email='ali@student.buxorobilimdonlar.uz', password='pw12345!',
+            role='student', grade=7, is_verified=True
+        )
+        self.client.force_login(self.student)
+        # Birinchi so'rov proyeksiyani keshlaydi, keyingilari DB'ga murojaat qilmaydi
+        self.assertEqual(self.client.get('/accounts/dashboard/').status_code, 200)
+        self.assertIsNotNone(cache.get(_user_key(self.student.id)))
+
+    def assertLoggedOut(self):
+        response = self.client.get('/accounts/dashboard/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login/', response['Location'])
+
+    def test_password_change_logs_out_stale_session(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.set_password('Yangi-Parol-42')
+            self.student.save()
+
+        self.assertIsNone(cache.get(_user_key(self.student.id)))
+        self.assertLoggedOut()
+
+    def test_deactivation_logs_out(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.is_active = False
+            self.student.save(update_fields=['is_active'])
+
+        self.assertLoggedOut()
+
+    def admin_save(self, client, **fields):
+        """Admin o'zgartirish formasi orqali saqlash (belgilanmagan checkbox - False)"""
+        data = {
+            'username': 'ali', 'email': 'ali@student.buxorobilimdonlar.uz', 'first_name': 'Ali', 'last_name': 'Valiyev',
+            'role': 'student', 'grade': 7, 'class_name': '', 'student_id': '', 'phone_number': '', 'subject': '',
+            'last_login_0': '', 'last_login_1': '', **fields
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f'/admin/accounts/user/{self.student.id}/change/', data)
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_save_refreshes_projection(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@buxorobilimdonlar.uz', password='pw12345!', role='admin'
+        )
+        admin_client = self.client_class()
+        admin_client.force_login(admin)
+
+        self.admin_save(admin_client, grade=8, class_name='B', is_verified='on', is_active='on')
+        user = UsernameOrEmailBackend().get_user(self.student.id)
+        self.assertEqual((user.grade, user.class_name), (8, 'B'))
+
+        # is_active olib tashlandi - eski sessiya keyingi so'rovda chiqariladi
+        self.admin_save(admin_client, is_verified='on')
+        self.assertLoggedOut()
+
+    def test_verification_approval_clears_projection(self):
+        self.student.is_verified = False
+        self.student.save()
+        UsernameOrEmailBackend().get_user(self.student.id)
+        VerificationRequest.objects.create(user=self.student)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_requests(VerificationRequest.objects.all(), True, None)
+
+        self.assertIsNone(cache.get(_user_key(self.student.id)))
+        self.assertTrue(UsernameOrEmailBackend().get_user(self.student.id).is_verified)
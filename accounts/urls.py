@@ -12,5 +12,7 @@ urlpatterns = [
     path('verification-requests/', views.verification_requests_view, name='verification_requests'),
     path('approve-verification/<int:request_id>/', views.approve_verification, name='approve_verification'),
     path('reject-verification/<int:request_id>/', views.reject_verification, name='reject_verification'),
+    path('bulk-verification/', views.bulk_verification_view, name='bulk_verification'),
+    path('roster-import/', views.roster_import_view, name='roster_import'),
     path('analytics/', views.analytics_view, name='analytics'),
 ]
@@ -0,0 +1,58 @@
+"""
+Tasdiqlash so'rovlarini ommaviy ko'rib chiqish.
+
+Filtrlangan to'plam (id'lar, sinf, guruh, rol) bitta tranzaksiyada ikki
+UPDATE bilan tasdiqlanadi yoki rad etiladi: VerificationRequest qatorlari
+va (tasdiqlashda) User.is_verified. queryset.update() signal yubormaydi,
+shuning uchun foydalanuvchilar keshi alohida o'chiriladi.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .backends import invalidate_users
+from .models import User, VerificationRequest
+
+FILTER_FIELDS = {
+    'grade': 'user__grade',
+    'class_name': 'user__class_name',
+    'role': 'user__role',
+}
+
+
+def filter_requests(queryset, filters):
+    """ids, grade, class_name va role bo'yicha filtrlash (bo'sh qiymatlar e'tiborsiz)"""
+    if filters.get('ids'):
+        queryset = queryset.filter(id__in=[int(request_id) for request_id in filters['ids']])
+    for key, lookup in FILTER_FIELDS.items():
+        value = filters.get(key)
+        if value not in (None, ''):
+            queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+def process_requests(queryset, approve, processed_by, reason=''):
+    """Kutilayotgan so'rovlarni tasdiqlash yoki rad etish.
+
+    {'processed': n, 'verified_users': m} qaytaradi.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = list(
+            queryset.filter(is_approved=None).select_for_update().values_list('id', 'user_id')
+        )
+        if not pending:
+            return {'processed': 0, 'verified_users': 0}
+        request_ids = [request_id for request_id, _ in pending]
+        user_ids = [user_id for _, user_id in pending]
+
+        changes = {'is_approved': approve, 'processed_by': processed_by, 'processed_at': now}
+        if not approve:
+            changes['rejection_reason'] = reason
+        processed = VerificationRequest.objects.filter(id__in=request_ids).update(**changes)
+
+        verified_users = 0
+        if approve:
+            verified_users = User.objects.filter(id__in=user_ids).update(is_verified=True, updated_at=now)
+            transaction.on_commit(lambda: invalidate_users(user_ids))
+
+    return {'processed': processed, 'verified_users': verified_users}
@@ -7,9 +7,17 @@ from django.views.decorators.http import require_http_methods
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.core.paginator import Paginator
 from .models import User, VerificationRequest
+from .dashboard import get_student_summary, NO_BEST_RESULT
+from .admission import login_gate, admission_controlled
+from .roster import RosterError, read_roster, validate_roster, queue_roster
+from .verification import filter_requests, process_requests
 import json
 
+VERIFICATION_PAGE_SIZE = 50
+VERIFICATION_MAX_PAGE_SIZE = 200
+
 def signup_view(request):
     if request.method == 'POST':
         try:
@@ -72,6 +80,7 @@ def signup_view(request):
     
     return render(request, 'accounts/signup.html')
 
+@admission_controlled(login_gate)
 def login_view(request):
     if request.method == 'POST':
         try:
@@ -82,17 +91,9 @@ def login_view(request):
             if not username_or_email or not password:
                 return JsonResponse({'error': 'Username/Email and password are required'}, status=400)
             
-            # Try to authenticate with username first
+            # Username yoki email - UsernameOrEmailBackend bitta so'rov va bitta xesh bilan tekshiradi
             user = authenticate(request, username=username_or_email, password=password)
             
-            # If that fails, try to find user by email and authenticate
-            if user is None:
-                try:
-                    user_obj = User.objects.get(email=username_or_email)
-                    user = authenticate(request, username=user_obj.username, password=password)
-                except User.DoesNotExist:
-                    pass
-            
             if user is not None:
                 if not user.is_verified:
                     return JsonResponse({'error': 'Account not verified yet. Please wait for admin approval.'}, status=403)
@@ -125,7 +126,6 @@ def logout_view(request):
 
 @login_required
 def dashboard_view(request):
-    from tests_app.models import TestResult, TestAttempt, Test
     from django.db import connection
     
     context = {
@@ -150,211 +150,19 @@ def dashboard_view(request):
             logger.error(f'Error fetching test count in dashboard_view: {str(e)}')
             context['total_tests'] = 0
     elif request.user.role == 'student':
-        # O'quvchi uchun natijalarni olish - xavfsiz versiya (is_paused maydonini tekshirmaslik uchun)
+        # O'quvchi uchun natijalar: bitta aggregate + oxirgi 5 ta natija, keshlanadi
         try:
-            # Raw SQL yordamida TestResult ID'larni olish
-            result_ids = []
-            try:
-                with connection.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT tr.id FROM tests_app_testresult tr
-                        INNER JOIN tests_app_testattempt ta ON tr.attempt_id = ta.id
-                        WHERE ta.student_id = %s
-                        ORDER BY ta.started_at DESC
-                        LIMIT 5
-                    """, [request.user.id])
-                    result_ids = [row[0] for row in cursor.fetchall()]
-            except Exception as db_error:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f'Error fetching result IDs in dashboard_view: {str(db_error)}')
-                result_ids = []
-            
-            # TestResult obyektlarini xavfsiz yuklash
-            test_results = []
-            for result_id in result_ids:
-                try:
-                    result = TestResult.objects.select_related('attempt').get(id=result_id)
-                    # Test nomini raw SQL yordamida olish (is_paused maydonini tekshirmaslik uchun)
-                    test_id = result.attempt.test_id
-                    try:
-                        with connection.cursor() as cursor:
-                            cursor.execute("SELECT id, title FROM tests_app_test WHERE id = %s", [test_id])
-                            row = cursor.fetchone()
-                            if row:
-                                test_title = row[1]
-                                result.attempt._test_cache = type('Test', (), {'id': row[0], 'title': test_title})()
-                                test_results.append(result)
-                    except Exception:
-                        continue
-                except Exception:
-                    continue
-            
-            context['recent_results'] = []
-            for result in test_results:
-                # Grade ni hisoblash - безопасная версия
-                try:
-                    if (result.attempt and 
-                        result.attempt.score is not None and 
-                        result.attempt.total_points is not None and 
-                        result.attempt.total_points > 0):
-                        percentage = (result.attempt.score / result.attempt.total_points * 100)
-                    else:
-                        percentage = 0
-                except (TypeError, ZeroDivisionError):
-                    percentage = 0
-                    
-                if percentage >= 81:
-                    grade = "A'lo"
-                elif percentage >= 61:
-                    grade = 'Yaxshi'
-                elif percentage >= 31:
-                    grade = 'Qoniqarli'
-                else:
-                    grade = 'Qoniqarsiz'
-                
-                # Test nomini xavfsiz olish
-                test_title = getattr(result.attempt._test_cache, 'title', 'Noma\'lum test') if hasattr(result.attempt, '_test_cache') else 'Noma\'lum test'
-                test_id = getattr(result.attempt._test_cache, 'id', 0) if hasattr(result.attempt, '_test_cache') else 0
-                    
-                context['recent_results'].append({
-                    'test_name': test_title,
-                    'score': result.attempt.score,
-                    'max_score': result.attempt.total_points,
-                    'percentage': percentage,
-                    'grade': grade,
-                    'created_at': result.attempt.started_at,
-                    'test_id': test_id
-                })
+            context.update(get_student_summary(request.user.id))
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f'Error in dashboard_view (student results): {str(e)}', exc_info=True)
-            context['recent_results'] = []
-        
-        # Umumiy statistika - xavfsiz versiya
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM tests_app_testresult tr
-                    INNER JOIN tests_app_testattempt ta ON tr.attempt_id = ta.id
-                    WHERE ta.student_id = %s
-                """, [request.user.id])
-                context['total_tests'] = cursor.fetchone()[0]
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f'Error fetching total tests count in dashboard_view: {str(e)}')
-            context['total_tests'] = 0
-        
-        # all_results ni xavfsiz yuklash
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT tr.id FROM tests_app_testresult tr
-                    INNER JOIN tests_app_testattempt ta ON tr.attempt_id = ta.id
-                    WHERE ta.student_id = %s
-                """, [request.user.id])
-                result_ids = [row[0] for row in cursor.fetchall()]
-            
-            all_results = []
-            for result_id in result_ids:
-                try:
-                    result = TestResult.objects.select_related('attempt').get(id=result_id)
-                    all_results.append(result)
-                except Exception:
-                    continue
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f'Error fetching all results in dashboard_view: {str(e)}')
-            all_results = []
-        
-        if all_results:
-            # Безопасное вычисление среднего балла
-            total_percentage = 0
-            valid_results = 0
-            
-            for r in all_results:
-                try:
-                    if (r.attempt and 
-                        r.attempt.score is not None and 
-                        r.attempt.total_points is not None and 
-                        r.attempt.total_points > 0):
-                        total_percentage += (r.attempt.score / r.attempt.total_points * 100)
-                        valid_results += 1
-                except (TypeError, ZeroDivisionError):
-                    continue
-            
-            context['average_score'] = total_percentage / valid_results if valid_results > 0 else 0
-            
-            # Безопасное нахождение лучшего результата
-            best_result = None
-            best_percentage = 0
-            
-            for r in all_results:
-                try:
-                    if (r.attempt and 
-                        r.attempt.score is not None and 
-                        r.attempt.total_points is not None and 
-                        r.attempt.total_points > 0):
-                        current_percentage = (r.attempt.score / r.attempt.total_points * 100)
-                        if current_percentage > best_percentage:
-                            best_percentage = current_percentage
-                            best_result = r
-                except (TypeError, ZeroDivisionError):
-                    continue
-            
-            if best_result:
-                # Grade ni hisoblash
-                if best_percentage >= 81:
-                    best_grade = "A'lo"
-                elif best_percentage >= 61:
-                    best_grade = 'Yaxshi'
-                elif best_percentage >= 31:
-                    best_grade = 'Qoniqarli'
-                else:
-                    best_grade = 'Qoniqarsiz'
-                
-                # Test nomini xavfsiz olish (raw SQL yordamida)
-                test_title = 'Noma\'lum test'
-                try:
-                    if hasattr(best_result.attempt, '_test_cache'):
-                        test_title = getattr(best_result.attempt._test_cache, 'title', 'Noma\'lum test')
-                    else:
-                        test_id = best_result.attempt.test_id
-                        with connection.cursor() as cursor:
-                            cursor.execute("SELECT title FROM tests_app_test WHERE id = %s", [test_id])
-                            row = cursor.fetchone()
-                            if row:
-                                test_title = row[0]
-                except Exception:
-                    pass
-                    
-                context['best_result'] = {
-                    'test_name': test_title,
-                    'score': best_result.attempt.score,
-                    'max_score': best_result.attempt.total_points,
-                    'percentage': best_percentage,
-                    'grade': best_grade
-                }
-            else:
-                context['best_result'] = {
-                    'test_name': 'No tests completed',
-                    'score': 0,
-                    'max_score': 0,
-                    'percentage': 0,
-                    'grade': 'No grade'
-                }
-        else:
-            context['average_score'] = 0
-            context['best_result'] = {
-                'test_name': 'No tests completed',
-                'score': 0,
-                'max_score': 0,
-                'percentage': 0,
-                'grade': 'No grade'
-            }
+            context.update({
+                'recent_results': [],
+                'total_tests': 0,
+                'average_score': 0,
+                'best_result': NO_BEST_RESULT
+            })
     
     return render(request, 'accounts/dashboard.html', context)
 
@@ -392,8 +200,16 @@ def verification_requests_view(request):
         return JsonResponse({'error': 'Access denied'}, status=403)
     
     if request.method == 'GET' and request.headers.get('Accept') == 'application/json':
-        # Sinf bo'yicha tartiblab olish
-        requests = VerificationRequest.objects.filter(is_approved=None).select_related('user').order_by('user__grade', 'user__class_name', 'user__first_name')
+        # Sinf bo'yicha tartiblab olish - sahifa bitta select_related so'rovi bilan
+        requests = filter_requests(VerificationRequest.objects.filter(is_approved=None), request.GET).select_related('user').only(
+            'requested_at', 'user__username', 'user__email', 'user__first_name', 'user__last_name', 'user__role',
+            'user__student_id', 'user__class_name', 'user__grade', 'user__subject'
+        ).order_by('user__grade', 'user__class_name', 'user__first_name', 'id')
+        try:
+            page_size = min(int(request.GET.get('page_size', VERIFICATION_PAGE_SIZE)), VERIFICATION_MAX_PAGE_SIZE)
+        except ValueError:
+            page_size = VERIFICATION_PAGE_SIZE
+        page = Paginator(requests, max(page_size, 1)).get_page(request.GET.get('page'))
         requests_data = [{
             'id': req.id,
             'user': {
@@ -409,9 +225,14 @@ def verification_requests_view(request):
                 'subject': req.user.subject,
             },
             'requested_at': req.requested_at.isoformat()
-        } for req in requests]
+        } for req in page]
         
-        return JsonResponse({'requests': requests_data})
+        return JsonResponse({
+            'requests': requests_data,
+            'total': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages
+        })
     
     return render(request, 'accounts/verification_requests.html')
 
@@ -439,6 +260,76 @@ def approve_verification(request, request_id):
     except Exception as e:
         return JsonResponse({'error': 'An error occurred'}, status=500)
 
+@login_required
+def roster_import_view(request):
+    """O'quvchilar ro'yxatini (CSV/XLSX) import qilish - Admin uchun"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    if request.method == 'POST':
+        roster_file = request.FILES.get('roster_file')
+        if not roster_file:
+            return JsonResponse({'error': 'No file uploaded'}, status=400)
+        
+        skip_invalid = request.POST.get('skip_invalid') in ('1', 'true', 'on')
+        try:
+            # Faqat tekshirish - parollarni xeshlash (har biri ~0.3 s) import_roster --queue buyrug'ida
+            valid, errors = validate_roster(read_roster(roster_file, roster_file.name))
+            if (errors and not skip_invalid) or not valid:
+                return JsonResponse({
+                    'error': f"{len(errors)} ta xato qator - hech narsa import qilinmadi",
+                    'errors': errors
+                }, status=400)
+            queue_roster(valid, processed_by=request.user, skip_invalid=skip_invalid)
+        except RosterError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f'Error queueing roster: {str(e)}')
+            return JsonResponse({'error': 'An error occurred during import'}, status=500)
+        
+        return JsonResponse({
+            'message': f"{len(valid)} ta o'quvchi import navbatiga qo'yildi - bir necha daqiqada yaratiladi",
+            'queued': len(valid),
+            'errors': errors
+        }, status=202)
+    
+    return render(request, 'accounts/roster_import.html')
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_verification_view(request):
+    """Tasdiqlash so'rovlarini ommaviy tasdiqlash yoki rad etish - Admin uchun"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        action = data.get('action')
+        if action not in ('approve', 'reject'):
+            return JsonResponse({'error': 'action must be approve or reject'}, status=400)
+        # Tasodifan barcha so'rovlarni ko'rib chiqmaslik uchun kamida bitta filtr majburiy
+        if not any(data.get(key) not in (None, '', []) for key in ('ids', 'grade', 'class_name', 'role')):
+            return JsonResponse({'error': 'At least one filter (ids, grade, class_name, role) is required'}, status=400)
+        
+        queryset = filter_requests(VerificationRequest.objects.all(), data)
+        result = process_requests(queryset, action == 'approve', request.user, data.get('reason', ''))
+        
+        return JsonResponse({
+            'message': f"{result['processed']} ta so'rov {'tasdiqlandi' if action == 'approve' else 'rad etildi'}",
+            'processed': result['processed'],
+            'verified_users': result['verified_users']
+        })
+    
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f'Error in bulk_verification_view: {str(e)}')
+        return JsonResponse({'error': 'An error occurred'}, status=500)
+
 @login_required
 @require_http_methods(["POST"])
 def reject_verification(request, request_id):
@@ -469,7 +360,7 @@ def analytics_view(request):
     if request.user.role != 'admin':
         return JsonResponse({'error': 'Access denied'}, status=403)
     
-    from tests_app.models import Test, TestAttempt, TestResult, Question
+    from tests_app.models import Test, TestAttempt, TestResult, Question, StudentStats
     from django.db.models import Count, Avg, Q, Sum
     from django.utils import timezone
     from datetime import timedelta
@@ -566,30 +457,22 @@ def analytics_view(request):
         logger.error(f'Error in analytics_view (subject_stats): {str(e)}', exc_info=True)
         subject_stats = []
     
-    # Eng faol o'quvchilar (top 10)
-    top_students = User.objects.filter(
-        role='student',
-        is_verified=True
-    ).annotate(
-        attempts_count=Count('test_attempts', filter=Q(test_attempts__is_completed=True))
-    ).order_by('-attempts_count')[:10]
+    # Eng faol o'quvchilar (top 10) - StudentStats proyeksiyasidan
+    top_students = StudentStats.objects.filter(
+        student__role='student',
+        student__is_verified=True,
+        attempts_count__gt=0
+    ).select_related('student').order_by('-attempts_count')[:10]
     
     top_students_data = []
-    for student in top_students:
-        if student.attempts_count > 0:
-            student_avg = TestAttempt.objects.filter(
-                student=student,
-                is_completed=True
-            ).aggregate(avg=Avg('percentage'))['avg'] or 0
-        else:
-            student_avg = 0
-        
+    for stats in top_students:
+        student = stats.student
         top_students_data.append({
             'name': student.get_full_name() or student.username,
             'grade': student.grade,
             'class_name': student.class_name,
-            'attempts': student.attempts_count,
-            'avg_score': round(student_avg, 1)
+            'attempts': stats.attempts_count,
+            'avg_score': round(stats.average_percentage, 1)
         })
     
     # Eng muvaffaqiyatli testlar (top 10)
@@ -311,7 +311,10 @@ def create_50_math_tests():
                         question_type=question_data['question_type'],
                         points=question_data['points'],
                         order=q_num,
-                        explanation=question_data.get('explanation', '')
+                        explanation=question_data.get('explanation', ''),
+                        topic=topic_template['topic'],
+                        # Shablonda qiyinlik yo'q - ball bo'yicha (1 - oson, 2 - o'rta, 3+ - qiyin)
+                        difficulty=min(int(question_data['points']), 3)
                     )
                     
                     # Variantlar yaratish
@@ -1,3 +1,6 @@
+import gc
+import os
+
 bind = '127.0.0.1:8000'
 workers = 3
 user = 'baxadev'
@@ -5,3 +8,39 @@ pythonpath = '/home/baxadev/my_test'
 chdir = '/home/baxadev/my_test'
 module = 'mytest.wsgi:application'
 timeout = 60
+# GUNICORN_THREADS > 1: gthread worker'lari - bir jarayon bir vaqtda bir nechta
+# so'rovga xizmat qiladi (SQLITE_TUNED bilan javoblarni guruhlab yozish shunda yoqiladi)
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+
+# GUNICORN_PROFILE=asgi: uvicorn worker'lari va imtihonning async view'lari
+# (uvicorn requirements.txt'da). Worker soni o'zgarmaydi - bitta worker bir vaqtda
+# ko'p kutayotgan so'rovga (javob yozish, SSE holat oqimi) xizmat qiladi.
+if os.environ.get('GUNICORN_PROFILE') == 'asgi':
+    module = 'mytest.asgi:application'
+    wsgi_app = module
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    raw_env = ['ASYNC_EXAM_VIEWS=true']
+
+# GUNICORN_PRELOAD=true: ilova (Django, URL'lar, view modullari) master jarayonda
+# bir marta yuklanadi, worker'lar tayyor holatdan fork qilinadi - qayta ishga
+# tushirilgan worker import qilmasdan darhol so'rov qabul qiladi, xotira
+# sahifalari esa worker'lar orasida bo'lishiladi. Kod yangilanganda HUP emas,
+# to'liq qayta ishga tushirish kerak.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # URL'lar odatda birinchi so'rovda yuklanadi - master'da oldindan yuklaymiz
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    # Yuklangan obyektlarni GC kuzatuvidan chiqarish: fork'dan keyin copy-on-write kamayadi
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Master'dagi DB ulanishlari worker'larga meros qolmasligi kerak
+        from django.db import connections
+        connections.close_all()
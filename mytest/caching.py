@@ -0,0 +1,253 @@
+"""
+Umumiy kesh qatlami.
+
+Ikki daraja:
+- "hot"     - har bir jarayon ichidagi LRU (LocMemCache). Faqat versiyali
+              kalitdagi o'zgarmas ma'lumotlar (javob kalitlari, imtihon
+              varaqalari) uchun: boshqa worker bu darajani tozalay olmaydi.
+- "default" - gunicorn worker'lari orasida umumiy kesh (fayl yoki
+              ma'lumotlar bazasi jadvali, tashqi servis kerak emas).
+
+Versiyali kalitlar: obyekt o'zgarganda bump_version() versiyani oshiradi va
+eski kalitlar o'z-o'zidan ishlatilmay qoladi - hech narsani o'chirish shart
+emas. Versiyalar signallar orqali oshiriladi (tests_app/signals.py).
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+try:
+    import fcntl
+except ImportError:  # Windows - jarayonlararo qulf cache.add() orqali
+    fcntl = None
+
+DEFAULT_TIMEOUT = 5 * 60
+HOT_TIMEOUT = 10 * 60
+LOCK_TIMEOUT = 30  # hisoblovchi jarayon o'lib qolsa qulf shuncha soniyada bo'shaydi
+LOCK_WAIT = 10  # boshqa worker natijasini kutish chegarasi
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+# Bir jarayon ichidagi oqimlar uchun qulflar (kalit xeshi bo'yicha bo'lingan)
+_LOCK_STRIPES = [threading.Lock() for _ in range(64)]
+# Jarayonlararo fayl qulflari soni - fayllar ko'payib ketmasligi uchun bo'lingan
+FILE_LOCK_STRIPES = 256
+
+
+def shared_cache():
+    return caches['default']
+
+
+def hot_cache():
+    return caches['hot']
+
+
+def _version_key(namespace, obj_id):
+    return f'version:{namespace}:{obj_id}'
+
+
+def _initial_version():
+    # Versiya kaliti keshdan chiqarib yuborilsa, 1 dan qayta boshlash eski
+    # "hot" qiymatlari bilan to'qnashadi - shuning uchun vaqtdan boshlanadi
+    return int(time.time() * 1000)
+
+
+def get_version(namespace, obj_id):
+    cache = shared_cache()
+    key = _version_key(namespace, obj_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key) or _initial_version()
+    return version
+
+
+def bump_version(namespace, obj_id):
+    """Obyektning barcha versiyali kalitlarini eskirtirish"""
+    cache = shared_cache()
+    key = _version_key(namespace, obj_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
+
+
+def versioned_key(namespace, obj_id, *parts):
+    """Masalan: versioned_key('test', 5, 'answer_key') -> 'test:5:v1712...:answer_key'"""
+    return ':'.join([namespace, str(obj_id), f'v{get_version(namespace, obj_id)}', *map(str, parts)])
+
+
+def get_versions(pairs):
+    """Bir nechta (namespace, obj_id) versiyasi bitta get_many bilan, berilgan tartibda"""
+    pairs = list(pairs)
+    found = shared_cache().get_many([_version_key(namespace, obj_id) for namespace, obj_id in pairs])
+    return [
+        found.get(_version_key(namespace, obj_id)) or get_version(namespace, obj_id)
+        for namespace, obj_id in pairs
+    ]
+
+
+def versioned_keys(namespace, obj_ids, *parts):
+    """Bir nechta obyekt uchun versiyali kalitlar: {obj_id: kalit}"""
+    obj_ids = list(obj_ids)
+    versions = get_versions((namespace, obj_id) for obj_id in obj_ids)
+    return {
+        obj_id: ':'.join([namespace, str(obj_id), f'v{version}', *map(str, parts)])
+        for obj_id, version in zip(obj_ids, versions)
+    }
+
+
+def _process_lock(key):
+    return _LOCK_STRIPES[zlib.crc32(key.encode()) % len(_LOCK_STRIPES)]
+
+
+def lock_dir():
+    """Worker'lar orasidagi fayl qulflari katalogi (CACHE_LOCK_DIR yoki vaqtinchalik katalog)"""
+    path = getattr(settings, 'CACHE_LOCK_DIR', None) or os.path.join(tempfile.gettempdir(), 'mytest-locks')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextmanager
+def _cross_process_lock(key):
+    """Worker'lar orasidagi qulf. Olinsa True, LOCK_WAIT ichida olinmasa False beradi.
+
+    POSIX'da fcntl fayl qulfi (jarayon o'lsa OS o'zi bo'shatadi), aks holda
+    umumiy keshdagi cache.add() kaliti.
+    """
+    if fcntl is None:
+        cache = shared_cache()
+        lock_key = f'lock:{key}'
+        acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+        return
+
+    stripe = zlib.crc32(key.encode()) % FILE_LOCK_STRIPES
+    with open(os.path.join(lock_dir(), f'{stripe}.lock'), 'a') as lock_file:
+        deadline = time.monotonic() + LOCK_WAIT
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _wait_for(cache, key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return _MISSING
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT, hot=False):
+    """Darajali o'qish va bitta hisoblash (single-flight).
+
+    hot -> default -> compute() tartibida qidiriladi. Kesh bo'sh bo'lsa
+    qiymatni faqat bitta oqim/worker hisoblaydi: jarayon ichida oqim qulfi,
+    jarayonlar orasida fayl qulfi. Qulfni kutganlar uni olgach keshni
+    qayta tekshiradi va tayyor natijani oladi (LOCK_WAIT dan oshsa o'zi
+    hisoblaydi).
+    """
+    if hot:
+        value = hot_cache().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    cache = shared_cache()
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        with _process_lock(key):
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                with _cross_process_lock(key) as acquired:
+                    value = cache.get(key, _MISSING)
+                    if value is _MISSING and not acquired and fcntl is None:
+                        value = _wait_for(cache, key)
+                    if value is _MISSING:
+                        value = compute()
+                        cache.set(key, value, timeout)
+
+    if hot:
+        hot_cache().set(key, value, min(timeout, HOT_TIMEOUT) if timeout else HOT_TIMEOUT)
+    return value
+
+
+def get_many_or_compute(keys, compute_missing, timeout=DEFAULT_TIMEOUT, hot=False):
+    """Bir nechta obyekt uchun darajali o'qish.
+
+    keys - {obj_id: kalit}. compute_missing(obj_ids) topilmaganlar uchun
+    {obj_id: qiymat} qaytaradi (bitta partiya so'rovi bilan).
+    """
+    found = {}
+    missing = dict(keys)
+    if hot and missing:
+        hits = hot_cache().get_many(missing.values())
+        for obj_id, key in list(missing.items()):
+            if key in hits:
+                found[obj_id] = hits[key]
+                del missing[obj_id]
+
+    if missing:
+        hits = shared_cache().get_many(missing.values())
+        promoted = {}
+        for obj_id, key in list(missing.items()):
+            if key in hits:
+                found[obj_id] = promoted[key] = hits[key]
+                del missing[obj_id]
+        if hot and promoted:
+            hot_cache().set_many(promoted, HOT_TIMEOUT)
+
+    if len(missing) == 1:
+        # Bitta obyekt (imtihon boshlanishi/tugashi) - single-flight yo'li
+        [(obj_id, key)] = missing.items()
+        found[obj_id] = get_or_compute(key, lambda: compute_missing([obj_id])[obj_id], timeout, hot)
+    elif missing:
+        computed = compute_missing(list(missing))
+        values = {missing[obj_id]: value for obj_id, value in computed.items()}
+        shared_cache().set_many(values, timeout)
+        if hot:
+            hot_cache().set_many(values, HOT_TIMEOUT)
+        found.update(computed)
+    return found
+
+
+def single_flight(namespace, timeout=DEFAULT_TIMEOUT, hot=False):
+    """Obyekt versiyasi bo'yicha memoizatsiya qiluvchi dekorator.
+
+    Funksiyaning birinchi argumenti - obyekt id'si (masalan test_id).
+    Kalit: versioned_key(namespace, obj_id, funksiya nomi, *args), shuning
+    uchun versiya oshganda keyingi chaqiruv qayta hisoblaydi - bir vaqtda
+    kelgan so'rovlar orasida faqat bittasi. Keshsiz chaqirish: func.uncached
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(obj_id, *args):
+            key = versioned_key(namespace, obj_id, func.__name__, *args)
+            return get_or_compute(key, lambda: func(obj_id, *args), timeout, hot)
+        wrapper.uncached = func
+        return wrapper
+    return decorator
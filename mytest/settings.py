@@ -69,14 +69,119 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mytest.wsgi.application'
 
-#PostgreSQL
-
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# База данных: профиль выбирается через DB_PROFILE (sqlite | postgres).
+# DB_CONN_MAX_AGE - сколько секунд держать соединение между запросами
+# (0 - закрывать после каждого запроса), CONN_HEALTH_CHECKS проверяет
+# переиспользуемое соединение перед запросом.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+
+if DB_PROFILE == 'postgres':
+    #PostgreSQL
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get('DB_NAME', 'mytest'),
+            "USER": os.environ.get('DB_USER', 'postgres'),
+            "PASSWORD": os.environ.get('DB_PASSWORD', ''),
+            "HOST": os.environ.get('DB_HOST', '127.0.0.1'),
+            "PORT": os.environ.get('DB_PORT', '5432'),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
+    }
+    # Пул соединений psycopg 3 (если установлены psycopg и psycopg_pool).
+    # С пулом постоянные соединения Django не используются (CONN_MAX_AGE=0).
+    from importlib.util import find_spec
+    if os.environ.get('DB_POOL', 'true').lower() == 'true' and find_spec('psycopg') and find_spec('psycopg_pool'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get('DB_NAME', str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+# Режим SQLite для продакшна (SQLITE_TUNED=true): WAL, synchronous=NORMAL,
+# busy timeout и mmap через сигнал connection_created (mytest/sqlite.py),
+# BEGIN IMMEDIATE для транзакций и объединение записей ответов в короткие
+# транзакции (tests_app/writes.py).
+SQLITE_TUNED = DB_PROFILE == 'sqlite' and os.environ.get('SQLITE_TUNED', 'false').lower() == 'true'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', '20000')),  # мс
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'temp_store': 'MEMORY',
+}
+if SQLITE_TUNED:
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        'transaction_mode': 'IMMEDIATE',
     }
+
+# ASGI-профиль (GUNICORN_PROFILE=asgi, uvicorn-воркеры): горячие эндпоинты экзамена
+# (submit_answer, test_info, test_time) и поток статуса (SSE) обслуживаются
+# асинхронными view из tests_app/async_views.py.
+ASYNC_EXAM_VIEWS = os.environ.get('ASYNC_EXAM_VIEWS', 'false').lower() == 'true'
+
+# Объединение записей ответов работает только когда один процесс обслуживает
+# несколько запросов одновременно: gthread-воркеры (GUNICORN_THREADS > 1, см.
+# gunicorn.conf.py) или ASGI. В sync-воркерах gunicorn (по умолчанию) пакет
+# никогда не собирается, а фоновый поток писателя делает fork небезопасным,
+# поэтому там по умолчанию выключено.
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', '1'))
+ANSWER_WRITE_COALESCING = os.environ.get(
+    'ANSWER_WRITE_COALESCING', str(SQLITE_TUNED and (ASYNC_EXAM_VIEWS or GUNICORN_THREADS > 1))
+).lower() == 'true'
+
+# Кэш: общий для всех gunicorn воркеров (файл или таблица БД) + локальный LRU
+# для неизменяемых данных с версионными ключами (см. mytest/caching.py).
+# CACHE_BACKEND=file|db|locmem; для db нужна: python manage.py createcachetable
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+_SHARED_CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mytest-shared',
+    },
 }
+CACHES = {
+    'default': {
+        **_SHARED_CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': 300,
+        'KEY_PREFIX': 'mytest',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'hot': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mytest-hot',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Сессии: cached_db читает сессию из общего кэша и пишет в кэш и БД.
+# С CACHE_BACKEND=locmem кэш у каждого воркера свой (выход из системы в одном
+# воркере не виден другим), поэтому по умолчанию тогда используется db.
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db' if CACHE_BACKEND == 'locmem' else 'cached_db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+
 # Валидаторы паролей
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -111,6 +216,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Очередь импорта списков учеников: страница администратора только проверяет файл
+# и кладёт его сюда, пароли хешируются командой import_roster --queue (cron или --loop).
+# Файлы зашифрованы ключом из SECRET_KEY (cryptography.Fernet), после импорта удаляются;
+# от неудачных импортов остаётся только отчёт .failed без паролей.
+ROSTER_QUEUE_DIR = os.environ.get('ROSTER_QUEUE_DIR', str(BASE_DIR / 'roster_queue'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Настройки безопасности для production
@@ -145,6 +256,16 @@ REST_FRAMEWORK = {
 # Кастомная модель пользователя
 AUTH_USER_MODEL = 'accounts.User'
 
+# Вход по username или email: один запрос к БД и одно хеширование пароля
+AUTHENTICATION_BACKENDS = ['accounts.backends.UsernameOrEmailBackend']
+
+# Контроль нагрузки на вход (accounts/admission.py): не больше LOGIN_MAX_CONCURRENCY
+# одновременных хеширований пароля на все воркеры, ожидание в очереди до
+# LOGIN_QUEUE_WAIT секунд, затем 503 с Retry-After.
+LOGIN_MAX_CONCURRENCY = int(os.environ.get('LOGIN_MAX_CONCURRENCY', str(os.cpu_count() or 2)))
+LOGIN_QUEUE_WAIT = float(os.environ.get('LOGIN_QUEUE_WAIT', '10'))
+LOGIN_RETRY_AFTER = int(os.environ.get('LOGIN_RETRY_AFTER', '3'))
+
 # WhiteNoise для статических файлов (уже настроен выше)
 # STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
@@ -0,0 +1,17 @@
+"""
+SQLite sozlamalari (SQLITE_TUNED rejimi).
+
+Har bir yangi ulanishda PRAGMA'lar qo'llanadi: WAL rejimida o'quvchilar
+yozuvchini kutmaydi, synchronous=NORMAL har bir tranzaksiyada fsync
+qilmaydi, busy_timeout esa "database is locked" xatosi o'rniga navbat
+kutadi. TestsAppConfig.ready() da connection_created signaliga ulanadi.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -7,8 +7,8 @@ class ChoiceInline(admin.TabularInline):
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ['test', 'question_text', 'question_type', 'points', 'order']
-    list_filter = ['question_type', 'test__subject']
+    list_display = ['test', 'question_text', 'question_type', 'topic', 'difficulty', 'points', 'order']
+    list_filter = ['question_type', 'difficulty', 'test__subject']
     search_fields = ['question_text', 'test__title']
     inlines = [ChoiceInline]
     list_editable = ['points', 'order']
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class TestsAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tests_app"
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from mytest.sqlite import apply_sqlite_pragmas
+        from . import checks, signals  # noqa: F401
+
+        if settings.SQLITE_TUNED:
+            connection_created.connect(apply_sqlite_pragmas, dispatch_uid='mytest.sqlite_pragmas')
@@ -0,0 +1,142 @@
+"""
+Imtihonning issiq yo'li uchun async view'lar (ASGI, uvicorn worker'lar).
+
+ASYNC_EXAM_VIEWS yoqilganda urls.py submit_answer, test_info va test_time
+uchun shu view'larni ulaydi va holat oqimi (SSE) endpoint'ini qo'shadi.
+Kutish (kesh, DB, javob yozuvchi navbat) paytida worker boshqa so'rovlarga
+xizmat qiladi; holat oqimi esa har 3 soniyalik polling o'rniga bitta uzoq
+ulanish orqali pauza/davom ettirish xabarlarini yuboradi.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from .models import Question, TestAttempt
+from .status import aget_test_status, read_clock_token
+from .views import clock_data, test_info_response, test_time_response
+from .writes import AnswerWrite, asave_answer
+
+STREAM_POLL_INTERVAL = 1  # holat keshini tekshirish oralig'i (soniya)
+STREAM_KEEPALIVE = 15  # o'zgarish bo'lmasa ham vaqt xabari yuboriladi
+STREAM_MAX_DURATION = 10 * 60  # shundan keyin mijoz qayta ulanadi
+STREAM_RETRY_MS = 3000
+
+# Jarayon ichidagi qisqa memo: bir testni kuzatayotgan barcha oqimlar uchun
+# STREAM_POLL_INTERVAL ichida keshga bitta murojaat
+_status_memo = {}
+
+
+async def _stream_test_status(test_id):
+    now = time.monotonic()
+    memo = _status_memo.get(test_id)
+    if memo is not None and now - memo[0] < STREAM_POLL_INTERVAL:
+        return memo[1]
+    status = await aget_test_status(test_id)
+    _status_memo[test_id] = (now, status)
+    return status
+
+
+@login_required
+@require_http_methods(["POST"])
+async def submit_answer(request, attempt_id):
+    """Submit answer for a question (views.submit_answer ning async varianti)"""
+    user = await request.auser()
+    if user.role != 'student':
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        attempt = await aget_object_or_404(
+            TestAttempt.objects.only('id', 'test_id', 'is_completed', 'is_started', 'deadline'), id=attempt_id, student=user
+        )
+
+        if attempt.is_completed:
+            return JsonResponse({'error': 'Test already completed'}, status=400)
+        if not attempt.is_started:
+            return JsonResponse({'error': 'Test has not started yet'}, status=400)
+        status = await aget_test_status(attempt.test_id)
+        if attempt.is_past_deadline(is_paused=bool(status and status['is_paused'])):
+            return JsonResponse({'error': 'Test vaqti tugagan'}, status=403)
+
+        question_id = data.get('question_id')
+        question = await aget_object_or_404(
+            Question.objects.only('id', 'question_type'), id=question_id, test_id=attempt.test_id
+        )
+
+        if question.question_type == 'text_answer':
+            write = AnswerWrite(attempt.id, question.id, text_answer=data.get('text_answer', ''))
+        else:
+            write = AnswerWrite(attempt.id, question.id, choice_ids=[int(choice_id) for choice_id in data.get('choice_ids', [])])
+        await asave_answer(write)
+
+        return JsonResponse({'message': 'Answer saved'})
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+async def test_time_view(request, test_id):
+    """Server vaqtini qaytarish (views.test_time_view ning async varianti)"""
+    user = await request.auser()
+    return test_time_response(user, await aget_test_status(test_id))
+
+
+@login_required
+async def test_info_view(request, test_id):
+    """Test ma'lumotlari (views.test_info_view ning async varianti).
+
+    Ma'lumotlar single-flight kesh orqali olinadi, shuning uchun umumiy
+    sinxron qism alohida oqimda bajariladi.
+    """
+    user = await request.auser()
+    return await sync_to_async(test_info_response)(request, user, test_id)
+
+
+async def test_status_stream(request):
+    """Test holati oqimi (Server-Sent Events) - imzolangan urinish tokeni bilan.
+
+    test_clock_view kabi sessiya va foydalanuvchi yuklanmaydi. Pauza holati
+    o'zgarganda darhol, aks holda har STREAM_KEEPALIVE soniyada xabar yuboriladi.
+    """
+    token = request.GET.get('token', '')
+    try:
+        payload = read_clock_token(token)
+    except signing.BadSignature:
+        return JsonResponse({'error': 'Invalid token'}, status=403)
+
+    test_id = payload['t']
+    if await _stream_test_status(test_id) is None:
+        return JsonResponse({'error': 'Test topilmadi'}, status=404)
+
+    async def events():
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+        started = time.monotonic()
+        last_state = None
+        last_sent = 0
+        while time.monotonic() - started < STREAM_MAX_DURATION:
+            status = await _stream_test_status(test_id)
+            if status is None:
+                break
+            state = (status['is_paused'], status['paused_at'], status['end_time'])
+            now = time.monotonic()
+            if state != last_state or now - last_sent >= STREAM_KEEPALIVE:
+                yield f'data: {json.dumps(clock_data(status))}\n\n'
+                last_state = state
+                last_sent = now
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx oqimni buferlamasligi uchun
+    response['X-Accel-Buffering'] = 'no'
+    return response
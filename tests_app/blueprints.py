@@ -0,0 +1,171 @@
+"""
+Varaqa rejasi (Test.blueprint) bo'yicha savollarni tanlash.
+
+Reja mavzu va/yoki qiyinlik bo'yicha qatlamlardan (strata) va ixtiyoriy ball
+chegarasidan iborat:
+
+    {
+        "strata": [
+            {"topic": "Kasrlar", "difficulty": 1, "count": 10},
+            {"topic": "Geometriya", "count": 5},
+            {"difficulty": 3, "count": 5}
+        ],
+        "points": {"min": 25, "max": 30}
+    }
+
+Tanlov faqat savollar indeksida (id, mavzu, qiyinlik, ball - matnlarsiz)
+bajariladi. Har bir qatlamda kaliti eng kichik savollar olinadi (kalit -
+urinish urug'i va savol id'sidan, papers._mix), ball chegarasidan chiqilsa
+qatlam ichida savollar almashtiriladi. Natija urug'ning sof funksiyasi.
+"""
+import heapq
+from collections import defaultdict
+
+MAX_BLUEPRINT_QUESTIONS = 200
+DIFFICULTIES = (1, 2, 3)
+
+
+class BlueprintError(ValueError):
+    """Reja noto'g'ri tuzilgan"""
+
+
+def _number(value, name):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BlueprintError(f"{name} raqam bo'lishi kerak")
+    return value
+
+
+def validate_blueprint(blueprint):
+    """Rejani tekshirish va normallashtirish. Bo'sh reja ({} yoki None) - oddiy tanlov"""
+    if not blueprint:
+        return {}
+    if not isinstance(blueprint, dict):
+        raise BlueprintError("Reja obyekt bo'lishi kerak")
+
+    strata = blueprint.get('strata')
+    if not isinstance(strata, list) or not strata:
+        raise BlueprintError("Rejada kamida bitta qatlam (strata) bo'lishi kerak")
+    cleaned = []
+    for number, stratum in enumerate(strata, 1):
+        if not isinstance(stratum, dict):
+            raise BlueprintError(f"{number}-qatlam obyekt bo'lishi kerak")
+        count = stratum.get('count')
+        if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+            raise BlueprintError(f"{number}-qatlam: count musbat butun son bo'lishi kerak")
+        item = {'count': count}
+        topic = stratum.get('topic')
+        if topic not in (None, ''):
+            if not isinstance(topic, str):
+                raise BlueprintError(f"{number}-qatlam: topic matn bo'lishi kerak")
+            item['topic'] = topic.strip()
+        difficulty = stratum.get('difficulty')
+        if difficulty is not None:
+            if difficulty not in DIFFICULTIES:
+                raise BlueprintError(f"{number}-qatlam: difficulty 1, 2 yoki 3 bo'lishi kerak")
+            item['difficulty'] = difficulty
+        cleaned.append(item)
+
+    if sum(item['count'] for item in cleaned) > MAX_BLUEPRINT_QUESTIONS:
+        raise BlueprintError(f"Varaqada {MAX_BLUEPRINT_QUESTIONS} tadan ko'p savol bo'lishi mumkin emas")
+
+    result = {'strata': cleaned}
+    points = blueprint.get('points')
+    if points:
+        if not isinstance(points, dict):
+            raise BlueprintError("points obyekt bo'lishi kerak: {\"min\": ..., \"max\": ...}")
+        bounds = {name: _number(points[name], f'points.{name}') for name in ('min', 'max') if points.get(name) is not None}
+        if 'min' in bounds and 'max' in bounds and bounds['min'] > bounds['max']:
+            raise BlueprintError("points.min points.max dan katta bo'lmasligi kerak")
+        if bounds:
+            result['points'] = bounds
+    return result
+
+
+def _matches(stratum, topic, difficulty):
+    return stratum.get('topic', topic) == topic and stratum.get('difficulty', difficulty) == difficulty
+
+
+class _Stratum:
+    """Qatlamning tanlangan savollari va zaxirasi (ball qiymati bo'yicha, kalit tartibida)"""
+
+    def __init__(self, candidates, count):
+        # candidates: [(kalit, id, ball)]
+        chosen = heapq.nsmallest(count, candidates)
+        chosen_ids = {qid for _, qid, _ in chosen}
+        self.chosen = defaultdict(list)
+        for item in chosen:
+            self.chosen[item[2]].append(item)
+        self.reserve = defaultdict(list)
+        for item in candidates:
+            if item[1] not in chosen_ids:
+                self.reserve[item[2]].append(item)
+        for items in self.reserve.values():
+            heapq.heapify(items)
+
+    def ids(self):
+        return [item[1] for items in self.chosen.values() for item in items]
+
+    def swaps(self):
+        """Mumkin bo'lgan almashtirishlar: (chiqadigan ball, kiradigan ball)"""
+        return [
+            (out_points, in_points)
+            for out_points, items in self.chosen.items() if items
+            for in_points, reserve in self.reserve.items() if reserve and in_points != out_points
+        ]
+
+    def swap(self, out_points, in_points):
+        # Kaliti eng katta (eng "oxirgi") tanlangan savol chiqadi, zaxiradagi eng kichik kalitli kiradi
+        items = self.chosen[out_points]
+        items.remove(max(items))
+        self.chosen[in_points].append(heapq.heappop(self.reserve[in_points]))
+
+
+def _distance(total, low, high):
+    if low is not None and total < low:
+        return low - total
+    if high is not None and total > high:
+        return total - high
+    return 0
+
+
+def select_by_blueprint(groups, blueprint, key):
+    """Reja bo'yicha savol id'lari, varaqa tartibida.
+
+    groups - {(mavzu, qiyinlik): [(id, ball), ...]} (papers.get_question_index),
+    key - id'dan tartib kaliti. Qatlamda savol yetmasa borlari olinadi.
+    """
+    taken = set()
+    strata = []
+    for stratum in blueprint['strata']:
+        candidates = [
+            (key(qid), qid, points)
+            for (topic, difficulty), items in groups.items() if _matches(stratum, topic, difficulty)
+            for qid, points in items if qid not in taken
+        ]
+        selected = _Stratum(candidates, stratum['count'])
+        # Qatlamlar kesishsa savol faqat birinchisiga tegishli
+        taken.update(qid for _, qid, _ in candidates)
+        strata.append(selected)
+
+    bounds = blueprint.get('points', {})
+    low, high = bounds.get('min'), bounds.get('max')
+    if low is not None or high is not None:
+        total = sum(points * len(items) for stratum in strata for points, items in stratum.chosen.items())
+        while True:
+            distance = _distance(total, low, high)
+            if not distance:
+                break
+            best = None
+            for index, stratum in enumerate(strata):
+                for out_points, in_points in stratum.swaps():
+                    new_total = total - out_points + in_points
+                    candidate = (_distance(new_total, low, high), index, out_points, in_points)
+                    if candidate[0] < distance and (best is None or candidate < best):
+                        best = candidate
+            if best is None:
+                break  # chegaraga yetib bo'lmaydi - eng yaqin tanlov qoladi
+            _, index, out_points, in_points = best
+            strata[index].swap(out_points, in_points)
+            total += in_points - out_points
+
+    return sorted((qid for stratum in strata for qid in stratum.ids()), key=key)
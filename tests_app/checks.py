@@ -0,0 +1,33 @@
+"""
+Tizim tekshiruvlari (python manage.py check --database default, migrate).
+"""
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+SEARCH_MIGRATION = ('tests_app', '0017_question_fts')
+
+
+@register(Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """Qidiruv indeksi triggerlari joyida ekanini tekshirish.
+
+    SQLite AlterField kabi migratsiyalarda jadvalni qayta quradi va triggerlar
+    xatosiz yo'qoladi - indeks esa jimgina eskiradi.
+    """
+    from .search import missing_search_triggers
+
+    messages = []
+    for alias in databases or []:
+        connection = connections[alias]
+        recorder = MigrationRecorder(connection)
+        if not recorder.has_table() or SEARCH_MIGRATION not in recorder.applied_migrations():
+            continue
+        missing = missing_search_triggers(connection)
+        if missing:
+            messages.append(Warning(
+                f"Savollar qidiruvi triggerlari yo'q ({alias}): {', '.join(sorted(missing))}",
+                hint='python manage.py rebuild_question_search',
+                id='tests_app.W001',
+            ))
+    return messages
@@ -0,0 +1,39 @@
+"""
+HTTP shartli javoblar (ETag / Last-Modified) polling endpoint'lari uchun.
+
+ETag kesh versiyalaridan (mytest/caching.py) va o'zgarish vaqtlaridan
+yasaladi - ularni o'qish payload qurishdan ancha arzon. If-None-Match
+yoki If-Modified-Since mos kelsa view payload'ni qurmasdan 304 qaytaradi.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def finalize_response(response, etag, last_modified=None, **cache_control):
+    """Javobga ETag, Last-Modified, Cache-Control va Vary sarlavhalarini qo'yish"""
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    # Javoblar foydalanuvchiga bog'liq - umumiy proksi keshlamasin
+    patch_cache_control(response, private=True, **cache_control)
+    # Bir xil URL HTML sahifa va JSON qaytaradi, JSON esa sessiyaga bog'liq
+    patch_vary_headers(response, ['Accept', 'Cookie'])
+    return response
+
+
+def not_modified_response(request, etag, last_modified=None, **cache_control):
+    """Mijozdagi nusxa eskirmagan bo'lsa 304 javob, aks holda None"""
+    response = get_conditional_response(request, etag=quote_etag(etag), last_modified=_timestamp(last_modified))
+    if response is None:
+        return None
+    return finalize_response(response, etag, last_modified, **cache_control)
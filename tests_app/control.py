@@ -0,0 +1,93 @@
+"""
+Testlarni boshqarish: pauza/davom ettirish.
+
+Bitta test ham, filtrlangan testlar to'plami ham (masalan, elektr uzilganda
+butun sinf testlari) bir xil yo'l bilan boshqariladi: testlar bitta shartli
+UPDATE bilan yangilanadi, faol urinishlar deadline'i shu tranzaksiyada suriladi,
+holat keshi esa commit'dan keyin yangilanadi.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .models import Test, TestAttempt
+from .signals import bump_tests_list_version
+from .status import refresh_test_statuses
+
+
+def extend_deadlines(test_ids, delta, end_time=None):
+    """Berilgan testlarning barcha faol urinishlari deadline'ini bitta UPDATE bilan surish.
+
+    end_time berilsa deadline undan oshmaydi (compute_deadline kabi).
+    """
+    deadline = F('deadline') + delta
+    if end_time is not None:
+        deadline = Least(deadline, Value(end_time, output_field=DateTimeField()))
+    return TestAttempt.objects.filter(
+        test_id__in=test_ids,
+        is_completed=False,
+        deadline__isnull=False
+    ).update(deadline=deadline)
+
+
+def pause_tests(tests):
+    """Pauzada bo'lmagan testlarni pauza qilish. Sanoqlar lug'atini qaytaradi"""
+    now = timezone.now()
+    with transaction.atomic():
+        # Shartli UPDATE birinchi: parallel pauza allaqachon pauzadagi testning paused_at'ini
+        # surib qo'ymaydi. updated_at=now - shu chaqiruv yangilagan qatorlarni topish uchun belgi
+        paused = tests.filter(is_paused=False).update(is_paused=True, paused_at=now, updated_at=now)
+        test_ids = list(Test.objects.filter(is_paused=True, paused_at=now, updated_at=now).values_list('id', flat=True))
+        active_attempts = TestAttempt.objects.filter(test_id__in=test_ids, is_completed=False, is_started=True).count()
+        transaction.on_commit(lambda: refresh_test_statuses(test_ids))
+        bump_tests_list_version()
+    return {
+        'tests': paused,
+        'active_attempts': active_attempts,
+        'test_ids': test_ids,
+        'paused_at': now,
+    }
+
+
+def resume_tests(tests):
+    """Pauzadagi testlarni davom ettirish va pauza vaqtini faol urinishlarga qo'shish.
+
+    Testlar avval shartli UPDATE bilan "egallanadi" (is_paused=True -> False, paused_at
+    hali saqlanadi), deadline'lar faqat shu chaqiruv egallagan testlar uchun suriladi -
+    bir vaqtdagi ikkita davom ettirish pauza vaqtini ikki marta qo'shmaydi.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        resumed = tests.filter(is_paused=True).update(is_paused=False, updated_at=now)
+        # updated_at=now - shu chaqiruv egallagan qatorlar belgisi; boshqa chaqiruv
+        # davom ettirgan testlarning paused_at'i allaqachon tozalangan
+        rows = list(
+            Test.objects.filter(is_paused=False, updated_at=now).values_list('id', 'paused_at', 'end_time')
+        )
+        test_ids = [test_id for test_id, _, _ in rows]
+
+        # Bir vaqtda pauza qilingan (va bir xil tugash vaqtli) testlar bitta UPDATE bilan suriladi
+        groups = defaultdict(list)
+        for test_id, paused_at, end_time in rows:
+            if paused_at:
+                groups[(paused_at, end_time)].append(test_id)
+        extended = 0
+        for (paused_at, end_time), ids in groups.items():
+            extended += extend_deadlines(ids, max(now - paused_at, timedelta(0)), end_time)
+
+        Test.objects.filter(id__in=test_ids).update(paused_at=None)
+        transaction.on_commit(lambda: refresh_test_statuses(test_ids))
+        bump_tests_list_version()
+    return {
+        'tests': resumed,
+        'extended_attempts': extended,
+        'test_ids': test_ids,
+        'paused_seconds': {
+            test_id: int((now - paused_at).total_seconds()) if paused_at else 0
+            for test_id, paused_at, _ in rows
+        },
+    }
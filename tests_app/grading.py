@@ -0,0 +1,320 @@
+"""
+Urinishlarni yakunlash va baholash.
+
+Baholash to'plamga asoslangan: bir nechta urinish uchun javob kaliti,
+javoblar va tanlangan variantlar har biri bitta so'rov bilan yuklanadi,
+ball esa xotirada hisoblanadi. finish_test view'i (bitta urinish) ham,
+muddati o'tgan urinishlarni yakunlovchi buyruq (minglab urinish) ham
+shu funksiyalardan foydalanadi.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.dashboard import invalidate_student_summaries
+from mytest.caching import get_many_or_compute, versioned_keys
+
+from .models import Question, Choice, TestAttempt, Answer, TestResult
+from .papers import get_question_index, paper_question_ids
+from .signals import bump_attempts_versions
+from .stats import record_finished_attempts
+
+MAX_QUESTIONS = 50
+ANSWER_KEY_TIMEOUT = 60 * 60
+# TestResult.details ga yoziladigan maydonlar - natijani ko'rish qayta baholashsiz
+DETAIL_FIELDS = ('all_answered', 'answered_count', 'total_questions', 'incorrect_questions', 'correct_question_ids')
+
+
+def grade_for_percentage(percentage):
+    if percentage >= 81:
+        return "A'lo"
+    elif percentage >= 61:
+        return 'Yaxshi'
+    elif percentage >= 31:
+        return 'Qoniqarli'
+    else:
+        return 'Qoniqarsiz'
+
+
+def _build_answer_keys(test_ids):
+    """Har bir test uchun savollar va to'g'ri javoblar (2 ta so'rov)"""
+    questions_by_test = {test_id: [] for test_id in test_ids}
+    for question in Question.objects.filter(test_id__in=test_ids).values(
+        'id', 'test_id', 'question_text', 'question_type', 'points'
+    ).order_by('order', 'id'):
+        question['correct_ids'] = set()
+        question['correct_text'] = None
+        questions_by_test[question['test_id']].append(question)
+
+    questions = {q['id']: q for qs in questions_by_test.values() for q in qs}
+    for choice in Choice.objects.filter(
+        question__test_id__in=test_ids, is_correct=True
+    ).values('id', 'question_id', 'choice_text').order_by('id'):
+        question = questions[choice['question_id']]
+        question['correct_ids'].add(choice['id'])
+        if question['correct_text'] is None:
+            question['correct_text'] = choice['choice_text']
+    return questions_by_test
+
+
+def _load_answer_keys(test_ids):
+    """Javob kalitlari test versiyasi bo'yicha keshlanadi ("hot" LRU + umumiy kesh).
+
+    Savol yoki variant o'zgarganda versiya oshadi (signals.py), shuning
+    uchun keshdagi kalit hech qachon eskirgan bo'lmaydi.
+    """
+    keys = versioned_keys('test', test_ids, 'answer_key')
+    return get_many_or_compute(keys, _build_answer_keys, ANSWER_KEY_TIMEOUT, hot=True)
+
+
+def warm_answer_keys(test_ids):
+    """Imtihon boshlanishidan oldin kalitlarni umumiy keshga yuklash (prewarm_exams)"""
+    return _load_answer_keys(list(test_ids))
+
+
+def _load_answers(attempt_ids):
+    """Urinishlar javoblari va tanlangan variantlari (2 ta so'rov)"""
+    answers = {}
+    answers_by_attempt = defaultdict(dict)
+    for answer in Answer.objects.filter(attempt_id__in=attempt_ids).values(
+        'id', 'attempt_id', 'question_id', 'text_answer'
+    ).order_by('id'):
+        answer['selected'] = []
+        answers[answer['id']] = answer
+        # Har bir savolga birinchi javob hisobga olinadi (calculate_score kabi)
+        answers_by_attempt[answer['attempt_id']].setdefault(answer['question_id'], answer)
+
+    through = Answer.selected_choices.through
+    for row in through.objects.filter(answer__attempt_id__in=attempt_ids).values(
+        'answer_id', 'choice_id', 'choice__choice_text', 'choice__is_correct'
+    ).order_by('choice_id'):
+        answers[row['answer_id']]['selected'].append(row)
+    return answers_by_attempt
+
+
+def _is_correct(question, answer):
+    """Answer.is_correct() ning xotiradagi ekvivalenti"""
+    if question['question_type'] == 'single_choice':
+        return bool(answer['selected']) and answer['selected'][0]['choice__is_correct']
+    elif question['question_type'] == 'multiple_choice':
+        return question['correct_ids'] == {row['choice_id'] for row in answer['selected']}
+    # text_answer o'qituvchi tomonidan qo'lda baholanadi
+    return False
+
+
+def score_attempt(questions, answers, whole_bank=False):
+    """Bitta urinish uchun to'liq natija: ball, sanoqlar va noto'g'ri javoblar ro'yxati.
+
+    whole_bank - urug'siz eski urinish: questions o'quvchi ko'rgan varaqa emas, butun bank.
+    """
+    total_points = 0
+    earned_points = 0
+    incorrect_questions = []
+    correct_question_ids = []
+    question_ids = set()
+
+    for question in questions:
+        question_ids.add(question['id'])
+        total_points += question['points']
+        answer = answers.get(question['id'])
+        if answer and _is_correct(question, answer):
+            earned_points += question['points']
+            correct_question_ids.append(question['id'])
+        else:
+            if answer:
+                selected = answer['selected']
+                answer_text = selected[0]['choice__choice_text'] if selected else answer['text_answer']
+            else:
+                answer_text = None
+            incorrect_questions.append({
+                'question_id': question['id'],
+                'question_text': question['question_text'],
+                'answer': answer_text,
+                'correct_answer': question['correct_text']
+            })
+
+    total_questions = len(questions)
+    answered_count = len(answers)
+    percentage = (earned_points / total_points * 100) if total_points > 0 else 0
+
+    correct_answers = 0
+    incorrect_answers = 0
+    questions_by_id = {q['id']: q for q in questions}
+    if whole_bank and total_questions > MAX_QUESTIONS:
+        # Faqat javob berilgan savollar tekshiriladi, javobsizlar tanlangan 50 tadan hisoblanadi
+        for question_id, answer in answers.items():
+            question = questions_by_id.get(question_id)
+            if question and _is_correct(question, answer):
+                correct_answers += 1
+            else:
+                incorrect_answers += 1
+        unanswered = MAX_QUESTIONS - answered_count
+    else:
+        for question in questions:
+            answer = answers.get(question['id'])
+            if answer is None:
+                continue
+            if _is_correct(question, answer):
+                correct_answers += 1
+            else:
+                incorrect_answers += 1
+        unanswered = total_questions - len(question_ids & set(answers))
+
+    return {
+        'score': earned_points,
+        'total_points': total_points,
+        'percentage': percentage,
+        'all_answered': answered_count == total_questions,
+        'answered_count': answered_count,
+        'total_questions': total_questions,
+        'incorrect_questions': incorrect_questions,
+        'correct_question_ids': correct_question_ids,
+        'correct_answers': correct_answers,
+        'incorrect_answers': incorrect_answers,
+        'unanswered': unanswered,
+        'grade': grade_for_percentage(percentage),
+    }
+
+
+def grade_attempts(attempts):
+    """Urinishlar ro'yxatini baholash: {attempt_id: natija}. So'rovlar soni urinishlar soniga bog'liq emas"""
+    attempts = list(attempts)
+    if not attempts:
+        return {}
+    questions_by_test = _load_answer_keys({attempt.test_id for attempt in attempts})
+    answers_by_attempt = _load_answers([attempt.id for attempt in attempts])
+    indexes = {}
+
+    def paper_questions(attempt):
+        """O'quvchi ko'rgan savollar (varaqa tartibida) - urinishga yozilgan layout'dan.
+
+        Layout'siz eski urinishlarda varaqa urug'dan joriy bank bo'yicha qayta quriladi,
+        urug'siz eski urinishlarda testning barcha savollari (avvalgidek).
+        """
+        questions = questions_by_test.get(attempt.test_id, [])
+        if attempt.layout is None and attempt.seed is None:
+            return questions
+        if attempt.test_id not in indexes:
+            indexes[attempt.test_id] = {question['id']: question for question in questions}
+        by_id = indexes[attempt.test_id]
+        if attempt.layout is not None:
+            question_ids = [question_id for question_id, _ in attempt.layout]
+        else:
+            question_ids = paper_question_ids(attempt.seed, get_question_index(attempt.test_id))
+        return [by_id[question_id] for question_id in question_ids if question_id in by_id]
+
+    return {
+        attempt.id: score_attempt(
+            paper_questions(attempt), answers_by_attempt.get(attempt.id, {}), whole_bank=attempt.layout is None and attempt.seed is None
+        )
+        for attempt in attempts
+    }
+
+
+def review_attempt(attempt, paper):
+    """Ko'rib chiqish: o'quvchi ko'rgan varaqa (attempt_paper) uning javoblari va to'g'ri javoblar bilan.
+
+    Varaqa va kalit keshdan, javoblar 2 ta so'rov bilan - O(savollar soni).
+    """
+    key = {question['id']: question for question in _load_answer_keys([attempt.test_id])[attempt.test_id]}
+    answers = _load_answers([attempt.id]).get(attempt.id, {})
+    review = []
+    for question in paper:
+        entry = dict(question)
+        answer = answers.get(question['id'])
+        answer_key = key.get(question['id'])
+        entry['selected_choice_ids'] = [row['choice_id'] for row in answer['selected']] if answer else []
+        entry['text_answer'] = answer['text_answer'] if answer else None
+        entry['correct_choice_ids'] = sorted(answer_key['correct_ids']) if answer_key else []
+        entry['is_correct'] = bool(answer and answer_key and _is_correct(answer_key, answer))
+        review.append(entry)
+    return review
+
+
+def result_details(data):
+    """score_attempt natijasidan TestResult.details uchun ixcham qism"""
+    return {field: data[field] for field in DETAIL_FIELDS}
+
+
+def get_result_details(attempt):
+    """Yakunlangan urinishning batafsil natijasi.
+
+    finish paytida saqlangan details o'qiladi. Eski natijalarda (details
+    bo'sh) bir marta to'plamga asoslangan baholash bilan hisoblanib
+    saqlanadi - urinishning o'zi o'zgartirilmaydi.
+    """
+    result = attempt.result
+    if not result.details:
+        result.details = result_details(grade_attempts([attempt])[attempt.id])
+        TestResult.objects.filter(id=result.id).update(details=result.details)
+    return result.details
+
+
+def finish_attempts(attempts, finished_at=None):
+    """Bir nechta urinishni bitta tranzaksiyada yakunlash.
+
+    finished_at - vaqt yoki urinishdan vaqt qaytaruvchi funksiya.
+    Natijalar bulk_update/bulk_create bilan yoziladi. Yakunlangan
+    urinishlar uchun {attempt_id: natija} qaytaradi.
+    """
+    attempts = list(attempts)
+    if not attempts:
+        return {}
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Urinishlarni bitta to'plam sifatida "egallash": bir vaqtda yakunlayotgan boshqa
+        # jarayon (cron yoki o'quvchining ikkinchi so'rovi) ularni olmaydi va baholamaydi.
+        # PostgreSQL'da boshqa jarayon qulflagan qatorlar o'tkazib yuboriladi (SKIP LOCKED).
+        # SQLite'da tranzaksiya IMMEDIATE - yozish qulfi BEGIN'dayoq olinadi, shuning
+        # uchun SELECT va UPDATE orasida boshqa yozuvchi bo'lmaydi
+        pending = TestAttempt.objects.filter(id__in=[attempt.id for attempt in attempts], is_completed=False)
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        claimed = set(pending.values_list('id', flat=True))
+        if claimed:
+            TestAttempt.objects.filter(id__in=claimed).update(is_completed=True)
+        attempts = [attempt for attempt in attempts if attempt.id in claimed]
+        if not attempts:
+            return {}
+
+        graded = grade_attempts(attempts)
+
+        results = []
+        for attempt in attempts:
+            data = graded[attempt.id]
+            attempt.finished_at = finished_at(attempt) if callable(finished_at) else (finished_at or now)
+            attempt.is_completed = True
+            attempt.time_taken = attempt.finished_at - attempt.started_at
+            attempt.score = data['score']
+            attempt.total_points = data['total_points']
+            attempt.percentage = data['percentage']
+            data['time_taken'] = attempt.time_taken
+            results.append(TestResult(
+                attempt=attempt,
+                correct_answers=data['correct_answers'],
+                incorrect_answers=data['incorrect_answers'],
+                unanswered=data['unanswered'],
+                grade=data['grade'],
+                details=result_details(data)
+            ))
+
+        TestAttempt.objects.bulk_update(
+            attempts,
+            ['finished_at', 'is_completed', 'time_taken', 'score', 'total_points', 'percentage']
+        )
+        TestResult.objects.bulk_create(results)
+        record_finished_attempts(attempts)
+
+        # bulk_update signal yubormaydi - keshlar shu yerda eskirtiriladi
+        student_ids = [attempt.student_id for attempt in attempts]
+        transaction.on_commit(lambda: invalidate_student_summaries(student_ids))
+        bump_attempts_versions({attempt.test_id for attempt in attempts}, student_ids)
+
+    return {attempt.id: graded[attempt.id] for attempt in attempts}
+
+
+def finish_attempt(attempt, finished_at=None):
+    """Bitta urinishni yakunlash. Allaqachon yakunlangan bo'lsa None qaytaradi"""
+    return finish_attempts([attempt], finished_at).get(attempt.id)
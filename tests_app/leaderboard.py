@@ -0,0 +1,302 @@
+"""
+Reytinglar - LeaderboardEntry jadvali ustidagi o'rin va top-K so'rovlari.
+
+Ballar finish_test paytida (record_finished_attempts ichida) yangilanadi,
+shuning uchun reyting so'rovlari butun jadvalni saralamaydi: top-K
+(scope, -score) indeksidan LIMIT bilan o'qiladi, o'quvchi o'rni esa
+LeaderboardScoreCount dagi Fenwick daraxtidan "undan yuqori ballar
+soni + 1" sifatida ~11 ta tugunni o'qib topiladi (reyting hajmiga bog'liq emas).
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Max, Q
+
+from accounts.models import User
+from mytest.caching import bump_version
+
+from .models import TestAttempt, StudentStats, LeaderboardEntry, LeaderboardScoreCount
+
+LEADERBOARD_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+
+# Fenwick daraxti hajmi: 0.1 aniqlikdagi 0..100 foiz (1001 ta savat) sig'adigan 2 ning darajasi
+SCORE_BUCKETS = 1024
+# Bitta UPDATE dagi scope'lar soni (SQLite ifoda chuqurligi va parametrlar chegarasi)
+COUNT_UPDATE_SCOPES = 100
+
+
+def test_scope(test_id):
+    return f'test:{test_id}'
+
+
+def grade_scope(grade):
+    return f'grade:{grade}'
+
+
+def class_scope(grade, class_name):
+    return f'class:{grade}:{class_name}'
+
+
+def subject_scope(grade, subject):
+    return f'subject:{grade}:{subject}'
+
+
+def _score_index(score):
+    """Ball savati (1..SCORE_BUCKETS). Top-K dagi teng o'rinlar ham shu savat bo'yicha"""
+    return min(max(round(score * 10), 0), SCORE_BUCKETS - 1) + 1
+
+
+def _update_nodes(index):
+    while index <= SCORE_BUCKETS:
+        yield index
+        index += index & -index
+
+
+def _prefix_nodes(index):
+    while index > 0:
+        yield index
+        index -= index & -index
+
+
+def _node_counts(bucket_deltas):
+    """{(scope, savat): o'zgarish} -> {(scope, tugun): o'zgarish}, nollarsiz"""
+    nodes = Counter()
+    for (scope, index), delta in bucket_deltas.items():
+        if delta:
+            for node in _update_nodes(index):
+                nodes[(scope, node)] += delta
+    return {key: delta for key, delta in nodes.items() if delta}
+
+
+def _apply_counts(bucket_deltas):
+    """Fenwick tugunlarini atomar F('count') + delta bilan yangilash.
+
+    Tugunlar o'zgarish qiymati bo'yicha guruhlanadi - bitta o'quvchi uchun odatda
+    ikki UPDATE (+1 yangi savat, -1 eski savat) yetadi.
+    """
+    nodes = _node_counts(bucket_deltas)
+    if not nodes:
+        return
+    LeaderboardScoreCount.objects.bulk_create(
+        [LeaderboardScoreCount(scope=scope, node=node) for scope, node in nodes],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+    by_delta = defaultdict(lambda: defaultdict(list))
+    for (scope, node), delta in nodes.items():
+        by_delta[delta][scope].append(node)
+    for delta, nodes_by_scope in by_delta.items():
+        scopes = list(nodes_by_scope.items())
+        for start in range(0, len(scopes), COUNT_UPDATE_SCOPES):
+            condition = Q()
+            for scope, scope_nodes in scopes[start:start + COUNT_UPDATE_SCOPES]:
+                condition |= Q(scope=scope, node__in=scope_nodes)
+            LeaderboardScoreCount.objects.filter(condition).update(count=F('count') + delta)
+
+
+def _bump_on_commit(scopes):
+    def bump_scopes():
+        for scope in scopes:
+            bump_version('leaderboard', scope)
+
+    transaction.on_commit(bump_scopes)
+
+
+def _stats_scores(stats, grade, class_name):
+    """StudentStats qatoridan sinf, guruh va fan reytinglari uchun ballar.
+
+    Fan reytingi ham sinf ichida yuritiladi - sinfi yo'q o'quvchi reytinglarga kirmaydi.
+    """
+    scores = {}
+    if not stats.scored_count or grade is None:
+        return scores
+    scores[grade_scope(grade)] = stats.average_percentage
+    if class_name:
+        scores[class_scope(grade, class_name)] = stats.average_percentage
+    for subject, data in stats.subject_stats.items():
+        if subject and data['count']:
+            scores[subject_scope(grade, subject)] = data['sum'] / data['count']
+    return scores
+
+
+def _save_entries(scores, batch_size=1000):
+    """{(scope, student_id): ball} ni bitta upsert bilan yozish.
+
+    Eski ball savati o'zgargan qatorlar Fenwick tugunlarida ko'chiriladi.
+    O'zgargan reytinglar versiyasi (natijalar sahifasi ETag'i) tranzaksiya tugagach oshiriladi.
+    """
+    scopes = {scope for scope, _ in scores}
+    old_scores = {
+        (scope, student_id): score
+        for scope, student_id, score in LeaderboardEntry.objects.filter(
+            scope__in=scopes, student_id__in={student_id for _, student_id in scores}
+        ).values_list('scope', 'student_id', 'score')
+    }
+    bucket_deltas = Counter()
+    for key, score in scores.items():
+        index = _score_index(score)
+        if key in old_scores:
+            old_index = _score_index(old_scores[key])
+            if old_index == index:
+                continue
+            bucket_deltas[(key[0], old_index)] -= 1
+        bucket_deltas[(key[0], index)] += 1
+
+    _bump_on_commit(scopes)
+    _apply_counts(bucket_deltas)
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(scope=scope, student_id=student_id, score=score)
+         for (scope, student_id), score in scores.items()],
+        update_conflicts=True,
+        unique_fields=['scope', 'student'],
+        update_fields=['score', 'updated_at'],
+        batch_size=batch_size
+    )
+
+
+def update_leaderboards(attempts, stats_by_student):
+    """Yakunlangan urinishlar bo'yicha reyting qatorlarini yangilash.
+
+    record_finished_attempts tranzaksiyasi ichida, o'quvchilarning
+    StudentStats qatorlari qulflangan holda chaqiriladi.
+    """
+    students = User.objects.filter(id__in=stats_by_student).values_list('id', 'grade', 'class_name')
+    scores = {}
+    for student_id, grade, class_name in students:
+        for scope, score in _stats_scores(stats_by_student[student_id], grade, class_name).items():
+            scores[(scope, student_id)] = score
+
+    # Test reytingida o'quvchining shu testdagi eng yaxshi natijasi turadi
+    best = {}
+    for attempt in attempts:
+        if attempt.total_points and attempt.percentage is not None:
+            key = (test_scope(attempt.test_id), attempt.student_id)
+            best[key] = max(best.get(key, 0), attempt.percentage)
+    if best:
+        existing = LeaderboardEntry.objects.filter(
+            scope__in={scope for scope, _ in best},
+            student_id__in={student_id for _, student_id in best}
+        ).values_list('scope', 'student_id', 'score')
+        for scope, student_id, score in existing:
+            if (scope, student_id) in best:
+                best[(scope, student_id)] = max(best[(scope, student_id)], score)
+        scores.update(best)
+
+    if scores:
+        _save_entries(scores)
+
+
+def _delete_entries(entries):
+    """Reyting qatorlarini Fenwick tugunlaridan ayirib o'chirish"""
+    bucket_deltas = Counter()
+    scopes = set()
+    for scope, score in entries.values_list('scope', 'score'):
+        bucket_deltas[(scope, _score_index(score))] -= 1
+        scopes.add(scope)
+    if not scopes:
+        return
+    _bump_on_commit(scopes)
+    _apply_counts(bucket_deltas)
+    entries.delete()
+
+
+def move_student_entries(student_id, grade, class_name):
+    """O'quvchi sinfi yoki guruhi o'zgarganda guruh, sinf va fan reytinglaridagi qatorlarini ko'chirish.
+
+    Test reytinglari (test:<id>) o'zgarmaydi. StudentStats qatori finish_test
+    bilan bir vaqtda yozilmasligi uchun qulflanadi.
+    """
+    with transaction.atomic():
+        stats = StudentStats.objects.select_for_update().filter(student_id=student_id).first()
+        scores = _stats_scores(stats, grade, class_name) if stats else {}
+        _delete_entries(
+            LeaderboardEntry.objects.filter(student_id=student_id)
+            .exclude(scope__startswith='test:').exclude(scope__in=list(scores))
+        )
+        if scores:
+            _save_entries({(scope, student_id): score for scope, score in scores.items()})
+
+
+def remove_student_entries(student_id):
+    """O'quvchi o'chirilishidan oldin uning barcha reyting qatorlarini ayirish"""
+    _delete_entries(LeaderboardEntry.objects.filter(student_id=student_id))
+
+
+def get_rank(scope, student_id):
+    """O'quvchining reytingdagi o'rni yoki None (reytingda bo'lmasa)"""
+    score = LeaderboardEntry.objects.filter(scope=scope, student_id=student_id).values_list('score', flat=True).first()
+    if score is None:
+        return None
+    index = _score_index(score)
+    prefix = list(_prefix_nodes(index))
+    counts = dict(LeaderboardScoreCount.objects.filter(
+        scope=scope, node__in=set(prefix) | {SCORE_BUCKETS}
+    ).values_list('node', 'count'))
+    total = counts.get(SCORE_BUCKETS, 0)
+    return {
+        'scope': scope,
+        'rank': total - sum(counts.get(node, 0) for node in prefix) + 1,
+        'total': total,
+        'score': round(score, 1)
+    }
+
+
+def get_top(scope, limit=LEADERBOARD_LIMIT):
+    """Reytingning birinchi limit ta qatori. Teng ballar bir xil o'rinni oladi"""
+    entries = LeaderboardEntry.objects.filter(scope=scope).select_related('student').only(
+        'score', 'student__first_name', 'student__last_name', 'student__grade', 'student__class_name'
+    ).order_by('-score', 'student_id')[:limit]
+
+    top = []
+    previous = None
+    for position, entry in enumerate(entries, 1):
+        index = _score_index(entry.score)
+        rank = top[-1]['rank'] if index == previous else position
+        previous = index
+        top.append({
+            'rank': rank,
+            'student_id': entry.student_id,
+            'first_name': entry.student.first_name,
+            'last_name': entry.student.last_name,
+            'grade': entry.student.grade,
+            'class_name': entry.student.class_name,
+            'score': round(entry.score, 1)
+        })
+    return top
+
+
+def rebuild_leaderboards(batch_size=1000):
+    """Barcha reytinglarni StudentStats va yakunlangan urinishlardan qayta qurish"""
+    scores = {}
+    for stats in StudentStats.objects.select_related('student').only(
+        'scored_count', 'average_percentage', 'subject_stats', 'student__grade', 'student__class_name'
+    ).iterator(chunk_size=batch_size):
+        for scope, score in _stats_scores(stats, stats.student.grade, stats.student.class_name).items():
+            scores[(scope, stats.student_id)] = score
+
+    best_by_test = TestAttempt.objects.filter(
+        is_completed=True, total_points__gt=0, percentage__isnull=False
+    ).values('test_id', 'student_id').annotate(best=Max('percentage')).order_by()
+    for row in best_by_test.iterator(chunk_size=batch_size):
+        scores[(test_scope(row['test_id']), row['student_id'])] = row['best']
+
+    counts = Counter()
+    for (scope, _), score in scores.items():
+        counts[(scope, _score_index(score))] += 1
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardScoreCount.objects.all().delete()
+        _bump_on_commit({scope for scope, _ in scores})
+        LeaderboardEntry.objects.bulk_create(
+            [LeaderboardEntry(scope=scope, student_id=student_id, score=score)
+             for (scope, student_id), score in scores.items()],
+            batch_size=batch_size
+        )
+        LeaderboardScoreCount.objects.bulk_create(
+            [LeaderboardScoreCount(scope=scope, node=node, count=count)
+             for (scope, node), count in _node_counts(counts).items()],
+            batch_size=batch_size
+        )
+    return len(scores)
@@ -0,0 +1,79 @@
+import multiprocessing
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from mytest.caching import bump_version
+from tests_app.models import Test
+from tests_app.papers import get_question_bank
+from tests_app.status import get_test_info
+
+
+def _run_worker(test_id, threads, cached):
+    """Bitta "gunicorn worker": threads ta o'quvchi bir vaqtda imtihonni boshlaydi.
+
+    Bajarilgan SQL so'rovlar sonini qaytaradi.
+    """
+    counts = []
+    barrier = threading.Barrier(threads)
+
+    def student():
+        executed = [0]
+
+        def counter(execute, sql, params, many, context):
+            executed[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            barrier.wait()
+            if cached:
+                get_question_bank(test_id)
+                get_test_info(test_id)
+            else:
+                get_question_bank.uncached(test_id)
+                get_test_info.uncached(test_id)
+        connection.close()
+        counts.append(executed[0])
+
+    workers = [threading.Thread(target=student) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts)
+
+
+class Command(BaseCommand):
+    help = "Imtihon boshlanishi (bir vaqtda ko'p o'quvchi) paytida savollar banki va test ma'lumotlari uchun DB yukini o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_id', type=int)
+        parser.add_argument('--processes', type=int, default=4, help="Worker jarayonlari soni")
+        parser.add_argument('--threads', type=int, default=75, help="Har bir jarayondagi bir vaqtdagi so'rovlar")
+
+    def handle(self, *args, **options):
+        if not Test.objects.filter(id=options['test_id']).exists():
+            raise CommandError('Test topilmadi')
+        if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+            self.stdout.write(self.style.WARNING(
+                "Umumiy kesh LocMemCache - jarayonlar keshni bo'lishmaydi, CACHE_BACKEND=file yoki db tavsiya etiladi"
+            ))
+
+        students = options['processes'] * options['threads']
+        for label, cached in [('keshsiz', False), ('single-flight', True)]:
+            # Sovuq holat: test versiyasini oshirib barcha kalitlarni eskirtiramiz
+            bump_version('test', options['test_id'])
+            connections.close_all()
+            started = time.monotonic()
+            with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+                queries = sum(pool.starmap(
+                    _run_worker,
+                    [(options['test_id'], options['threads'], cached)] * options['processes']
+                ))
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{label:>14}: {students} ta o'quvchi, {queries} ta SQL so'rov, {elapsed:.2f} s"
+            )
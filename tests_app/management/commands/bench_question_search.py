@@ -0,0 +1,104 @@
+import itertools
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from tests_app.models import Test, Question, Choice
+from tests_app.search import search_question_ids
+
+# Mavzu so'zlari (tez-tez uchraydi) + Zipf bo'yicha taqsimlangan sun'iy lug'at - haqiqiy matnga yaqin
+TOPIC_WORDS = (
+    "son kasr tenglama uchburchak burchak yuza perimetr aylana radius diametr kvadrat ildiz daraja "
+    "funksiya grafik hosila integral ehtimollik foiz nisbat proporsiya tengsizlik modul vektor "
+    "koordinata parabola logarifm trigonometriya sinus kosinus tangens ketma-ketlik progressiya "
+    "to'plam kesishma birlashma hajm prizma piramida silindr konus shar yig'indi ayirma ko'paytma"
+).split()
+SYLLABLES = 'ba ka la ma na ra sa ta ya za bo ko lo mo no ro so to yo qi gi di si ti li mi ni hu ku tu'.split()
+VOCABULARY_SIZE = 5000
+
+
+def make_vocabulary(rng):
+    """Lug'at va kumulyativ og'irliklar (rng.choices(cum_weights=...) uchun)"""
+    words = list(TOPIC_WORDS)
+    while len(words) < VOCABULARY_SIZE:
+        words.append(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, weights
+
+
+class Command(BaseCommand):
+    help = ("Savollar banki qidiruvining kechikishini o'lchash: vaqtinchalik N ta savol "
+            "(tranzaksiya oxirida bekor qilinadi) ustida tasodifiy so'rovlar")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=50000, help="Vaqtinchalik savollar soni")
+        parser.add_argument('--queries', type=int, default=200, help="O'lchanadigan qidiruvlar soni")
+        parser.add_argument('--tests', type=int, default=500, help="Savollar taqsimlanadigan testlar soni")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        words, weights = make_vocabulary(rng)
+        with transaction.atomic():
+            started = time.monotonic()
+            texts = self.populate(rng, words, weights, options['questions'], options['tests'])
+            self.stdout.write(
+                f"{options['questions']} ta savol (triggerlar bilan indekslangan) "
+                f"{time.monotonic() - started:.1f} soniyada yaratildi ({connection.vendor})"
+            )
+
+            def from_question(count):
+                # O'qituvchi mavjud savolni bir necha so'zi bo'yicha qidiradi
+                return ' '.join(rng.sample(rng.choice(texts).split()[:-1], count))
+
+            cases = [
+                ('1 so\'z', lambda: (rng.choices(words, cum_weights=weights)[0], {})),
+                ('2 so\'z', lambda: (from_question(2), {})),
+                ('3 so\'z', lambda: (from_question(3), {})),
+                ('prefiks', lambda: (from_question(2)[:-2], {})),
+                ('fan+sinf', lambda: (from_question(2), {'subject': 'Matematika', 'grade': rng.randint(5, 11)})),
+                ('3-sahifa', lambda: (rng.choices(words, cum_weights=weights)[0], {'offset': 40})),
+                # Eng yomon holat: bankning ~chorak qismida uchraydigan so'z
+                ('umumiy', lambda: (rng.choice(words[:5]), {})),
+                ('umumiy+fan', lambda: (rng.choice(words[:5]), {'subject': 'Matematika', 'grade': rng.randint(5, 11)})),
+            ]
+            for label, make_query in cases:
+                self.report(label, [self.measure(*make_query()) for _ in range(options['queries'])])
+            transaction.set_rollback(True)
+
+    def populate(self, rng, words, weights, count, test_count):
+        teacher = User.objects.create(
+            username=f'bench_teacher_{uuid.uuid4().hex[:8]}', email=f'bench_{uuid.uuid4().hex[:8]}@buxorobilimdonlar.uz',
+            role='teacher'
+        )
+        tests = Test.objects.bulk_create([
+            Test(title=f'Bench {i}', subject=rng.choice(['Matematika', 'Fizika', 'Informatika']),
+                 grade=rng.randint(5, 11), created_by=teacher, time_limit=30)
+            for i in range(test_count)
+        ])
+        texts = [' '.join(rng.choices(words, cum_weights=weights, k=12)) + f' {i}?' for i in range(count)]
+        questions = Question.objects.bulk_create([
+            Question(test=tests[i % test_count], question_type='single_choice', order=i, question_text=text)
+            for i, text in enumerate(texts)
+        ], batch_size=2000)
+        Choice.objects.bulk_create([
+            Choice(question=question, choice_text=' '.join(rng.choices(words, cum_weights=weights, k=3)), is_correct=index == 0)
+            for question in questions for index in range(4)
+        ], batch_size=4000)
+        return texts
+
+    def measure(self, query, filters):
+        started = time.perf_counter()
+        search_question_ids(query, **filters)
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, label, timings):
+        timings.sort()
+        self.stdout.write(
+            f"{label:>10}: median {statistics.median(timings):.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, max {timings[-1]:.2f} ms"
+        )
@@ -0,0 +1,94 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.utils.crypto import get_random_string
+
+from accounts.models import User
+from tests_app.models import Test, Question, Choice, TestAttempt
+
+
+class Command(BaseCommand):
+    help = ("submit_answer yo'lining kechikishini o'lchash: har so'rovda yangi DB ulanishi "
+            "(CONN_MAX_AGE=0) va doimiy ulanish solishtiriladi")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Har bir rejimdagi so'rovlar soni")
+        parser.add_argument('--conn-max-age', type=int, default=60, help="Doimiy ulanish rejimi uchun CONN_MAX_AGE")
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        teacher = User.objects.create(
+            username=f'bench_teacher_{suffix}', email=f'bench_teacher_{suffix}@buxorobilimdonlar.uz', role='teacher'
+        )
+        student = User.objects.create(
+            username=f'bench_student_{suffix}', email=f'bench_student_{suffix}@student.buxorobilimdonlar.uz',
+            role='student', grade=0, is_verified=True
+        )
+        try:
+            test = Test.objects.create(title='Benchmark', subject='Benchmark', grade=0, created_by=teacher, time_limit=60)
+            question = Question.objects.create(test=test, question_text='?', question_type='single_choice')
+            choice = Choice.objects.create(question=question, choice_text='A', is_correct=True)
+            attempt = TestAttempt.objects.create(test=test, student=student)
+
+            client = Client()
+            client.force_login(student)
+            self.session_key = client.cookies['sessionid'].value
+            self.url = f'/tests/attempt/{attempt.id}/submit-answer/'
+            self.body = json.dumps({'question_id': question.id, 'choice_ids': [choice.id]})
+
+            settings_dict = connection.settings_dict
+            original_max_age = settings_dict['CONN_MAX_AGE']
+            pooled = bool(settings_dict.get('OPTIONS', {}).get('pool'))
+            if pooled:
+                self.stdout.write("Ulanishlar psycopg pool orqali (CONN_MAX_AGE pool bilan ishlatilmaydi)")
+            try:
+                for max_age in [0, options['conn_max_age']]:
+                    settings_dict['CONN_MAX_AGE'] = 0 if pooled else max_age
+                    connection.close()
+                    self.report(f'CONN_MAX_AGE={max_age}', self.run(options['requests']))
+            finally:
+                settings_dict['CONN_MAX_AGE'] = original_max_age
+        finally:
+            connection.close()
+            teacher.delete()
+            student.delete()
+
+    def run(self, count):
+        """So'rovlarni to'liq WSGI handler orqali yuborish (request_finished ulanishni yopadi yoki saqlaydi)"""
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        csrf_token = get_random_string(32)
+        timings = []
+
+        def start_response(status, headers):
+            if not status.startswith('200'):
+                raise RuntimeError(f'submit_answer javobi: {status}')
+
+        for _ in range(count):
+            environ = factory.post(
+                self.url, self.body, content_type='application/json',
+                HTTP_HOST='localhost',
+                HTTP_COOKIE=f'sessionid={self.session_key}; csrftoken={csrf_token}',
+                HTTP_X_CSRFTOKEN=csrf_token,
+                HTTP_ACCEPT='application/json',
+            ).environ
+            started = time.perf_counter()
+            response = handler(environ, start_response)
+            b''.join(response)
+            response.close()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:>16}: o'rtacha {statistics.mean(timings):.2f} ms, "
+            f"p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms ({len(timings)} so'rov)"
+        )
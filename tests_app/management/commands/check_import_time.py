@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Worker ishga tushishi: WSGI ilovasi va barcha URL'lar (view modullari) yuklanadi
+BOOT_CODE = (
+    "import mytest.wsgi; "
+    "from django.urls import get_resolver; "
+    "get_resolver().url_patterns"
+)
+DEFAULT_BUDGET_MS = 600
+# Ishga tushishda yuklanmasligi kerak bo'lgan og'ir kutubxonalar (faqat kerakli view ichida import qilinadi)
+FORBIDDEN_MODULES = ('openpyxl', 'cryptography')
+
+
+def _measure():
+    """python -X importtime natijasi: {modul: (o'zi, jami) mikrosekund} va yuqori darajadagi modullar"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'mytest.settings'))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise CommandError(f"Ilovani yuklab bo'lmadi:\n{completed.stderr[-2000:]}")
+
+    modules = {}
+    top_level = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        prefix, cumulative_us, name = line.split('|')
+        module = name.strip()
+        modules[module] = (int(prefix.split(':')[1]), int(cumulative_us))
+        if not name.startswith('  '):
+            top_level.append(module)
+    return modules, top_level
+
+
+class Command(BaseCommand):
+    help = ("Worker ishga tushishidagi import vaqtini (python -X importtime) o'lchash va byudjetni tekshirish. "
+            "Byudjetdan oshsa yoki taqiqlangan modul yuklansa xato bilan tugaydi (CI uchun)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="Ruxsat etilgan jami import vaqti")
+        parser.add_argument('--runs', type=int, default=3, help="O'lchashlar soni (eng kichigi olinadi)")
+        parser.add_argument('--top', type=int, default=15, help="Eng sekin yuqori darajadagi modullar soni")
+
+    def handle(self, *args, **options):
+        best = None
+        for _ in range(max(options['runs'], 1)):
+            modules, top_level = _measure()
+            total = sum(modules[module][1] for module in top_level) / 1000
+            if best is None or total < best[0]:
+                best = (total, modules, top_level)
+        total, modules, top_level = best
+
+        self.stdout.write("Eng sekin yuqori darajadagi importlar (jami, ms):")
+        for module in sorted(top_level, key=lambda module: modules[module][1], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {modules[module][1] / 1000:8.1f}  {module}")
+        self.stdout.write(f"Jami: {total:.1f} ms (byudjet {options['budget_ms']:.0f} ms)")
+
+        problems = []
+        loaded = [module for module in FORBIDDEN_MODULES if module in modules]
+        if loaded:
+            problems.append(f"ishga tushishda yuklanmasligi kerak: {', '.join(loaded)}")
+        if total > options['budget_ms']:
+            problems.append(f"import vaqti byudjetdan oshdi: {total:.1f} ms > {options['budget_ms']:.0f} ms")
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS("Import vaqti byudjet ichida"))
@@ -0,0 +1,97 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from tests_app.grading import finish_attempts
+from tests_app.models import TestAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deadline'i yoki Test.end_time'i o'tgan tugallanmagan urinishlarni partiyalab avtomatik yakunlash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Bir partiyadagi urinishlar soni")
+        parser.add_argument('--loop', action='store_true', help="To'xtovsiz ishlash (scheduler rejimi)")
+        parser.add_argument('--interval', type=int, default=30, help="--loop rejimida tekshirishlar orasidagi soniyalar")
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.run_once(options['batch_size'])
+            return
+
+        self.stdout.write(f"Scheduler ishga tushdi (har {options['interval']} soniyada)")
+        while True:
+            self.run_once(options['batch_size'])
+            time.sleep(options['interval'])
+
+    def backfill_deadlines(self, batch_size):
+        """Deadline'siz eski urinishlar uchun started_at + time_limit ni yozib qo'yish"""
+        while True:
+            attempts = list(
+                TestAttempt.objects.filter(is_completed=False, is_started=True, deadline__isnull=True)
+                .select_related('test')[:batch_size]
+            )
+            if not attempts:
+                return
+            for attempt in attempts:
+                attempt.deadline = attempt.compute_deadline()
+            TestAttempt.objects.bulk_update(attempts, ['deadline'])
+
+    def delete_unstarted(self, now):
+        """Tugagan testlarning oldindan yaratilgan, lekin boshlanmagan urinishlarini o'chirish.
+
+        O'quvchi kelmagan - bunday urinishlar urinishlar soni va qayta ochishda hisoblanmasligi kerak.
+        """
+        _, deleted = TestAttempt.objects.filter(
+            is_started=False, is_completed=False, test__end_time__lte=now
+        ).delete()
+        return deleted.get(TestAttempt._meta.label, 0)
+
+    def run_once(self, batch_size):
+        started = time.monotonic()
+        self.backfill_deadlines(batch_size)
+        unstarted = self.delete_unstarted(timezone.now())
+        if unstarted:
+            self.stdout.write(f"{unstarted} ta boshlanmagan urinish o'chirildi")
+
+        finished = 0
+        last_id = 0
+        while True:
+            now = timezone.now()
+            # Pauzadagi testlar urinishlari deadline resume paytida suriladi, ularni o'tkazib yuboramiz.
+            # Oldindan yaratilgan, lekin boshlanmagan urinishlar (o'quvchi kelmagan) yakunlanmaydi
+            batch = list(
+                TestAttempt.objects.filter(
+                    Q(deadline__lte=now) | Q(test__end_time__lte=now),
+                    is_completed=False,
+                    is_started=True,
+                    test__is_paused=False,
+                    id__gt=last_id
+                ).select_related('test').order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            try:
+                finished += len(finish_attempts(batch, finished_at=lambda attempt: attempt.finish_time(now=now)))
+            except Exception as e:
+                # Partiya to'liq rollback qilinadi, keyingi ishga tushirishda qayta uriniladi
+                logger.error(f'Error auto-finishing batch after attempt {last_id}: {str(e)}', exc_info=True)
+
+            if len(batch) < batch_size:
+                break
+
+        elapsed = time.monotonic() - started
+        if finished:
+            rate = finished / elapsed if elapsed > 0 else finished
+            logger.info(f'Auto-finished {finished} expired attempts in {elapsed:.2f}s ({rate:.0f} attempts/s)')
+            self.stdout.write(self.style.SUCCESS(
+                f"{finished} ta urinish {elapsed:.2f} soniyada yakunlandi ({rate:.0f} urinish/s)"
+            ))
+        return finished
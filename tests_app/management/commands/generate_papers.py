@@ -0,0 +1,37 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tests_app.models import Test
+from tests_app.papers import generate_papers
+from tests_app.prewarm import upcoming_tests
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "O'quvchilar imtihon varaqalarini oldindan yaratish (deterministik urug', ExamPaper'ga yoziladi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_ids', nargs='*', type=int, help="Test id'lari")
+        parser.add_argument('--minutes', type=int, default=None, help="Yoki shuncha daqiqa ichida boshlanadigan testlar")
+        parser.add_argument('--processes', type=int, default=None, help="Jarayonlar soni (standart: CPU soni)")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['test_ids']:
+            tests = Test.objects.filter(id__in=options['test_ids'])
+        elif options['minutes'] is not None:
+            tests = upcoming_tests(options['minutes'])
+        else:
+            raise CommandError("Test id'lari yoki --minutes ko'rsatilishi kerak")
+
+        for test in tests:
+            started = time.monotonic()
+            count = generate_papers(test, processes=options['processes'], batch_size=options['batch_size'])
+            elapsed = time.monotonic() - started
+            logger.info(f'Generated {count} papers for test {test.id} in {elapsed:.2f}s')
+            self.stdout.write(self.style.SUCCESS(
+                f"Test {test.id} \"{test.title}\": {count} ta varaqa {elapsed:.2f} soniyada yaratildi"
+            ))
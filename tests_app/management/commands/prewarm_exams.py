@@ -0,0 +1,64 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from mytest.caching import get_version
+from tests_app.prewarm import prewarm_test, upcoming_tests
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Keyingi N daqiqada boshlanadigan testlar uchun keshlarni oldindan isitish (cron yoki --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=15, help="Shuncha daqiqa ichida boshlanadigan testlar")
+        parser.add_argument('--papers', action='store_true', help="O'quvchilar varaqalarini oldindan yaratish (generate_papers)")
+        parser.add_argument('--processes', type=int, default=None, help="Varaqalar uchun jarayonlar soni (standart: CPU soni)")
+        parser.add_argument('--create-attempts', action='store_true', help="Sinf o'quvchilari uchun urinishlarni oldindan yaratish")
+        parser.add_argument('--loop', action='store_true', help="To'xtovsiz ishlash (scheduler rejimi)")
+        parser.add_argument('--interval', type=int, default=60, help="--loop rejimida tekshirishlar orasidagi soniyalar")
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.run_once(options)
+            return
+
+        self.stdout.write(f"Scheduler ishga tushdi (har {options['interval']} soniyada)")
+        # test_id -> isitilgan paytdagi test versiyasi: savollar o'zgarmagan bo'lsa qayta isitilmaydi
+        warmed = {}
+        while True:
+            self.run_once(options, warmed)
+            time.sleep(options['interval'])
+
+    def run_once(self, options, warmed=None):
+        count = 0
+        for test in upcoming_tests(options['minutes']):
+            version = get_version('test', test.id)
+            if warmed is not None and warmed.get(test.id) == version:
+                continue
+            try:
+                result = prewarm_test(
+                    test,
+                    create_attempts=options['create_attempts'],
+                    papers=options['papers'],
+                    processes=options['processes']
+                )
+            except Exception as e:
+                logger.error(f'Error prewarming test {test.id}: {str(e)}', exc_info=True)
+                continue
+            if warmed is not None:
+                warmed[test.id] = version
+            count += 1
+
+            steps = ', '.join(f'{step}={ms}ms' for step, ms in result['timings'].items())
+            logger.info(
+                f"Prewarmed test {test.id} (starts {test.start_time.isoformat()}) in {result['total_ms']}ms: {steps}"
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Test {test.id} \"{test.title}\": {result['questions']} savol, {result['students']} o'quvchi, "
+                f"{result['papers']} varaqa, "
+                f"{result['attempts_created']} urinish yaratildi - {result['total_ms']} ms ({steps})"
+            ))
+        return count
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from tests_app.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = ("Savollar qidiruv indeksi va triggerlarini qaytadan qurish "
+            "(SQLite savollar jadvalini qayta quradigan migratsiyadan keyin)")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(f"{connection.vendor}: indeks yo'q, qidiruv icontains bilan ishlaydi")
+            return
+        started = time.monotonic()
+        with transaction.atomic():
+            rebuild_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(
+            f"Qidiruv indeksi {time.monotonic() - started:.2f} soniyada qayta qurildi"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tests_app.leaderboard import rebuild_leaderboards
+from tests_app.stats import rebuild_student_stats
+
+
+class Command(BaseCommand):
+    help = "StudentStats proyeksiyasi va reytinglarni yakunlangan urinishlardan qaytadan qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_student_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} ta o'quvchi statistikasi {time.monotonic() - started:.2f} soniyada qayta qurildi"
+        ))
+
+        started = time.monotonic()
+        count = rebuild_leaderboards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} ta reyting qatori {time.monotonic() - started:.2f} soniyada qayta qurildi"
+        ))
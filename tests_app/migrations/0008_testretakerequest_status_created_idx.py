@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0007_add_question_image"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="testretakerequest",
+            index=models.Index(
+                fields=["status", "created_at"], name="retake_status_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:14
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_deadlines(apps, schema_editor):
+    """Tugallanmagan urinishlar uchun deadline = started_at + time_limit (end_time bilan cheklangan)"""
+    TestAttempt = apps.get_model("tests_app", "TestAttempt")
+    attempts = TestAttempt.objects.filter(is_completed=False).select_related("test")
+    for attempt in attempts.iterator():
+        deadline = attempt.started_at + timedelta(minutes=attempt.test.time_limit)
+        if attempt.test.end_time and attempt.test.end_time < deadline:
+            deadline = attempt.test.end_time
+        attempt.deadline = deadline
+        attempt.save(update_fields=["deadline"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0008_testretakerequest_status_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testattempt",
+            name="deadline",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Server tomonidan belgilangan tugash vaqti (pauzalar hisobga olinadi)",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0009_testattempt_deadline"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("attempts_count", models.IntegerField(db_index=True, default=0)),
+                (
+                    "scored_count",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Umumiy balli (total_points > 0) urinishlar soni",
+                    ),
+                ),
+                ("percentage_sum", models.FloatField(default=0)),
+                ("average_percentage", models.FloatField(db_index=True, default=0)),
+                ("best_percentage", models.FloatField(default=0)),
+                ("last_activity", models.DateTimeField(blank=True, null=True)),
+                (
+                    "subject_stats",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text='{"fan": {"count": n, "sum": foizlar yig\'indisi}}',
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "best_attempt",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tests_app.testattempt",
+                    ),
+                ),
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
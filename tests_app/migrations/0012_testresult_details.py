@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0011_leaderboardentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testresult",
+            name="details",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Yakunlashda hisoblangan batafsil natija (savollar bo'yicha)",
+            ),
+        ),
+    ]
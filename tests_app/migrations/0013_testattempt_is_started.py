@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0012_testresult_details"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testattempt",
+            name="is_started",
+            field=models.BooleanField(
+                default=True,
+                help_text="Imtihondan oldin yaratilgan (prewarm_exams) urinishlar o'quvchi boshlaguncha False",
+            ),
+        ),
+    ]
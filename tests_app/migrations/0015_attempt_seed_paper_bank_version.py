@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0014_exampaper"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exampaper",
+            name="bank_version",
+            field=models.BigIntegerField(
+                default=0, help_text="Varaqa qurilgan savollar banki versiyasi"
+            ),
+        ),
+        migrations.AddField(
+            model_name="testattempt",
+            name="seed",
+            field=models.BigIntegerField(
+                blank=True,
+                help_text="Varaqa urug'i: savollar tanlovi va tartibi shundan qayta quriladi",
+                null=True,
+            ),
+        ),
+    ]
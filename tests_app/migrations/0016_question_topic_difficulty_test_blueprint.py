@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0015_attempt_seed_paper_bank_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="difficulty",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Oson"), (2, "O'rta"), (3, "Qiyin")], default=2
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="topic",
+            field=models.CharField(
+                blank=True, help_text="Mavzu (varaqa rejasi uchun)", max_length=100
+            ),
+        ),
+        migrations.AddField(
+            model_name="test",
+            name="blueprint",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Varaqa rejasi: mavzu/qiyinlik bo'yicha savollar soni va ball chegarasi (tests_app/blueprints.py)",
+            ),
+        ),
+    ]
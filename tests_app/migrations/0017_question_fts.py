@@ -0,0 +1,171 @@
+# Savollar banki bo'yicha to'liq matnli qidiruv indeksi (tests_app/search.py):
+# SQLite'da FTS5, PostgreSQL'da tsvector + GIN, triggerlar bilan yangilanadi.
+# SQL shu yerda qotirilgan - migratsiya joriy model/qidiruv kodiga bog'liq emas.
+
+from django.db import migrations
+
+_SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE tests_app_question_fts USING fts5(
+        question_text, choices_text,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '3 4'
+    )
+    """,
+    """
+    INSERT INTO tests_app_question_fts (rowid, question_text, choices_text)
+    SELECT q.id, q.question_text, coalesce(
+        (SELECT group_concat(c.choice_text, ' ') FROM tests_app_choice c WHERE c.question_id = q.id), ''
+    )
+    FROM tests_app_question q
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_ai AFTER INSERT ON tests_app_question BEGIN
+        INSERT INTO tests_app_question_fts (rowid, question_text, choices_text)
+        VALUES (new.id, new.question_text, '');
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_au AFTER UPDATE OF question_text ON tests_app_question BEGIN
+        UPDATE tests_app_question_fts SET question_text = new.question_text WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_ad AFTER DELETE ON tests_app_question BEGIN
+        DELETE FROM tests_app_question_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_ai AFTER INSERT ON tests_app_choice BEGIN
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = new.question_id), ''
+        ) WHERE rowid = new.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_au AFTER UPDATE OF choice_text, question_id ON tests_app_choice BEGIN
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = old.question_id), ''
+        ) WHERE rowid = old.question_id;
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = new.question_id), ''
+        ) WHERE rowid = new.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_ad AFTER DELETE ON tests_app_choice BEGIN
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = old.question_id), ''
+        ) WHERE rowid = old.question_id;
+    END
+    """,
+]
+
+_SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_ad",
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_au",
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_ai",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_ad",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_au",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_ai",
+    "DROP TABLE IF EXISTS tests_app_question_fts",
+]
+
+# Savol matni 'A', variantlar 'B' og'irlik bilan; o'zbek tili uchun lug'at yo'q - 'simple'
+_POSTGRES_INSTALL = [
+    """
+    CREATE TABLE tests_app_question_fts (
+        question_id bigint PRIMARY KEY REFERENCES tests_app_question (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX tests_app_question_fts_document_gin ON tests_app_question_fts USING gin (document)",
+    """
+    CREATE FUNCTION tests_app_question_fts_refresh(qid bigint) RETURNS void AS $$
+        INSERT INTO tests_app_question_fts (question_id, document)
+        SELECT q.id,
+               setweight(to_tsvector('simple', q.question_text), 'A') ||
+               setweight(to_tsvector('simple', coalesce(
+                   (SELECT string_agg(c.choice_text, ' ') FROM tests_app_choice c WHERE c.question_id = q.id), ''
+               )), 'B')
+        FROM tests_app_question q WHERE q.id = qid
+        ON CONFLICT (question_id) DO UPDATE SET document = EXCLUDED.document
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE FUNCTION tests_app_question_fts_question_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM tests_app_question_fts_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION tests_app_question_fts_choice_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM tests_app_question_fts_refresh(OLD.question_id);
+        END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.question_id <> OLD.question_id) THEN
+            PERFORM tests_app_question_fts_refresh(NEW.question_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_iu AFTER INSERT OR UPDATE OF question_text ON tests_app_question
+    FOR EACH ROW EXECUTE FUNCTION tests_app_question_fts_question_trigger()
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_iud AFTER INSERT OR UPDATE OF choice_text, question_id OR DELETE
+    ON tests_app_choice FOR EACH ROW EXECUTE FUNCTION tests_app_question_fts_choice_trigger()
+    """,
+    """
+    INSERT INTO tests_app_question_fts (question_id, document)
+    SELECT q.id,
+           setweight(to_tsvector('simple', q.question_text), 'A') ||
+           setweight(to_tsvector('simple', coalesce(c.choices_text, '')), 'B')
+    FROM tests_app_question q
+    LEFT JOIN (
+        SELECT question_id, string_agg(choice_text, ' ') AS choices_text FROM tests_app_choice GROUP BY question_id
+    ) c ON c.question_id = q.id
+    """,
+]
+
+_POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_iud ON tests_app_choice",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_iu ON tests_app_question",
+    "DROP FUNCTION IF EXISTS tests_app_question_fts_choice_trigger()",
+    "DROP FUNCTION IF EXISTS tests_app_question_fts_question_trigger()",
+    "DROP FUNCTION IF EXISTS tests_app_question_fts_refresh(bigint)",
+    "DROP TABLE IF EXISTS tests_app_question_fts",
+]
+
+
+_INSTALL = {"sqlite": _SQLITE_INSTALL, "postgresql": _POSTGRES_INSTALL}
+_DROP = {"sqlite": _SQLITE_DROP, "postgresql": _POSTGRES_DROP}
+
+
+def _execute(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def install(apps, schema_editor):
+    _execute(schema_editor, _INSTALL)
+
+
+def drop(apps, schema_editor):
+    _execute(schema_editor, _DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0016_question_topic_difficulty_test_blueprint"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, drop),
+    ]
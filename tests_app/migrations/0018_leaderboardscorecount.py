@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:42
+
+from collections import Counter
+
+from django.db import migrations, models
+
+# tests_app/leaderboard.py bilan bir xil: 0.1 aniqlikdagi savatlar, Fenwick daraxti hajmi
+SCORE_BUCKETS = 1024
+
+
+def rekey_and_count(apps, schema_editor):
+    """Fan reytinglarini sinf bo'yicha ajratish ("subject:<fan>" -> "subject:<sinf>:<fan>")
+    va mavjud qatorlardan Fenwick tugunlarini qurish"""
+    LeaderboardEntry = apps.get_model("tests_app", "LeaderboardEntry")
+    LeaderboardScoreCount = apps.get_model("tests_app", "LeaderboardScoreCount")
+
+    subject_entries = LeaderboardEntry.objects.filter(
+        scope__startswith="subject:"
+    ).select_related("student")
+    for entry in subject_entries.iterator():
+        if entry.student.grade is None:
+            entry.delete()
+            continue
+        entry.scope = f"subject:{entry.student.grade}:{entry.scope[len('subject:'):]}"
+        entry.save(update_fields=["scope"])
+
+    counts = Counter()
+    for scope, score in LeaderboardEntry.objects.values_list(
+        "scope", "score"
+    ).iterator():
+        index = min(max(round(score * 10), 0), SCORE_BUCKETS - 1) + 1
+        while index <= SCORE_BUCKETS:
+            counts[(scope, index)] += 1
+            index += index & -index
+    LeaderboardScoreCount.objects.bulk_create(
+        [
+            LeaderboardScoreCount(scope=scope, node=node, count=count)
+            for (scope, node), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0017_question_fts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardScoreCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.CharField(max_length=150)),
+                ("node", models.PositiveSmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scope", "node"),
+                        name="leaderboard_count_scope_node_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(rekey_and_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests_app", "0018_leaderboardscorecount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testattempt",
+            name="layout",
+            field=models.JSONField(
+                blank=True,
+                help_text="O'quvchi ko'rgan varaqa [[savol_id, [variant_id, ...]], ...] - birinchi ochilishda yoziladi, baholash va ko'rib chiqish shundan",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 import json
+from datetime import timedelta
 from django.utils import timezone
 
 class Test(models.Model):
@@ -18,12 +19,21 @@ class Test(models.Model):
     max_attempts = models.IntegerField(default=1)
     show_results = models.BooleanField(default=True)
     shuffle_questions = models.BooleanField(default=False)
+    blueprint = models.JSONField(default=dict, blank=True, help_text="Varaqa rejasi: mavzu/qiyinlik bo'yicha savollar soni va ball chegarasi (tests_app/blueprints.py)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
     
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from tests_app.blueprints import BlueprintError, validate_blueprint
+        try:
+            self.blueprint = validate_blueprint(self.blueprint)
+        except BlueprintError as e:
+            raise ValidationError({'blueprint': str(e)})
+    
     @property
     def total_questions(self):
         return self.questions.count()
@@ -38,12 +48,19 @@ class Question(models.Model):
         ('multiple_choice', 'Multiple Choice'),
         ('text_answer', 'Text Answer'),
     )
+    DIFFICULTY_LEVELS = (
+        (1, 'Oson'),
+        (2, "O'rta"),
+        (3, 'Qiyin'),
+    )
     
     test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='questions')
     question_text = models.TextField()
     question_type = models.CharField(max_length=15, choices=QUESTION_TYPES)
     points = models.FloatField(default=1.0)
     order = models.IntegerField(default=0)
+    topic = models.CharField(max_length=100, blank=True, help_text="Mavzu (varaqa rejasi uchun)")
+    difficulty = models.PositiveSmallIntegerField(choices=DIFFICULTY_LEVELS, default=2)
     explanation = models.TextField(blank=True, help_text="Explanation for the correct answer")
     image = models.ImageField(upload_to='question_images/', blank=True, null=True, help_text="Savol uchun rasm (ixtiyoriy)")
     
@@ -73,10 +90,56 @@ class TestAttempt(models.Model):
     time_taken = models.DurationField(null=True, blank=True)
     attempt_number = models.IntegerField(default=1)  # Qayta ishlash raqami
     is_retake = models.BooleanField(default=False)  # Qayta ishlashmi
+    deadline = models.DateTimeField(null=True, blank=True, db_index=True, help_text="Server tomonidan belgilangan tugash vaqti (pauzalar hisobga olinadi)")
+    seed = models.BigIntegerField(null=True, blank=True, help_text="Varaqa urug'i: savollar tanlovi va tartibi shundan qayta quriladi")
+    is_started = models.BooleanField(default=True, help_text="Imtihondan oldin yaratilgan (prewarm_exams) urinishlar o'quvchi boshlaguncha False")
+    layout = models.JSONField(null=True, blank=True, help_text="O'quvchi ko'rgan varaqa [[savol_id, [variant_id, ...]], ...] - birinchi ochilishda yoziladi, baholash va ko'rib chiqish shundan")
     
     class Meta:
         ordering = ['-started_at']
     
+    def compute_deadline(self, started_at=None):
+        """started_at + time_limit, lekin Test.end_time'dan oshmasligi kerak"""
+        started_at = started_at or self.started_at or timezone.now()
+        deadline = started_at + timedelta(minutes=self.test.time_limit)
+        if self.test.end_time and self.test.end_time < deadline:
+            deadline = self.test.end_time
+        return deadline
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.seed is None:
+            from tests_app.papers import paper_seed
+            self.seed = paper_seed(self.test_id, self.student_id, self.attempt_number)
+        if self._state.adding and self.deadline is None and not self.is_completed and self.is_started:
+            self.deadline = self.compute_deadline(timezone.now())
+        super().save(*args, **kwargs)
+    
+    def start(self):
+        """Oldindan yaratilgan urinishni boshlash: vaqt o'quvchi boshlagan paytdan hisoblanadi.
+
+        Shartli UPDATE - ikki tab'dan bir vaqtda boshlansa faqat bittasi yozadi.
+        """
+        now = timezone.now()
+        deadline = self.compute_deadline(now)
+        started = TestAttempt.objects.filter(id=self.id, is_started=False).update(
+            started_at=now, deadline=deadline, is_started=True
+        )
+        if started:
+            self.started_at, self.deadline, self.is_started = now, deadline, True
+        else:
+            self.refresh_from_db(fields=['started_at', 'deadline', 'is_started'])
+    
+    def is_past_deadline(self, is_paused=False, now=None):
+        """Server vaqti tugaganmi. Pauzadagi testda deadline resume paytida suriladi - tekshirilmaydi"""
+        return not is_paused and self.deadline is not None and (now or timezone.now()) > self.deadline
+    
+    def finish_time(self, is_paused=False, now=None):
+        """Yakunlash vaqti: min(hozir, deadline, Test.end_time) - kech yuborilgan finish vaqtni cho'zmaydi"""
+        candidates = [now or timezone.now(), self.test.end_time]
+        if not is_paused:
+            candidates.append(self.deadline)
+        return min(value for value in candidates if value is not None)
+    
     def can_request_retake(self):
         """O'quvchi qayta ishlash so'rashi mumkinmi?"""
         if not self.is_completed:
@@ -188,6 +251,7 @@ class TestResult(models.Model):
     unanswered = models.IntegerField(default=0)
     grade = models.CharField(max_length=15, blank=True)  # A'lo, Yaxshi, Qoniqarli, Qoniqarsiz
     feedback = models.TextField(blank=True)
+    details = models.JSONField(default=dict, blank=True, help_text="Yakunlashda hisoblangan batafsil natija (savollar bo'yicha)")
     created_at = models.DateTimeField(auto_now_add=True)
     
     def calculate_grade(self):
@@ -231,6 +295,120 @@ class TestRetakeRequest(models.Model):
     class Meta:
         unique_together = ['student', 'test', 'previous_attempt']
         ordering = ['-created_at']
+        indexes = [
+            # Tasdiqlash navbati: status bo'yicha filter + created_at bo'yicha keyset sahifalash
+            models.Index(fields=['status', 'created_at'], name='retake_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.test.title} - {self.get_status_display()}"
+
+class StudentStats(models.Model):
+    """O'quvchi natijalari proyeksiyasi - finish_test paytida yangilanadi.
+
+    Dashboard, o'quvchilar boshqaruvi va analitika TestAttempt jadvalini
+    qayta skanerlash o'rniga shu bitta qatorni o'qiydi. To'liq qayta
+    hisoblash: python manage.py rebuild_student_stats
+    """
+    student = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stats')
+    attempts_count = models.IntegerField(default=0, db_index=True)
+    scored_count = models.IntegerField(default=0, help_text="Umumiy balli (total_points > 0) urinishlar soni")
+    percentage_sum = models.FloatField(default=0)
+    average_percentage = models.FloatField(default=0, db_index=True)
+    best_percentage = models.FloatField(default=0)
+    best_attempt = models.ForeignKey(TestAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(null=True, blank=True)
+    subject_stats = models.JSONField(default=dict, blank=True, help_text='{"fan": {"count": n, "sum": foizlar yig\'indisi}}')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def subject_averages(self):
+        return {
+            subject: round(data['sum'] / data['count'], 1) if data['count'] else 0
+            for subject, data in self.subject_stats.items()
+        }
+    
+    def add_attempt(self, attempt, subject):
+        """Yakunlangan urinishni proyeksiyaga qo'shish (saqlamaydi)"""
+        self.attempts_count += 1
+        if attempt.finished_at and (self.last_activity is None or attempt.finished_at > self.last_activity):
+            self.last_activity = attempt.finished_at
+        if not attempt.total_points or attempt.percentage is None:
+            return
+        self.scored_count += 1
+        self.percentage_sum += attempt.percentage
+        self.average_percentage = self.percentage_sum / self.scored_count
+        if self.best_attempt_id is None or attempt.percentage > self.best_percentage:
+            self.best_percentage = attempt.percentage
+            self.best_attempt_id = attempt.id
+        subject_data = self.subject_stats.setdefault(subject, {'count': 0, 'sum': 0})
+        subject_data['count'] += 1
+        subject_data['sum'] += attempt.percentage
+    
+    def __str__(self):
+        return f"Stats for {self.student.username}"
+
+class LeaderboardEntry(models.Model):
+    """Reyting jadvali qatori - har bir (scope, o'quvchi) uchun bitta ball.
+
+    scope: "test:<id>" (eng yaxshi foiz), "grade:<sinf>", "class:<sinf>:<guruh>"
+    va "subject:<sinf>:<fan>" (o'rtacha foiz). Qatorlar finish_test paytida
+    yangilanadi; (scope, -score) indeksi top-K va o'rinni topishni
+    saralashsiz bajaradi. Qayta qurish: python manage.py rebuild_student_stats
+    """
+    scope = models.CharField(max_length=150)
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'student'], name='leaderboard_scope_student_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['scope', '-score'], name='leaderboard_scope_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} - {self.student.username}: {self.score:.1f}"
+
+class LeaderboardScoreCount(models.Model):
+    """Reyting ballari taqsimoti - har bir scope uchun Fenwick daraxti tugunlari.
+
+    Ballar 0.1 aniqlikdagi savatlarga bo'linadi, node tuguni o'z oralig'idagi
+    LeaderboardEntry qatorlari sonini saqlaydi (tests_app/leaderboard.py).
+    O'rin shu jadvaldan O(log n) tugun o'qib topiladi.
+    """
+    scope = models.CharField(max_length=150)
+    node = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'node'], name='leaderboard_count_scope_node_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} [{self.node}]: {self.count}"
+
+class ExamPaper(models.Model):
+    """O'quvchining oldindan yaratilgan imtihon varaqasi (generate_papers).
+
+    layout - [[savol_id, [variant_id, ...]], ...] ko'rinishidagi ixcham tartib:
+    matnlar keshdagi savollar bankidan olinadi, shuning uchun imtihon
+    boshlanishi bitta qatorni o'qish bilan tugaydi.
+    """
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='papers')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='exam_papers')
+    seed = models.BigIntegerField()
+    bank_version = models.BigIntegerField(default=0, help_text="Varaqa qurilgan savollar banki versiyasi")
+    layout = models.JSONField(default=list)
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'student'], name='exam_paper_test_student_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.test.title} - {self.student.username}"
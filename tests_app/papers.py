@@ -0,0 +1,284 @@
+"""
+Imtihon varaqalari.
+
+Savollar va indeks test versiyasi bo'yicha single-flight bilan keshlanadi:
+300 o'quvchi bir vaqtda "boshlash"ni bossa ham ular bitta worker'da,
+bir necha so'rov bilan quriladi. Har bir o'quvchining varaqasi (tanlash va
+aralashtirish) keshdagi ma'lumotlardan xotirada yasaladi.
+
+Varaqa urinish urug'ining (TestAttempt.seed) va bankning sof funksiyasi: har
+bir savol va variant (urug', id) juftligidan hisoblangan kalit bo'yicha
+tartiblanadi, eng kichik kalitli 50 ta savol tanlanadi. Bankka savol qo'shilsa
+tanlov o'zgarishi mumkin, shuning uchun birinchi ochilishda varaqa layout
+sifatida urinishga (TestAttempt.layout) yoziladi - davom ettirish, baholash va
+ko'rib chiqish imtihon davomida bank o'zgarsa ham o'quvchi ko'rgan varaqadan.
+
+Tanlov savollar indeksida bajariladi (get_question_index: faqat id, mavzu,
+qiyinlik va ball, teg bo'yicha guruhlangan, test rejasi bilan birga), test
+rejasi (Test.blueprint) bo'lsa qatlamlar bo'yicha (blueprints.py). Varaqa
+uchun faqat tanlangan savollar o'qiladi - har biri test versiyasi bo'yicha
+alohida keshlanadi, minglab savolli bank to'liq yuklanmaydi.
+
+Katta sinflar uchun varaqalar oldindan yaratilishi ham mumkin (generate_papers):
+tartib ixcham layout sifatida ExamPaper'ga yoziladi, imtihon boshlanishida
+bitta qator o'qiladi va matnlar keshdagi savollardan olinadi.
+"""
+import functools
+import heapq
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+from django.utils.crypto import salted_hmac
+
+from accounts.models import User
+from mytest.caching import get_many_or_compute, get_version, single_flight, versioned_key
+
+from .blueprints import select_by_blueprint
+from .models import Test, Question, Choice, TestAttempt, ExamPaper
+
+MAX_QUESTIONS = 50
+BANK_TIMEOUT = 60 * 60
+PAPER_CHUNK_SIZE = 256
+PARALLEL_PAPERS_MIN_STUDENTS = 2000  # kichik sinf uchun pool ochish arzonroq emas
+_MASK64 = (1 << 64) - 1
+
+
+def _load_questions(questions):
+    """Savollar variantlari bilan (2 ta so'rov): {id: {id, question_text, ..., choices}}"""
+    by_id = {}
+    for question in questions.only('id', 'question_text', 'question_type', 'points', 'image').order_by('id'):
+        data = {
+            'id': question.id,
+            'question_text': question.question_text,
+            'question_type': question.question_type,
+            'points': question.points,
+            'image_url': question.image.url if question.image else None,
+        }
+        if question.question_type in ['single_choice', 'multiple_choice']:
+            data['choices'] = []
+        by_id[question.id] = data
+
+    for choice_id, question_id, text in Choice.objects.filter(
+        question__in=questions
+    ).values_list('id', 'question_id', 'choice_text').order_by('id'):
+        question = by_id.get(question_id)
+        if question is not None and 'choices' in question:
+            question['choices'].append({'id': choice_id, 'text': text})
+    return by_id
+
+
+@single_flight('test', timeout=BANK_TIMEOUT, hot=True)
+def get_question_bank(test_id):
+    """Testning barcha savollari variantlari bilan: [{id, question_text, ..., choices}] (paketli ishlar uchun)"""
+    return list(_load_questions(Question.objects.filter(test_id=test_id)).values())
+
+
+@single_flight('test', timeout=BANK_TIMEOUT, hot=True)
+def get_question_index(test_id):
+    """Varaqa tanlash uchun indeks (matnlarsiz, 2 ta yengil so'rov).
+
+    {'blueprint': test rejasi, 'groups': {(mavzu, qiyinlik): [(id, ball), ...]}}.
+    Test saqlanganda ham versiya oshadi, shuning uchun reja bilan birga keshlanadi.
+    """
+    blueprint = Test.objects.filter(id=test_id).values_list('blueprint', flat=True).first() or {}
+    groups = defaultdict(list)
+    for question_id, topic, difficulty, points in Question.objects.filter(test_id=test_id).values_list(
+        'id', 'topic', 'difficulty', 'points'
+    ).order_by('id'):
+        groups[(topic, difficulty)].append((question_id, points))
+    return {'blueprint': blueprint, 'groups': dict(groups)}
+
+
+def get_questions(test_id, question_ids):
+    """Faqat berilgan savollar: {id: savol yoki None (o'chirilgan)}.
+
+    Har bir savol test versiyasi bo'yicha alohida keshlanadi ("hot" + umumiy kesh).
+    """
+    prefix = versioned_key('test', test_id, 'question')
+    keys = {question_id: f'{prefix}:{question_id}' for question_id in question_ids}
+
+    def load(missing_ids):
+        found = _load_questions(Question.objects.filter(test_id=test_id, id__in=missing_ids))
+        return {question_id: found.get(question_id) for question_id in missing_ids}
+
+    return get_many_or_compute(keys, load, BANK_TIMEOUT, hot=True)
+
+
+def paper_seed(test_id, student_id, attempt_number=1):
+    """Urinish urug'i: deterministik, qayta ishlashda (attempt_number) yangi varaqa.
+
+    SECRET_KEY asosidagi HMAC - o'quvchi boshqalarning varaqasini oldindan hisoblay olmaydi.
+    """
+    digest = salted_hmac('tests_app.papers', f'{test_id}:{student_id}:{attempt_number}').digest()
+    return int.from_bytes(digest[:8], 'big') >> 1  # BigIntegerField oralig'i
+
+
+def _mix(seed, value):
+    """splitmix64: (urug', id) juftligidan barqaror 64-bitli kalit (Python versiyasiga bog'liq emas)"""
+    z = (seed + (value + 1) * 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def paper_question_ids(seed, index):
+    """Varaqadagi savollar id'lari, varaqa tartibida - urug' va indeksning sof funksiyasi.
+
+    Rejasiz testda eng kichik kalitli 50 ta savol, rejada - qatlamlar bo'yicha.
+    """
+    key = functools.partial(_mix, seed)
+    if index['blueprint']:
+        return select_by_blueprint(index['groups'], index['blueprint'], key)
+    question_ids = [question_id for items in index['groups'].values() for question_id, _ in items]
+    if len(question_ids) > MAX_QUESTIONS:
+        return heapq.nsmallest(MAX_QUESTIONS, question_ids, key=key)
+    return sorted(question_ids, key=key)
+
+
+def paper_layout(seed, question_ids, questions):
+    """Varaqa tartibi: [[savol_id, [variant_id, ...]], ...]. questions - {id: savol}"""
+    key = functools.partial(_mix, seed)
+    return [
+        [question_id, sorted((choice['id'] for choice in questions[question_id].get('choices', ())), key=key)]
+        for question_id in question_ids if questions.get(question_id) is not None
+    ]
+
+
+def paper_from_layout(questions, layout, strict=True):
+    """Layout va savollardan ({id: savol}) o'quvchi varaqasi.
+
+    Savollar keshdagi umumiy obyektlar - shuning uchun o'zgartirilmaydi, nusxalar qaytariladi.
+    strict: layout yaratilgandan keyin savol yoki variant o'chirilgan/qo'shilgan bo'lsa None.
+    strict=False (urinishga yozilgan layout): o'chirilganlar tushib qoladi, yangi variantlar oxirida.
+    """
+    paper = []
+    for question_id, choice_ids in layout:
+        question = questions.get(question_id)
+        if question is None:
+            if strict:
+                return None
+            continue
+        data = dict(question)
+        if 'choices' in question:
+            choices = {choice['id']: choice for choice in question['choices']}
+            if strict and (len(choice_ids) != len(choices) or not all(choice_id in choices for choice_id in choice_ids)):
+                return None
+            ordered = [choices[choice_id] for choice_id in choice_ids if choice_id in choices]
+            shown = set(choice_ids)
+            data['choices'] = ordered + [choice for choice in question['choices'] if choice['id'] not in shown]
+        paper.append(data)
+    return paper
+
+
+def build_paper(seed, test_id):
+    """Urug'dan o'quvchi varaqasi: indeks bo'yicha tanlov, faqat tanlangan savollar o'qiladi"""
+    question_ids = paper_question_ids(seed, get_question_index(test_id))
+    questions = get_questions(test_id, question_ids)
+    return paper_from_layout(questions, paper_layout(seed, question_ids, questions))
+
+
+def _seed_layout(attempt):
+    """Urug'dan layout: oldindan yaratilgan (generate_papers) yoki joriy bank bo'yicha.
+
+    ExamPaper faqat bank o'shandan beri o'zgarmagan bo'lsa ishlatiladi - aks holda
+    u urug'dan joriy bank bo'yicha qurilgan varaqa bilan bir xil emas.
+    """
+    layout = ExamPaper.objects.filter(
+        test_id=attempt.test_id,
+        student_id=attempt.student_id,
+        seed=attempt.seed,
+        bank_version=get_version('test', attempt.test_id)
+    ).values_list('layout', flat=True).first()
+    if layout is not None:
+        return layout
+    question_ids = paper_question_ids(attempt.seed, get_question_index(attempt.test_id))
+    return paper_layout(attempt.seed, question_ids, get_questions(attempt.test_id, question_ids))
+
+
+def attempt_paper(attempt):
+    """Urinish varaqasi - urinishga yozilgan layout bo'yicha. Urug'siz eski urinishlar uchun None.
+
+    Layout'siz tugallanmagan urinishda (birinchi ochilish) layout urug'dan quriladi va
+    shartli UPDATE bilan yoziladi: ikki tab'dan bir vaqtda ochilsa ham bitta layout qoladi.
+    Layout'siz eski yakunlangan urinishlar varaqasi urug'dan qayta quriladi (yozilmaydi).
+    """
+    layout = attempt.layout
+    if layout is None:
+        if attempt.seed is None:
+            return None
+        layout = _seed_layout(attempt)
+        if not attempt.is_completed:
+            if TestAttempt.objects.filter(id=attempt.id, layout__isnull=True).update(layout=layout):
+                attempt.layout = layout
+            else:
+                attempt.refresh_from_db(fields=['layout'])
+                layout = attempt.layout
+    questions = get_questions(attempt.test_id, [question_id for question_id, _ in layout])
+    return paper_from_layout(questions, layout, strict=False)
+
+
+_pool_data = None
+
+
+def eligible_students(test):
+    """Testni yechishi mumkin bo'lgan o'quvchilar (take_test_view va login shartlari).
+
+    Varaqalar (generate_papers) va oldindan tayyorlash (prewarm) bitta ro'yxatdan foydalanadi.
+    """
+    return User.objects.filter(role='student', grade=test.grade, is_active=True, is_verified=True)
+
+
+def _init_pool(index, questions):
+    global _pool_data
+    _pool_data = (index, questions)
+
+
+def _layout_for_seed(seed):
+    index, questions = _pool_data
+    return paper_layout(seed, paper_question_ids(seed, index), questions)
+
+
+def generate_papers(test, processes=None, batch_size=500):
+    """Sinfdagi barcha o'quvchilar varaqalarini yaratish va upsert qilish. Yaratilganlar sonini qaytaradi.
+
+    Birinchi urinish urug'i ishlatiladi, shuning uchun saqlangan varaqa
+    urug'dan qayta qurilgan varaqa bilan bir xil; qayta ishga tushirish faqat
+    bank o'zgargan bo'lsa layout'ni yangilaydi. Barcha savollar keshga
+    yoziladi - imtihon boshlanishida ular keshdan o'qiladi.
+    """
+    # Versiya bankdan oldin o'qiladi: oraliqda o'zgarsa varaqalar eskirgan hisoblanadi
+    bank_version = get_version('test', test.id)
+    index = get_question_index(test.id)
+    questions = get_questions(
+        test.id, [question_id for items in index['groups'].values() for question_id, _ in items]
+    )
+    student_ids = list(eligible_students(test).values_list('id', flat=True).order_by('id'))
+    seeds = [paper_seed(test.id, student_id) for student_id in student_ids]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(seeds) < PARALLEL_PAPERS_MIN_STUDENTS:
+        layouts = [paper_layout(seed, paper_question_ids(seed, index), questions) for seed in seeds]
+    else:
+        # fork: indeks va savollar bola jarayonlarga nusxalanmasdan meros o'tadi;
+        # ochiq DB ulanishlari oldin yopiladi
+        connections.close_all()
+        with ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_pool, initargs=(index, questions)
+        ) as pool:
+            layouts = list(pool.map(_layout_for_seed, seeds, chunksize=PAPER_CHUNK_SIZE))
+
+    ExamPaper.objects.bulk_create(
+        [
+            ExamPaper(test=test, student_id=student_id, seed=seed, bank_version=bank_version, layout=layout)
+            for student_id, seed, layout in zip(student_ids, seeds, layouts)
+        ],
+        update_conflicts=True,
+        unique_fields=['test', 'student'],
+        update_fields=['seed', 'bank_version', 'layout', 'generated_at'],
+        batch_size=batch_size
+    )
+    return len(student_ids)
@@ -0,0 +1,97 @@
+"""
+Imtihon boshlanishidan oldin keshlarni isitish.
+
+Test.start_time yuklama qachon kelishini aniq aytadi: qo'ng'iroqdan keyingi
+birinchi so'rovlar savollar indeksi va matnlari, javob kaliti, test ma'lumotlari va
+o'quvchilar proyeksiyasini sovuq keshdan qurmasligi uchun ular oldindan
+umumiy keshga yoziladi. Ixtiyoriy ravishda o'quvchilar varaqalari
+yaratiladi (papers.generate_papers) va sinf o'quvchilari uchun
+urinishlar bulk_create bilan oldindan yaratiladi (is_started=False) -
+take_test_view ularni INSERT o'rniga bitta shartli UPDATE bilan boshlaydi.
+"""
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from accounts.backends import USER_PROJECTION_FIELDS, cache_users
+
+from .grading import warm_answer_keys
+from .models import Test, TestAttempt
+from .papers import eligible_students, generate_papers, get_question_index, get_questions, paper_seed
+from .status import get_test_info, refresh_test_statuses
+
+ATTEMPT_BATCH_SIZE = 500
+
+
+def upcoming_tests(minutes, now=None):
+    """Keyingi `minutes` daqiqada boshlanadigan faol testlar"""
+    now = now or timezone.now()
+    return Test.objects.filter(
+        is_active=True,
+        start_time__gte=now,
+        start_time__lte=now + timedelta(minutes=minutes)
+    ).order_by('start_time')
+
+
+def warm_questions(test_id):
+    """Savollar indeksi va barcha savollarni keshga yozish (varaqalar shulardan yasaladi)"""
+    index = get_question_index(test_id)
+    question_ids = [question_id for items in index['groups'].values() for question_id, _ in items]
+    get_questions(test_id, question_ids)
+    return len(question_ids)
+
+
+def warm_students(test):
+    """O'quvchilar proyeksiyasini keshga yozish (AuthenticationMiddleware uchun). id'lar ro'yxatini qaytaradi"""
+    # Sessiya xeshi uchun parol maydoni ham kerak
+    students = list(eligible_students(test).only(*USER_PROJECTION_FIELDS, 'password'))
+    cache_users(students)
+    return [student.id for student in students]
+
+
+def precreate_attempts(test, student_ids):
+    """Urinishi yo'q o'quvchilar uchun boshlanmagan urinishlarni bulk_create bilan yaratish"""
+    existing = set(
+        TestAttempt.objects.filter(test=test, student_id__in=student_ids).values_list('student_id', flat=True)
+    )
+    attempts = [
+        TestAttempt(test=test, student_id=student_id, is_started=False, seed=paper_seed(test.id, student_id))
+        for student_id in student_ids if student_id not in existing
+    ]
+    return len(TestAttempt.objects.bulk_create(attempts, batch_size=ATTEMPT_BATCH_SIZE))
+
+
+def prewarm_test(test, create_attempts=False, papers=False, processes=None):
+    """Bitta testni isitish. Bosqichlar vaqti (ms) va sanoqlar lug'atini qaytaradi"""
+    timings = {}
+
+    def timed(step, func, *args):
+        started = time.monotonic()
+        value = func(*args)
+        timings[step] = round((time.monotonic() - started) * 1000, 1)
+        return value
+
+    questions = timed('questions', warm_questions, test.id)
+    timed('answer_key', warm_answer_keys, [test.id])
+    timed('test_info', get_test_info, test.id)
+    timed('status', refresh_test_statuses, [test.id])
+
+    student_ids = timed('students', warm_students, test)
+
+    paper_count = 0
+    if papers:
+        paper_count = timed('papers', generate_papers, test, processes)
+
+    created = 0
+    if create_attempts:
+        created = timed('attempts', precreate_attempts, test, student_ids)
+
+    return {
+        'questions': questions,
+        'students': len(student_ids),
+        'papers': paper_count,
+        'attempts_created': created,
+        'timings': timings,
+        'total_ms': round(sum(timings.values()), 1),
+    }
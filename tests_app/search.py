@@ -0,0 +1,352 @@
+"""
+Savollar banki bo'yicha to'liq matnli qidiruv (savol matni va variantlar).
+
+O'qituvchi yangi test tuzayotganda mavjud savollarni topishi uchun: indeks
+DB'ning o'zida - SQLite'da FTS5 virtual jadval (bm25 bo'yicha tartib),
+PostgreSQL'da tsvector ustunli jadval va GIN indeks (ts_rank_cd). Indeks
+triggerlar bilan yangilanadi, shuning uchun savol yoki variant qanday
+saqlansa ham (save, bulk_create, queryset.update, admin) mos keladi.
+Boshqa DB'larda indeks yo'q - qidiruv icontains bilan ishlaydi.
+
+SQLite jadvalni qayta qurganda (ba'zi migratsiyalar) uning triggerlari ham
+o'chadi - buni tests_app.W001 tekshiruvi (check --database default, migrate)
+ko'rsatadi, `rebuild_question_search` buyrug'i indeksni qayta o'rnatadi.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q, Prefetch
+
+from .models import Question, Choice
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+MAX_SEARCH_TERMS = 8
+# Juda umumiy so'zda (minglab mos savol) moslik faqat shuncha eng yangi savol orasida
+# hisoblanadi - tartiblash narxi bank hajmiga bog'liq bo'lmaydi
+SEARCH_RANK_CANDIDATES = 1000
+MIN_PREFIX_LENGTH = 3
+
+_SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE tests_app_question_fts USING fts5(
+        question_text, choices_text,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '3 4'
+    )
+    """,
+    """
+    INSERT INTO tests_app_question_fts (rowid, question_text, choices_text)
+    SELECT q.id, q.question_text, coalesce(
+        (SELECT group_concat(c.choice_text, ' ') FROM tests_app_choice c WHERE c.question_id = q.id), ''
+    )
+    FROM tests_app_question q
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_ai AFTER INSERT ON tests_app_question BEGIN
+        INSERT INTO tests_app_question_fts (rowid, question_text, choices_text)
+        VALUES (new.id, new.question_text, '');
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_au AFTER UPDATE OF question_text ON tests_app_question BEGIN
+        UPDATE tests_app_question_fts SET question_text = new.question_text WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_ad AFTER DELETE ON tests_app_question BEGIN
+        DELETE FROM tests_app_question_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_ai AFTER INSERT ON tests_app_choice BEGIN
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = new.question_id), ''
+        ) WHERE rowid = new.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_au AFTER UPDATE OF choice_text, question_id ON tests_app_choice BEGIN
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = old.question_id), ''
+        ) WHERE rowid = old.question_id;
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = new.question_id), ''
+        ) WHERE rowid = new.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_ad AFTER DELETE ON tests_app_choice BEGIN
+        UPDATE tests_app_question_fts SET choices_text = coalesce(
+            (SELECT group_concat(choice_text, ' ') FROM tests_app_choice WHERE question_id = old.question_id), ''
+        ) WHERE rowid = old.question_id;
+    END
+    """,
+]
+
+_SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_ad",
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_au",
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_ai",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_ad",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_au",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_ai",
+    "DROP TABLE IF EXISTS tests_app_question_fts",
+]
+
+# Savol matni 'A', variantlar 'B' og'irlik bilan; o'zbek tili uchun lug'at yo'q - 'simple'
+_POSTGRES_INSTALL = [
+    """
+    CREATE TABLE tests_app_question_fts (
+        question_id bigint PRIMARY KEY REFERENCES tests_app_question (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX tests_app_question_fts_document_gin ON tests_app_question_fts USING gin (document)",
+    """
+    CREATE FUNCTION tests_app_question_fts_refresh(qid bigint) RETURNS void AS $$
+        INSERT INTO tests_app_question_fts (question_id, document)
+        SELECT q.id,
+               setweight(to_tsvector('simple', q.question_text), 'A') ||
+               setweight(to_tsvector('simple', coalesce(
+                   (SELECT string_agg(c.choice_text, ' ') FROM tests_app_choice c WHERE c.question_id = q.id), ''
+               )), 'B')
+        FROM tests_app_question q WHERE q.id = qid
+        ON CONFLICT (question_id) DO UPDATE SET document = EXCLUDED.document
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE FUNCTION tests_app_question_fts_question_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM tests_app_question_fts_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION tests_app_question_fts_choice_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM tests_app_question_fts_refresh(OLD.question_id);
+        END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.question_id <> OLD.question_id) THEN
+            PERFORM tests_app_question_fts_refresh(NEW.question_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tests_app_question_fts_iu AFTER INSERT OR UPDATE OF question_text ON tests_app_question
+    FOR EACH ROW EXECUTE FUNCTION tests_app_question_fts_question_trigger()
+    """,
+    """
+    CREATE TRIGGER tests_app_choice_fts_iud AFTER INSERT OR UPDATE OF choice_text, question_id OR DELETE
+    ON tests_app_choice FOR EACH ROW EXECUTE FUNCTION tests_app_question_fts_choice_trigger()
+    """,
+    """
+    INSERT INTO tests_app_question_fts (question_id, document)
+    SELECT q.id,
+           setweight(to_tsvector('simple', q.question_text), 'A') ||
+           setweight(to_tsvector('simple', coalesce(c.choices_text, '')), 'B')
+    FROM tests_app_question q
+    LEFT JOIN (
+        SELECT question_id, string_agg(choice_text, ' ') AS choices_text FROM tests_app_choice GROUP BY question_id
+    ) c ON c.question_id = q.id
+    """,
+]
+
+_POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS tests_app_choice_fts_iud ON tests_app_choice",
+    "DROP TRIGGER IF EXISTS tests_app_question_fts_iu ON tests_app_question",
+    "DROP FUNCTION IF EXISTS tests_app_question_fts_choice_trigger()",
+    "DROP FUNCTION IF EXISTS tests_app_question_fts_question_trigger()",
+    "DROP FUNCTION IF EXISTS tests_app_question_fts_refresh(bigint)",
+    "DROP TABLE IF EXISTS tests_app_question_fts",
+]
+
+
+_INSTALL = {'sqlite': _SQLITE_INSTALL, 'postgresql': _POSTGRES_INSTALL}
+_DROP = {'sqlite': _SQLITE_DROP, 'postgresql': _POSTGRES_DROP}
+
+# Indeksni yangilab turadigan triggerlar (checks.py ularning borligini tekshiradi)
+SEARCH_TRIGGERS = {
+    'sqlite': {
+        'tests_app_question_fts_ai', 'tests_app_question_fts_au', 'tests_app_question_fts_ad',
+        'tests_app_choice_fts_ai', 'tests_app_choice_fts_au', 'tests_app_choice_fts_ad',
+    },
+    'postgresql': {'tests_app_question_fts_iu', 'tests_app_choice_fts_iud'},
+}
+_TRIGGERS_SQL = {
+    'sqlite': "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'tests_app_%_fts_%'",
+    'postgresql': "SELECT tgname FROM pg_trigger WHERE NOT tgisinternal AND tgname LIKE 'tests_app_%_fts_%'",
+}
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_search_index(connection):
+    """Indeks jadvali va triggerlarni yaratish, mavjud savollarni indekslash (migratsiya va rebuild)"""
+    _execute(connection, _INSTALL.get(connection.vendor, []))
+
+
+def drop_search_index(connection):
+    _execute(connection, _DROP.get(connection.vendor, []))
+
+
+def missing_search_triggers(connection):
+    """Bazada yo'q qidiruv triggerlari (SQLite jadvalni qayta qurganda ular jimgina o'chadi)"""
+    expected = SEARCH_TRIGGERS.get(connection.vendor)
+    if not expected:
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(_TRIGGERS_SQL[connection.vendor])
+        return expected - {name for name, in cursor.fetchall()}
+
+
+def rebuild_search_index(connection):
+    """Indeksni noldan qurish: triggerlar yo'qolgan yoki indeks mos kelmay qolgan bo'lsa"""
+    drop_search_index(connection)
+    install_search_index(connection)
+
+
+def search_terms(query):
+    """So'rovdan so'zlar (kichik harflarda). Tinish belgilari va qidiruv operatorlari tashlab yuboriladi"""
+    return re.findall(r'[^\W_]+', query.lower())[:MAX_SEARCH_TERMS]
+
+
+def _is_prefix(term):
+    # 1-2 harfli prefiks bankning katta qismiga mos keladi - to'liq so'z sifatida qidiriladi
+    return len(term) >= MIN_PREFIX_LENGTH
+
+
+def _filters(subject, grade, created_by):
+    clauses, params = [], []
+    if subject:
+        clauses.append('t.subject = %s')
+        params.append(subject)
+    if grade is not None:
+        clauses.append('t.grade = %s')
+        params.append(grade)
+    if created_by is not None:
+        clauses.append('t.created_by_id = %s')
+        params.append(created_by)
+    return clauses, params
+
+
+def _search_sqlite(cursor, terms, filters, limit, offset):
+    # Har bir so'z alohida ibora (operator sifatida o'qilmaydi), oxirgisi prefiks - yozish davomida qidiruv
+    match = ' '.join(f'"{term}"' for term in terms)
+    if _is_prefix(terms[-1]):
+        match += '*'
+    clauses, params = filters
+    # Savol matnidagi moslik variantlardagidan ikki baravar og'ir
+    order = ' ORDER BY bm25(tests_app_question_fts, 2.0, 1.0), f.rowid LIMIT %s OFFSET %s'
+    if clauses:
+        # Filtr har bir mos savolga JOIN bilan qo'llanadi, bm25 faqat filtrdan o'tganlar uchun
+        sql = (
+            'SELECT f.rowid FROM tests_app_question_fts f'
+            ' JOIN tests_app_question q ON q.id = f.rowid JOIN tests_app_test t ON t.id = q.test_id'
+            ' WHERE tests_app_question_fts MATCH %s' + ''.join(f' AND {clause}' for clause in clauses) + order
+        )
+        cursor.execute(sql, [match, *params, limit, offset])
+        return
+    # Eng yangi SEARCH_RANK_CANDIDATES ta mos savolning eng kichik rowid'i: FTS5 doclist'ni
+    # rowid tartibida o'qiydi, chegara arzon topiladi va bm25 faqat shu savollar uchun hisoblanadi
+    sql = (
+        'SELECT f.rowid FROM tests_app_question_fts f WHERE tests_app_question_fts MATCH %s'
+        ' AND f.rowid >= coalesce((SELECT rowid FROM tests_app_question_fts WHERE tests_app_question_fts MATCH %s'
+        ' ORDER BY rowid DESC LIMIT 1 OFFSET %s), 0)' + order
+    )
+    cursor.execute(sql, [match, match, SEARCH_RANK_CANDIDATES - 1, limit, offset])
+
+
+def _search_postgresql(cursor, terms, filters, limit, offset):
+    tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*' if _is_prefix(terms[-1]) else terms[-1]])
+    clauses, params = filters
+    joins = ''
+    if clauses:
+        joins = ' JOIN tests_app_question q ON q.id = f.question_id JOIN tests_app_test t ON t.id = q.test_id'
+    # ts_rank_cd faqat eng yangi SEARCH_RANK_CANDIDATES ta mos savol uchun hisoblanadi
+    sql = (
+        "WITH query AS (SELECT to_tsquery('simple', %s) AS value), candidates AS ("
+        ' SELECT f.question_id, f.document FROM tests_app_question_fts f' + joins + ', query'
+        ' WHERE f.document @@ query.value' + ''.join(f' AND {clause}' for clause in clauses) +
+        ' ORDER BY f.question_id DESC LIMIT %s'
+        ') SELECT c.question_id FROM candidates c, query'
+        ' ORDER BY ts_rank_cd(c.document, query.value) DESC, c.question_id LIMIT %s OFFSET %s'
+    )
+    cursor.execute(sql, [tsquery, *params, SEARCH_RANK_CANDIDATES, limit, offset])
+
+
+def _search_fallback(terms, subject, grade, created_by, limit, offset):
+    questions = Question.objects.all()
+    for term in terms:
+        questions = questions.filter(Q(question_text__icontains=term) | Q(choices__choice_text__icontains=term))
+    if subject:
+        questions = questions.filter(test__subject=subject)
+    if grade is not None:
+        questions = questions.filter(test__grade=grade)
+    if created_by is not None:
+        questions = questions.filter(test__created_by_id=created_by)
+    return list(questions.distinct().order_by('-id').values_list('id', flat=True)[offset:offset + limit])
+
+
+def search_question_ids(query, subject=None, grade=None, created_by=None, offset=0, limit=SEARCH_PAGE_SIZE,
+                        using=DEFAULT_DB_ALIAS):
+    """Mos savollar id'lari, eng mosi birinchi: (id'lar, keyingi sahifa bormi).
+
+    Filtrlar testga qo'llanadi (fan, sinf, muallif). Sahifa + 1 qator o'qiladi -
+    umumiy sonni hisoblash (katta bankda qimmat) kerak emas. Natijalar eng yangi
+    SEARCH_RANK_CANDIDATES ta mos savol bilan cheklangan (SQLite'da - filtrsiz qidiruvda).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    connection = connections[using]
+    search = {'sqlite': _search_sqlite, 'postgresql': _search_postgresql}.get(connection.vendor)
+    if search is None:
+        ids = _search_fallback(terms, subject, grade, created_by, limit + 1, offset)
+    else:
+        with connection.cursor() as cursor:
+            search(cursor, terms, _filters(subject, grade, created_by), limit + 1, offset)
+            ids = [row[0] for row in cursor.fetchall()]
+    return ids[:limit], len(ids) > limit
+
+
+def load_search_results(question_ids):
+    """Sahifadagi savollar variantlari va testi bilan (2 ta so'rov), qidiruv tartibida"""
+    questions = Question.objects.filter(id__in=question_ids).select_related('test').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+    by_id = {question.id: question for question in questions}
+    results = []
+    for question_id in question_ids:
+        question = by_id.get(question_id)
+        if question is None:
+            continue
+        results.append({
+            'id': question.id,
+            'question_text': question.question_text,
+            'question_type': question.question_type,
+            'points': question.points,
+            'explanation': question.explanation,
+            'topic': question.topic,
+            'difficulty': question.difficulty,
+            'choices': [
+                {'text': choice.choice_text, 'is_correct': choice.is_correct}
+                for choice in question.choices.all()
+            ],
+            'test': {
+                'id': question.test_id,
+                'title': question.test.title,
+                'subject': question.test.subject,
+                'grade': question.test.grade,
+            },
+        })
+    return results
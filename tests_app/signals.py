@@ -0,0 +1,105 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from accounts.dashboard import invalidate_student_summaries
+from accounts.models import User
+from mytest.caching import bump_version
+
+from .leaderboard import move_student_entries, remove_student_entries
+from .models import Test, Question, Choice, TestAttempt
+from .status import set_test_status, invalidate_test_status
+
+
+ALL = 'all'
+
+
+def bump_tests_list_version():
+    """Testlar ro'yxati/monitoring (ETag) ni eskirtirish - queryset.update() dan keyin ham chaqiriladi"""
+    transaction.on_commit(lambda: bump_version('tests', ALL))
+
+
+def bump_test_version(test_id):
+    """Test mazmuni (savollar, variantlar) keshini eskirtirish - tranzaksiya tugagach"""
+    transaction.on_commit(lambda: bump_version('test', test_id))
+    bump_tests_list_version()
+
+
+def bump_attempts_version(test_id, student_id=None):
+    """Test urinishlariga bog'liq kesh (natijalar, monitoring, o'quvchi ro'yxati) ni eskirtirish"""
+    def bump():
+        bump_version('attempts', test_id)
+        bump_version('attempts', ALL)
+        if student_id is not None:
+            bump_version('student', student_id)
+    transaction.on_commit(bump)
+
+
+def bump_attempts_versions(test_ids, student_ids):
+    """Ko'p urinish birdan yakunlanganda (finish_attempts): har test versiyasi bir marta, bitta on_commit bilan"""
+    test_ids, student_ids = set(test_ids), set(student_ids)
+
+    def bump():
+        for test_id in test_ids:
+            bump_version('attempts', test_id)
+        bump_version('attempts', ALL)
+        for student_id in student_ids:
+            bump_version('student', student_id)
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Test)
+def refresh_test_status(sender, instance, **kwargs):
+    """Test saqlanganda (admin, tahrirlash, pauza) holat keshini yangilash"""
+    set_test_status(instance)
+    bump_test_version(instance.id)
+
+
+@receiver(post_delete, sender=Test)
+def drop_test_status(sender, instance, **kwargs):
+    invalidate_test_status(instance.id)
+    bump_test_version(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    bump_test_version(instance.test_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    try:
+        test_id = instance.question.test_id
+    except Question.DoesNotExist:
+        return
+    bump_test_version(test_id)
+
+
+@receiver([post_save, post_delete], sender=TestAttempt)
+def attempt_changed(sender, instance, **kwargs):
+    bump_attempts_version(instance.test_id, instance.student_id)
+    student_ids = [instance.student_id]
+    transaction.on_commit(lambda: invalidate_student_summaries(student_ids))
+
+
+@receiver(pre_save, sender=User)
+def remember_student_group(sender, instance, update_fields=None, **kwargs):
+    """Saqlashdan oldin eski sinf/guruhni eslab qolish (last_login kabi qisman saqlashda so'rovsiz)"""
+    instance._previous_group = None
+    if instance.pk is None or (update_fields is not None and not {'grade', 'class_name'} & set(update_fields)):
+        return
+    instance._previous_group = User.objects.filter(pk=instance.pk).values_list('grade', 'class_name').first()
+
+
+@receiver(post_save, sender=User)
+def move_leaderboard_entries(sender, instance, created, **kwargs):
+    """Sinf yoki guruh o'zgarsa o'quvchining reyting qatorlarini yangi guruhga ko'chirish"""
+    previous = getattr(instance, '_previous_group', None)
+    if created or previous is None or previous == (instance.grade, instance.class_name):
+        return
+    move_student_entries(instance.pk, instance.grade, instance.class_name)
+
+
+@receiver(pre_delete, sender=User)
+def drop_leaderboard_entries(sender, instance, **kwargs):
+    remove_student_entries(instance.pk)
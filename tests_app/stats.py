@@ -0,0 +1,60 @@
+"""
+StudentStats proyeksiyasini yangilash va qayta qurish.
+"""
+from django.db import transaction
+
+from .leaderboard import update_leaderboards
+from .models import Test, TestAttempt, StudentStats
+
+
+def record_finished_attempts(attempts):
+    """Yakunlangan urinishlarni o'quvchilar statistikasiga qo'shish.
+
+    finish_attempts tranzaksiyasi ichida chaqiriladi: o'quvchilar qatorlari
+    select_for_update bilan qulflanadi va bitta bulk_update bilan yoziladi,
+    so'ng shu qulf ostida reytinglar ham yangilanadi.
+    """
+    attempts = list(attempts)
+    if not attempts:
+        return
+    student_ids = {attempt.student_id for attempt in attempts}
+    subjects = dict(Test.objects.filter(
+        id__in={attempt.test_id for attempt in attempts}
+    ).values_list('id', 'subject'))
+
+    StudentStats.objects.bulk_create(
+        [StudentStats(student_id=student_id) for student_id in student_ids],
+        ignore_conflicts=True
+    )
+    stats_by_student = {
+        stats.student_id: stats
+        for stats in StudentStats.objects.select_for_update().filter(student_id__in=student_ids)
+    }
+    for attempt in attempts:
+        stats_by_student[attempt.student_id].add_attempt(attempt, subjects.get(attempt.test_id, ''))
+
+    StudentStats.objects.bulk_update(
+        stats_by_student.values(),
+        ['attempts_count', 'scored_count', 'percentage_sum', 'average_percentage',
+         'best_percentage', 'best_attempt', 'last_activity', 'subject_stats']
+    )
+    update_leaderboards(attempts, stats_by_student)
+
+
+def rebuild_student_stats(batch_size=1000):
+    """Barcha statistikani yakunlangan urinishlardan qaytadan qurish. Qatorlar sonini qaytaradi"""
+    stats_by_student = {}
+    attempts = TestAttempt.objects.filter(is_completed=True).select_related('test').only(
+        'id', 'student', 'finished_at', 'total_points', 'percentage', 'test__subject'
+    ).order_by('finished_at', 'id')
+
+    for attempt in attempts.iterator(chunk_size=batch_size):
+        stats = stats_by_student.get(attempt.student_id)
+        if stats is None:
+            stats = stats_by_student[attempt.student_id] = StudentStats(student_id=attempt.student_id)
+        stats.add_attempt(attempt, attempt.test.subject)
+
+    with transaction.atomic():
+        StudentStats.objects.all().delete()
+        StudentStats.objects.bulk_create(stats_by_student.values(), batch_size=batch_size)
+    return len(stats_by_student)
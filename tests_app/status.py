@@ -0,0 +1,121 @@
+"""
+Test holati keshi - polling endpoint'lari uchun.
+
+Imtihon paytida har bir mijoz bir necha soniyada server vaqti va pauza
+holatini so'raydi. Bu modul Test modelini to'liq yuklamasdan kerakli
+maydonlarni (grade, is_active, is_paused, paused_at, end_time, updated_at) keshdan
+qaytaradi. pause_test/resume_test va Test saqlanganda kesh yangilanadi.
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from mytest.caching import single_flight
+
+STATUS_CACHE_TIMEOUT = 60 * 60  # 1 soat
+# Kesh worker'lar orasida umumiy bo'lmasa (LocMemCache) bir worker'dagi pauza/davom
+# ettirish boshqalarida faqat muddat tugagach ko'rinadi - shuning uchun muddat qisqa
+LOCAL_STATUS_CACHE_TIMEOUT = 5
+INFO_CACHE_TIMEOUT = 60 * 60
+STATUS_FIELDS = ('id', 'grade', 'is_active', 'is_paused', 'paused_at', 'end_time', 'updated_at')
+
+CLOCK_TOKEN_SALT = 'tests_app.clock'
+CLOCK_TOKEN_MAX_AGE = 12 * 60 * 60  # 12 soat
+
+
+def _status_key(test_id):
+    return f'test_status:{test_id}'
+
+
+def status_cache_timeout():
+    if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        return LOCAL_STATUS_CACHE_TIMEOUT
+    return STATUS_CACHE_TIMEOUT
+
+
+def _status_from_test(test):
+    return {field: getattr(test, field) for field in STATUS_FIELDS}
+
+
+def get_test_status(test_id):
+    """Test holatini keshdan olish, bo'lmasa bitta values() so'rovi bilan to'ldirish"""
+    key = _status_key(test_id)
+    status = cache.get(key)
+    if status is None:
+        from .models import Test
+        status = Test.objects.filter(id=test_id).values(*STATUS_FIELDS).first()
+        if status is None:
+            return None
+        cache.set(key, status, status_cache_timeout())
+    return status
+
+
+async def aget_test_status(test_id):
+    """get_test_status ning async varianti (ASGI view'lar uchun)"""
+    key = _status_key(test_id)
+    status = await cache.aget(key)
+    if status is None:
+        from .models import Test
+        status = await Test.objects.filter(id=test_id).values(*STATUS_FIELDS).afirst()
+        if status is None:
+            return None
+        await cache.aset(key, status, status_cache_timeout())
+    return status
+
+
+def set_test_status(test):
+    """Saqlangan Test obyektidan keshni yangilash"""
+    status = _status_from_test(test)
+    cache.set(_status_key(test.id), status, status_cache_timeout())
+    return status
+
+
+def invalidate_test_status(test_id):
+    cache.delete(_status_key(test_id))
+
+
+def make_clock_token(attempt):
+    """Urinish uchun imzolangan token - sessiyasiz vaqt endpoint'i uchun"""
+    return signing.dumps({'a': attempt.id, 't': attempt.test_id}, salt=CLOCK_TOKEN_SALT, compress=True)
+
+
+def read_clock_token(token):
+    """Tokenni tekshirish. Yaroqsiz bo'lsa signing.BadSignature ko'tariladi"""
+    return signing.loads(token, salt=CLOCK_TOKEN_SALT, max_age=CLOCK_TOKEN_MAX_AGE)
+
+
+def refresh_test_statuses(test_ids):
+    """Bir nechta test holatini bitta so'rov bilan qayta o'qib keshga yozish (queryset.update() dan keyin)"""
+    from .models import Test
+    statuses = {
+        _status_key(status['id']): status
+        for status in Test.objects.filter(id__in=test_ids).values(*STATUS_FIELDS)
+    }
+    cache.set_many(statuses, status_cache_timeout())
+    return len(statuses)
+
+
+@single_flight('test', timeout=INFO_CACHE_TIMEOUT)
+def get_test_info(test_id):
+    """test_info_view uchun o'zgarmas ma'lumotlar (pauza holati bu yerda emas - get_test_status'dan).
+
+    Test topilmasa None.
+    """
+    from .models import Test
+    test = Test.objects.filter(id=test_id).select_related('created_by').first()
+    if test is None:
+        return None
+    return {
+        'title': test.title,
+        'description': test.description,
+        'subject': test.subject,
+        'grade': test.grade,
+        'created_by_id': test.created_by_id,
+        'time_limit': test.time_limit,
+        'max_attempts': test.max_attempts,
+        'total_questions': test.total_questions,
+        'created_by': test.created_by.get_full_name() or test.created_by.username,
+        'created_at': test.created_at.isoformat(),
+        'start_time': test.start_time.isoformat() if test.start_time else None,
+        'end_time': test.end_time.isoformat() if test.end_time else None,
+    }
@@ -1,3 +1,672 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+
+from . import control, grading
+from .control import pause_tests, resume_tests
+from .blueprints import BlueprintError, validate_blueprint
+from .checks import check_search_triggers
+from .grading import finish_attempt, finish_attempts
+from .leaderboard import (
+    SCORE_BUCKETS, class_scope, get_rank, get_top, grade_scope, rebuild_leaderboards,
+    subject_scope, update_leaderboards
+)
+from .management.commands.finish_expired_attempts import Command as FinishExpiredCommand
+from .models import (
+    Test, Question, Choice, TestAttempt, TestResult, TestRetakeRequest, ExamPaper, StudentStats, LeaderboardEntry,
+    LeaderboardScoreCount
+)
+from .papers import build_paper, generate_papers, get_question_index, paper_question_ids, paper_seed
+from .prewarm import precreate_attempts
+from .search import rebuild_search_index
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-shared',
+    },
+    'hot': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-hot',
+    },
+}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class ExamTestCase(TestCase):
+    """Umumiy yordamchilar: o'qituvchi, o'quvchi va savollari bor test"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['hot'].clear()
+        self.teacher = self.make_user('teacher', role='teacher')
+        self.student = self.make_user('student', role='student', grade=7)
+
+    def make_user(self, username, **fields):
+        return User.objects.create_user(
+            username=username, email=f'{username}@buxorobilimdonlar.uz', password='pw12345!',
+            first_name=username, last_name='Test', is_verified=True, **fields
+        )
+
+    def make_test(self, questions=5, **fields):
+        fields.setdefault('grade', 7)
+        test = Test.objects.create(
+            title='Test', subject='Matematika', created_by=self.teacher, time_limit=30, **fields
+        )
+        self.add_questions(test, questions)
+        return test
+
+    def add_questions(self, test, count, **fields):
+        questions = []
+        start = test.questions.count()
+        for number in range(start, start + count):
+            question = Question.objects.create(
+                test=test, question_text=f'Savol {number}', question_type='single_choice',
+                order=number + 1, **fields
+            )
+            Choice.objects.create(question=question, choice_text="to'g'ri", is_correct=True)
+            Choice.objects.create(question=question, choice_text="noto'g'ri", is_correct=False)
+            questions.append(question)
+        return questions
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def post_json(self, url, data=None):
+        return self.client.post(
+            url, json.dumps(data or {}), content_type='application/json', HTTP_ACCEPT='application/json'
+        )
+
+
+class FinishAttemptTests(ExamTestCase):
+    def test_second_finish_is_rejected(self):
+        test = self.make_test()
+        attempt = TestAttempt.objects.create(test=test, student=self.student)
+        stale = TestAttempt.objects.get(id=attempt.id)
+
+        self.assertIsNotNone(finish_attempt(attempt))
+        # Eski nusxa (boshqa so'rov yoki cron) is_completed=False ni ko'radi, lekin urinishni egallay olmaydi
+        self.assertIsNone(finish_attempt(stale))
+        self.assertEqual(TestResult.objects.filter(attempt=attempt).count(), 1)
+
+    def test_finish_view_twice(self):
+        test = self.make_test()
+        attempt = TestAttempt.objects.create(test=test, student=self.student)
+        self.login(self.student)
+
+        first = self.post_json(f'/tests/attempt/{attempt.id}/finish/')
+        second = self.post_json(f'/tests/attempt/{attempt.id}/finish/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second.json()['error'], 'Test already completed')
+        self.assertEqual(TestResult.objects.filter(attempt=attempt).count(), 1)
+
+    def test_concurrent_finish_grades_once(self):
+        test = self.make_test()
+        attempt = TestAttempt.objects.create(test=test, student=self.student)
+        stale = TestAttempt.objects.get(id=attempt.id)
+        grade_attempts = grading.grade_attempts
+        competing = []
+
+        def grade_while_racing(attempts):
+            # Birinchi chaqiruv baholayotganda ikkinchisi (cron) shu urinishni yakunlashga urinadi
+            if not competing:
+                competing.append(finish_attempt(stale))
+            return grade_attempts(attempts)
+
+        with mock.patch.object(grading, 'grade_attempts', side_effect=grade_while_racing):
+            result = finish_attempt(attempt)
+
+        self.assertIsNotNone(result)
+        self.assertEqual(competing, [None])
+        self.assertEqual(TestResult.objects.filter(attempt=attempt).count(), 1)
+
+
+    def test_batch_is_claimed_with_one_update(self):
+        test = self.make_test()
+        students = [self.make_user(f'student{i}', role='student', grade=7) for i in range(3)]
+        attempts = [TestAttempt.objects.create(test=test, student=student) for student in students]
+        finish_attempt(TestAttempt.objects.get(id=attempts[0].id))
+
+        with CaptureQueriesContext(connection) as queries:
+            results = finish_attempts(attempts)
+
+        # Oldin yakunlangan urinish qayta baholanmaydi; qolganlari bitta UPDATE bilan egallanadi
+        self.assertEqual(set(results), {attempts[1].id, attempts[2].id})
+        claims = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "tests_app_testattempt" SET "is_completed"')]
+        self.assertEqual(len(claims), 1)
+        self.assertEqual(TestResult.objects.filter(attempt__in=attempts).count(), 3)
+
+
+
+class StoredResultTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = self.make_test(questions=3)
+        self.attempt = TestAttempt.objects.create(test=self.test, student=self.student)
+        question = self.test.questions.first()
+        self.attempt.answers.create(question=question).selected_choices.set(question.choices.filter(is_correct=False))
+        finish_attempt(self.attempt)
+        self.login(self.student)
+
+    def fetch(self):
+        return self.client.get(f'/tests/{self.test.id}/results/', HTTP_ACCEPT='application/json')
+
+    def test_student_result_reads_stored_details(self):
+        self.fetch()  # sessiya va foydalanuvchi keshi isiydi
+
+        with mock.patch.object(grading, 'grade_attempts', wraps=grading.grade_attempts) as grade_attempts:
+            # test, urinish + natija (JOIN), reyting uchun 2 ta - javoblar va savollar o'qilmaydi
+            with self.assertNumQueries(4):
+                response = self.fetch()
+
+        grade_attempts.assert_not_called()
+        result = response.json()['result']
+        self.assertEqual(result['answered_count'], 1)
+        self.assertEqual(result['total_questions'], 3)
+        # Javobsiz savollar ham noto'g'ri ro'yxatida (javob: None)
+        self.assertEqual([question['answer'] for question in result['incorrect_questions']], ["noto'g'ri", None, None])
+
+    def test_missing_details_are_computed_once(self):
+        stored = TestResult.objects.get(attempt=self.attempt).details
+        TestResult.objects.filter(attempt=self.attempt).update(details={})
+
+        with mock.patch.object(grading, 'grade_attempts', wraps=grading.grade_attempts) as grade_attempts:
+            first = self.fetch().json()['result']
+            second = self.fetch().json()['result']
+
+        # Eski natija bir marta baholanib saqlanadi, keyingi so'rov saqlanganini o'qiydi
+        self.assertEqual(grade_attempts.call_count, 1)
+        self.assertEqual(TestResult.objects.get(attempt=self.attempt).details, stored)
+        self.assertEqual(first['incorrect_questions'], second['incorrect_questions'])
+        self.assertEqual(first['answered_count'], 1)
+
+class DeadlineTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = self.make_test()
+        self.login(self.student)
+        self.attempt = TestAttempt.objects.create(test=self.test, student=self.student)
+        self.question = self.test.questions.first()
+        # Vaqt 5 daqiqa oldin tugagan, finish_expired_attempts hali ishlamagan
+        self.deadline = timezone.now() - timedelta(minutes=5)
+        TestAttempt.objects.filter(id=self.attempt.id).update(deadline=self.deadline)
+
+    def submit(self):
+        return self.post_json(f'/tests/attempt/{self.attempt.id}/submit-answer/', {
+            'question_id': self.question.id, 'choice_ids': [self.question.choices.first().id]
+        })
+
+    def test_late_answer_is_rejected(self):
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.attempt.answers.exists())
+
+    def test_answer_allowed_while_paused(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pause_tests(Test.objects.filter(id=self.test.id))
+
+        self.assertEqual(self.submit().status_code, 200)
+
+    def test_expired_attempt_cannot_be_reopened(self):
+        response = self.post_json(f'/tests/{self.test.id}/take/')
+
+        self.assertEqual(response.status_code, 403)
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_completed)
+        self.assertEqual(self.attempt.finished_at, self.deadline)
+
+    def test_late_finish_is_capped_at_deadline(self):
+        response = self.post_json(f'/tests/attempt/{self.attempt.id}/finish/')
+
+        self.assertEqual(response.status_code, 200)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.finished_at, self.deadline)
+
+
+class ResumeTestsTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = self.make_test()
+        self.attempt = TestAttempt.objects.create(test=self.test, student=self.student)
+        self.deadline = self.attempt.deadline
+        pause_tests(Test.objects.filter(id=self.test.id))
+        # 10 daqiqa pauzada turgandek
+        Test.objects.filter(id=self.test.id).update(paused_at=timezone.now() - timedelta(minutes=10))
+
+    def extension(self):
+        self.attempt.refresh_from_db()
+        return self.attempt.deadline - self.deadline
+
+    def test_pause_time_is_added_once(self):
+        first = resume_tests(Test.objects.filter(id=self.test.id))
+        second = resume_tests(Test.objects.filter(id=self.test.id))
+
+        self.assertEqual(first['extended_attempts'], 1)
+        self.assertEqual(second['extended_attempts'], 0)
+        self.assertEqual(second['test_ids'], [])
+        self.assertAlmostEqual(self.extension().total_seconds(), 600, delta=5)
+
+    def test_concurrent_resume_extends_once(self):
+        extend_deadlines = control.extend_deadlines
+        competing = []
+
+        def extend_while_racing(*args):
+            # Bitta test davom ettirilayotganda sinf bo'yicha davom ettirish ham keladi
+            if not competing:
+                competing.append(resume_tests(Test.objects.filter(grade=7)))
+            return extend_deadlines(*args)
+
+        with mock.patch.object(control, 'extend_deadlines', side_effect=extend_while_racing):
+            result = resume_tests(Test.objects.filter(id=self.test.id))
+
+        self.assertEqual(result['extended_attempts'], 1)
+        self.assertEqual(competing[0]['extended_attempts'], 0)
+        self.assertAlmostEqual(self.extension().total_seconds(), 600, delta=5)
+
+    def test_extension_is_capped_by_end_time(self):
+        end_time = self.deadline + timedelta(minutes=3)
+        Test.objects.filter(id=self.test.id).update(end_time=end_time)
+
+        resume_tests(Test.objects.filter(id=self.test.id))
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.deadline, end_time)
+        test = Test.objects.get(id=self.test.id)
+        self.assertFalse(test.is_paused)
+        self.assertIsNone(test.paused_at)
+
+
+class LeaderboardTests(ExamTestCase):
+    def record(self, student, percentage, subject='Matematika'):
+        stats = StudentStats(
+            student=student, scored_count=1, average_percentage=percentage,
+            subject_stats={subject: {'count': 1, 'sum': percentage}}
+        )
+        update_leaderboards([], {student.id: stats})
+        StudentStats.objects.update_or_create(student=student, defaults={
+            'scored_count': 1, 'average_percentage': percentage, 'subject_stats': stats.subject_stats
+        })
+
+    def expected_rank(self, scope, student):
+        entries = LeaderboardEntry.objects.filter(scope=scope)
+        score = entries.get(student=student).score
+        return sum(round(other * 10) > round(score * 10) for other in entries.values_list('score', flat=True)) + 1
+
+    def test_rank_matches_entries(self):
+        students = [self.student] + [self.make_user(f's{n}', role='student', grade=7) for n in range(12)]
+        for n, student in enumerate(students):
+            self.record(student, (n * 37) % 101)
+        # Ball o'zgarishi eski savatdan ayiriladi
+        self.record(students[3], 100)
+        self.record(students[5], 100)
+
+        scope = grade_scope(7)
+        for student in students:
+            rank = get_rank(scope, student.id)
+            self.assertEqual(rank['total'], len(students))
+            self.assertEqual(rank['rank'], self.expected_rank(scope, student))
+        top = get_top(scope, 3)
+        self.assertEqual([entry['rank'] for entry in top], [1, 1, 3])
+
+    def test_rebuild_gives_same_counts(self):
+        for n in range(6):
+            self.record(self.make_user(f's{n}', role='student', grade=7, class_name='A'), n * 15)
+        before = set(LeaderboardScoreCount.objects.exclude(count=0).values_list('scope', 'node', 'count'))
+
+        rebuild_leaderboards()
+
+        after = set(LeaderboardScoreCount.objects.values_list('scope', 'node', 'count'))
+        self.assertEqual(before, after)
+
+    def test_subject_board_is_per_grade(self):
+        other = self.make_user('other', role='student', grade=8)
+        self.record(self.student, 80)
+        self.record(other, 90)
+
+        self.assertEqual(get_rank(subject_scope(7, 'Matematika'), self.student.id)['total'], 1)
+        self.login(self.student)
+        own = self.client.get('/tests/leaderboard/', {'type': 'subject', 'subject': 'Matematika'})
+        self.assertEqual([entry['student_id'] for entry in own.json()['top']], [self.student.id])
+        foreign = self.client.get('/tests/leaderboard/', {'type': 'subject', 'subject': 'Matematika', 'grade': 8})
+        self.assertEqual(foreign.status_code, 403)
+
+    def test_entries_follow_grade_and_class_change(self):
+        self.student.class_name = 'A'
+        self.student.save()
+        self.record(self.student, 70)
+
+        self.student.grade = 8
+        self.student.class_name = 'B'
+        self.student.save()
+
+        scopes = set(LeaderboardEntry.objects.filter(student=self.student).values_list('scope', flat=True))
+        self.assertEqual(scopes, {grade_scope(8), class_scope(8, 'B'), subject_scope(8, 'Matematika')})
+        self.assertIsNone(get_rank(grade_scope(7), self.student.id))
+        self.assertEqual(get_rank(grade_scope(8), self.student.id)['total'], 1)
+        self.assertEqual(
+            LeaderboardScoreCount.objects.filter(scope=grade_scope(7), node=SCORE_BUCKETS).get().count, 0
+        )
+
+    def test_deleted_student_leaves_board(self):
+        other = self.make_user('other', role='student', grade=7)
+        self.record(self.student, 60)
+        self.record(other, 40)
+
+        self.student.delete()
+
+        self.assertEqual(get_rank(grade_scope(7), other.id), {
+            'scope': grade_scope(7), 'rank': 1, 'total': 1, 'score': 40
+        })
+
+
+class ConditionalResponseTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = self.make_test()
+        self.login(self.student)
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_ACCEPT': 'application/json'}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(url, **headers)
+
+    def assert_revalidates(self, url, change):
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+        changed = self.get(url, etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(self.get(url, changed['ETag']).status_code, 304)
+
+    def test_info_changes_on_pause(self):
+        url = f'/tests/{self.test.id}/info/'
+        self.assert_revalidates(url, lambda: pause_tests(Test.objects.filter(id=self.test.id)))
+        self.assertTrue(self.get(url).json()['is_paused'])
+
+    def test_info_changes_on_new_question(self):
+        self.assert_revalidates(f'/tests/{self.test.id}/info/', lambda: self.add_questions(self.test, 1))
+
+    def test_list_changes_on_own_attempt(self):
+        self.assert_revalidates(
+            '/tests/', lambda: TestAttempt.objects.create(test=self.test, student=self.student)
+        )
+
+    def test_list_ignores_other_students(self):
+        response = self.get('/tests/')
+        other = self.make_user('other', role='student', grade=7)
+        with self.captureOnCommitCallbacks(execute=True):
+            TestAttempt.objects.create(test=self.test, student=other)
+        self.assertEqual(self.get('/tests/', response['ETag']).status_code, 304)
+
+    def test_result_changes_on_leaderboard(self):
+        attempt = TestAttempt.objects.create(test=self.test, student=self.student)
+        finish_attempt(attempt)
+        other = self.make_user('other', role='student', grade=7)
+        other_attempt = TestAttempt.objects.create(test=self.test, student=other)
+        self.assert_revalidates(f'/tests/{self.test.id}/results/', lambda: finish_attempt(other_attempt))
+
+
+class PrecreatedAttemptTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.make_user('admin', role='admin')
+        self.test = self.make_test()
+        precreate_attempts(self.test, [self.student.id])
+
+    def test_reopen_ignores_unstarted_attempt(self):
+        self.login(self.admin)
+        response = self.post_json(f'/tests/{self.test.id}/open-for-student/{self.student.id}/')
+        self.assertEqual(response.json()['attempt_number'], 1)
+
+    def test_management_ignores_unstarted_attempt(self):
+        self.login(self.admin)
+        response = self.client.get('/tests/student-management/')
+        row = next(row for row in response.context['student_test_data'] if row['student'] == self.student)
+        self.assertEqual(row['tests'][0]['attempts_count'], 0)
+        self.assertFalse(row['tests'][0]['can_retake'])
+
+    def test_unstarted_attempts_deleted_after_end(self):
+        other = self.make_user('other', role='student', grade=7)
+        started = TestAttempt.objects.create(test=self.test, student=other)
+        command = FinishExpiredCommand(stdout=StringIO())
+
+        command.run_once(100)
+        self.assertEqual(TestAttempt.objects.filter(test=self.test, is_started=False).count(), 1)
+
+        Test.objects.filter(id=self.test.id).update(end_time=timezone.now())
+        command.run_once(100)
+
+        self.assertFalse(TestAttempt.objects.filter(test=self.test, is_started=False).exists())
+        started.refresh_from_db()
+        self.assertTrue(started.is_completed)
+
+
+class PaperTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = self.make_test(questions=60)
+
+    def start(self):
+        self.login(self.student)
+        response = self.post_json(f'/tests/{self.test.id}/take/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def answer_correctly(self, attempt_id, questions):
+        correct = dict(Choice.objects.filter(
+            question_id__in=[question['id'] for question in questions], is_correct=True
+        ).values_list('question_id', 'id'))
+        for question in questions:
+            self.post_json(f'/tests/attempt/{attempt_id}/submit-answer/', {
+                'question_id': question['id'], 'choice_ids': [correct[question['id']]]
+            })
+
+    def test_papers_only_for_eligible_students(self):
+        self.make_user('inactive', role='student', grade=7, is_active=False)
+        unverified = self.make_user('unverified', role='student', grade=7)
+        User.objects.filter(id=unverified.id).update(is_verified=False)
+
+        # prewarm bilan bir xil ro'yxat: faol va tasdiqlangan o'quvchilar
+        self.assertEqual(generate_papers(self.test, processes=1), 1)
+        self.assertEqual(list(ExamPaper.objects.values_list('student_id', flat=True)), [self.student.id])
+
+    def test_paper_is_a_function_of_the_seed(self):
+        seed = paper_seed(self.test.id, self.student.id)
+        first = build_paper(seed, self.test.id)
+        caches['hot'].clear()
+        caches['default'].clear()
+
+        self.assertEqual(build_paper(seed, self.test.id), first)
+        self.assertEqual(len(first), 50)
+        self.assertNotEqual(build_paper(seed + 1, self.test.id), first)
+
+    def test_reopened_paper_keeps_order(self):
+        first = self.start()
+        second = self.start()
+
+        self.assertEqual(second['attempt_id'], first['attempt_id'])
+        self.assertEqual(second['questions'], first['questions'])
+
+    def test_grading_and_review_survive_bank_edits(self):
+        data = self.start()
+        shown = [question['id'] for question in data['questions']]
+        self.answer_correctly(data['attempt_id'], data['questions'])
+
+        # Imtihon davomida bankka 40 ta savol qo'shiladi
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_questions(self.test, 40)
+        self.assertNotEqual(
+            paper_question_ids(paper_seed(self.test.id, self.student.id), get_question_index(self.test.id)), shown
+        )
+        self.assertEqual([question['id'] for question in self.start()['questions']], shown)
+
+        finished = self.post_json(f'/tests/attempt/{data["attempt_id"]}/finish/')
+        self.assertEqual(finished.status_code, 200)
+        attempt = TestAttempt.objects.get(id=data['attempt_id'])
+        self.assertEqual((attempt.score, attempt.total_points), (50, 50))
+
+        self.login(self.teacher)
+        review = self.client.get(f'/tests/attempt/{attempt.id}/review/').json()['questions']
+        self.assertEqual([question['id'] for question in review], shown)
+        self.assertTrue(all(question['is_correct'] for question in review))
+
+
+
+class RetakeRequestsViewTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = self.make_test(questions=1)
+        other_test = self.make_test(questions=1)
+        for index, (test, grade, class_name, status) in enumerate([
+            (self.test, 7, 'A', 'pending'),
+            (self.test, 7, 'B', 'approved'),
+            (self.test, 8, 'A', 'rejected'),
+            (other_test, 7, 'A', 'pending'),
+        ]):
+            student = self.make_user(f'pupil{index}', role='student', grade=grade, class_name=class_name)
+            attempt = TestAttempt.objects.create(test=test, student=student, is_completed=True)
+            TestRetakeRequest.objects.create(student=student, test=test, previous_attempt=attempt, status=status)
+        self.login(self.teacher)
+
+    def fetch(self, **params):
+        return self.client.get('/tests/retake-requests/', params, HTTP_ACCEPT='application/json')
+
+    def test_filters_are_applied_on_server(self):
+        data = self.fetch(test=self.test.id, grade=7).json()
+
+        self.assertEqual(data['status_counts'], {'pending': 1, 'approved': 1, 'rejected': 0})
+        self.assertEqual(data['total_count'], 2)
+
+        data = self.fetch(test=self.test.id, status='approved', class_name='B').json()
+        self.assertEqual([request['student_username'] for request in data['requests']], ['pupil1'])
+
+        data = self.fetch(search='pupil2').json()
+        self.assertEqual([request['student_username'] for request in data['requests']], ['pupil2'])
+
+    def test_invalid_filter_is_bad_request(self):
+        for params in ({'test': 'abc'}, {'grade': '7a'}, {'status': 'unknown'}):
+            response = self.fetch(**params)
+            self.assertEqual(response.status_code, 400)
+            self.assertNotIn('detail', response.json())
+
+class BlueprintTests(TestCase):
+    BLUEPRINT = {
+        'strata': [
+            {'topic': 'Kasrlar', 'difficulty': 1, 'count': 10},
+            {'topic': 'Geometriya', 'count': 5},
+            {'difficulty': 3, 'count': 5},
+        ],
+        'points': {'min': 30, 'max': 32},
+    }
+
+    def setUp(self):
+        # 3 mavzu x 3 qiyinlik, har birida 20 ta savol; qiyin savollar 2 ball
+        self.groups = {}
+        self.meta = {}
+        next_id = 1
+        for topic in ('Kasrlar', 'Geometriya', 'Algebra'):
+            for difficulty in (1, 2, 3):
+                items = []
+                for _ in range(20):
+                    points = 2 if difficulty == 3 else 1
+                    items.append((next_id, points))
+                    self.meta[next_id] = (topic, difficulty, points)
+                    next_id += 1
+                self.groups[(topic, difficulty)] = items
+
+    def select(self, seed, blueprint=None):
+        return paper_question_ids(seed, {
+            'blueprint': validate_blueprint(blueprint or self.BLUEPRINT), 'groups': self.groups
+        })
+
+    def test_strata_counts_and_points(self):
+        for seed in range(20):
+            ids = self.select(seed)
+            meta = [self.meta[question_id] for question_id in ids]
+            self.assertEqual(len(set(ids)), 20)
+            self.assertEqual(sum(1 for topic, difficulty, _ in meta if (topic, difficulty) == ('Kasrlar', 1)), 10)
+            self.assertEqual(sum(1 for topic, _, _ in meta if topic == 'Geometriya'), 5)
+            self.assertGreaterEqual(sum(1 for _, difficulty, _ in meta if difficulty == 3), 5)
+            self.assertTrue(30 <= sum(points for _, _, points in meta) <= 32)
+
+    def test_selection_is_a_function_of_the_seed(self):
+        self.assertEqual(self.select(7), self.select(7))
+        self.assertNotEqual(self.select(7), self.select(8))
+
+    def test_short_stratum_takes_what_exists(self):
+        ids = self.select(3, {'strata': [{'topic': 'Algebra', 'difficulty': 2, 'count': 50}]})
+        self.assertEqual(sorted(ids), [question_id for question_id, _ in self.groups[('Algebra', 2)]])
+
+    def test_invalid_blueprints(self):
+        for blueprint in (
+            {'strata': []},
+            {'strata': [{'count': 0}]},
+            {'strata': [{'difficulty': 4, 'count': 1}]},
+            {'strata': [{'count': 1}], 'points': {'min': 10, 'max': 5}},
+        ):
+            with self.assertRaises(BlueprintError):
+                validate_blueprint(blueprint)
+
+
+class BlueprintPaperTests(ExamTestCase):
+    def test_paper_follows_test_blueprint(self):
+        test = self.make_test(questions=0, blueprint={'strata': [{'topic': 'Kasrlar', 'count': 3}, {'count': 2}]})
+        self.add_questions(test, 10, topic='Kasrlar')
+        self.add_questions(test, 10, topic='Algebra')
+
+        paper = build_paper(paper_seed(test.id, self.student.id), test.id)
+
+        topics = Question.objects.filter(id__in=[question['id'] for question in paper]).values_list('topic', flat=True)
+        self.assertEqual(len(paper), 5)
+        self.assertEqual(list(topics).count('Kasrlar'), 3)
+
+
+class SearchIndexCheckTests(TestCase):
+    def test_triggers_installed_by_migration(self):
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+
+    def test_missing_trigger_is_reported(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite triggerlari')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER tests_app_choice_fts_ai')
+
+        messages = check_search_triggers(None, databases=['default'])
+
+        self.assertEqual([message.id for message in messages], ['tests_app.W001'])
+        self.assertIn('tests_app_choice_fts_ai', messages[0].msg)
+        rebuild_search_index(connection)
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+
+
+class ImportTimeTests(TestCase):
+    def test_worker_boot_within_budget(self):
+        # Buyruq ilovani alohida jarayonda (python -X importtime) yuklaydi:
+        # og'ir modullar (openpyxl) ishga tushishda yuklanmaydi, vaqt byudjet ichida
+        out = StringIO()
+        call_command('check_import_time', stdout=out)
+
+        self.assertIn('Import vaqti byudjet ichida', out.getvalue())
@@ -1,19 +1,29 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# ASGI profilida imtihonning issiq yo'li async view'lar orqali
+if settings.ASYNC_EXAM_VIEWS:
+    from . import async_views as exam_views
+else:
+    exam_views = views
+
 app_name = 'tests'
 
 urlpatterns = [
     path('', views.test_list_view, name='tests'),
     path('create/', views.create_test_view, name='create_test'),
     path('<int:test_id>/edit/', views.edit_test_view, name='edit_test'),
+    path('questions/search/', views.question_search_view, name='question_search'),
     path('<int:test_id>/take/', views.take_test_view, name='take_test'),
-    path('attempt/<int:attempt_id>/submit-answer/', views.submit_answer, name='submit_answer'),
+    path('attempt/<int:attempt_id>/submit-answer/', exam_views.submit_answer, name='submit_answer'),
     path('attempt/<int:attempt_id>/finish/', views.finish_test, name='finish_test'),
+    path('attempt/<int:attempt_id>/review/', views.attempt_review_view, name='attempt_review'),
     path('<int:test_id>/results/', views.test_results_view, name='test_results'),
-    path('<int:test_id>/info/', views.test_info_view, name='test_info'),
+    path('<int:test_id>/info/', exam_views.test_info_view, name='test_info'),
     path('<int:test_id>/export/', views.export_results, name='export_results'),
     path('<int:test_id>/upload-questions/', views.upload_questions, name='upload_questions'),
+    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
     path('all-results/', views.all_results_view, name='all_results'),
     path('<int:test_id>/request-retake/', views.request_retake_view, name='request_retake'),
     path('retake-requests/', views.retake_requests_view, name='retake_requests'),
@@ -23,6 +33,11 @@ urlpatterns = [
     path('<int:test_id>/control/', views.test_control_view, name='test_control'),
     path('<int:test_id>/pause/', views.pause_test, name='pause_test'),
     path('<int:test_id>/resume/', views.resume_test, name='resume_test'),
-    path('<int:test_id>/time/', views.test_time_view, name='test_time'),
+    path('bulk-control/', views.bulk_test_control, name='bulk_test_control'),
+    path('<int:test_id>/time/', exam_views.test_time_view, name='test_time'),
+    path('clock/', views.test_clock_view, name='test_clock'),
     path('monitor/', views.monitor_view, name='monitor'),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_EXAM_VIEWS:
+    urlpatterns.append(path('clock/stream/', exam_views.test_status_stream, name='test_status_stream'))
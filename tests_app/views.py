@@ -1,16 +1,42 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.db import transaction
 from django.core.paginator import Paginator
+from django.core import signing
+from django.db.models import Count, Q
+from datetime import datetime, timedelta, timezone as dt_timezone
 import json
 import random
 from .models import Test, Question, Choice, TestAttempt, Answer, TestResult, TestRetakeRequest
+from .status import get_test_status, get_test_info, make_clock_token, read_clock_token
+from .papers import attempt_paper, paper_seed
+from .blueprints import BlueprintError, validate_blueprint
+from .search import search_question_ids, load_search_results, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+from .conditional import make_etag, finalize_response, not_modified_response
+from .signals import ALL
+from mytest.caching import get_version, get_versions
+from .control import pause_tests, resume_tests
+from .grading import finish_attempt, get_result_details, review_attempt
+from .writes import AnswerWrite, save_answer
+from .leaderboard import (
+    get_rank, get_top, test_scope, grade_scope, class_scope, subject_scope,
+    LEADERBOARD_LIMIT, LEADERBOARD_MAX_LIMIT
+)
 from accounts.models import User
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Polling endpoint'lari uchun Cache-Control: pauza va ro'yxat o'zgarishlari darhol
+# ko'rinishi kerak (har safar ETag bilan tekshiriladi), natija esa deyarli o'zgarmaydi
+INFO_CACHE_CONTROL = {'no_cache': True}
+LIST_CACHE_CONTROL = {'no_cache': True}
+MONITOR_CACHE_CONTROL = {'no_cache': True}
+RESULT_CACHE_CONTROL = {'max_age': 60}
 
 @login_required
 @require_http_methods(["POST"])
@@ -21,23 +47,18 @@ def pause_test(request, test_id):
     
     try:
         test = get_object_or_404(Test, id=test_id)
-        # Migration qo'llanmagan bo'lsa ham ishlashi uchun
-        if hasattr(test, 'is_paused'):
-            test.is_paused = True
-            if hasattr(test, 'paused_at'):
-                test.paused_at = timezone.now()
-            test.save()
-            
-            return JsonResponse({
-                'success': True,
-                'message': 'Test pauza qilindi',
-                'is_paused': True,
-                'paused_at': test.paused_at.isoformat() if hasattr(test, 'paused_at') and test.paused_at else None
-            })
-        else:
-            return JsonResponse({
-                'error': 'Migration qo\'llanmagan. Migrationni ishga tushiring: python manage.py migrate tests_app'
-            }, status=500)
+        # Allaqachon pauzada bo'lsa paused_at o'zgarmaydi (pauza vaqti yo'qolmasligi uchun)
+        pause_tests(Test.objects.filter(id=test.id))
+        test.refresh_from_db(fields=['is_paused', 'paused_at'])
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Test pauza qilindi',
+            'is_paused': True,
+            'paused_at': test.paused_at.isoformat() if test.paused_at else None
+        })
+    except Http404:
+        raise
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -53,26 +74,81 @@ def resume_test(request, test_id):
     
     try:
         test = get_object_or_404(Test, id=test_id)
-        # Migration qo'llanmagan bo'lsa ham ishlashi uchun
-        if hasattr(test, 'is_paused'):
-            test.is_paused = False
-            if hasattr(test, 'paused_at'):
-                test.paused_at = None
-            test.save()
-            
+        # Pauzada o'tgan vaqt barcha faol urinishlarning deadline'iga qo'shiladi
+        result = resume_tests(Test.objects.filter(id=test.id))
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Test davom ettirildi',
+            'is_paused': False,
+            'paused_seconds': result['paused_seconds'].get(test.id, 0),
+            'extended_attempts': result['extended_attempts']
+        })
+    except Http404:
+        raise
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f'Error in resume_test: {str(e)}', exc_info=True)
+        return JsonResponse({'error': str(e)}, status=500)
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_test_control(request):
+    """Bir nechta testni birdaniga pauza qilish yoki davom ettirish - Admin uchun
+    
+    JSON: {"action": "pause"|"resume", "grade": 7, "subject": "...", "test_ids": [...], "all": true}
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        action = data.get('action')
+        if action not in ['pause', 'resume']:
+            return JsonResponse({'error': 'Noto\'g\'ri harakat'}, status=400)
+        
+        tests = Test.objects.filter(is_active=True)
+        has_filter = False
+        if data.get('grade'):
+            tests = tests.filter(grade=int(data['grade']))
+            has_filter = True
+        if data.get('subject'):
+            tests = tests.filter(subject=data['subject'])
+            has_filter = True
+        if data.get('test_ids'):
+            tests = tests.filter(id__in=[int(test_id) for test_id in data['test_ids']])
+            has_filter = True
+        
+        # Tasodifan barcha testlarni to'xtatib qo'ymaslik uchun filtr yoki "all" majburiy
+        if not has_filter and not data.get('all'):
+            return JsonResponse({'error': 'grade, subject, test_ids yoki all ko\'rsatilishi kerak'}, status=400)
+        
+        if action == 'pause':
+            result = pause_tests(tests)
             return JsonResponse({
                 'success': True,
-                'message': 'Test davom ettirildi',
-                'is_paused': False
+                'action': 'pause',
+                'tests_affected': result['tests'],
+                'active_attempts': result['active_attempts'],
+                'test_ids': result['test_ids'],
+                'paused_at': result['paused_at'].isoformat()
             })
-        else:
-            return JsonResponse({
-                'error': 'Migration qo\'llanmagan. Migrationni ishga tushiring: python manage.py migrate tests_app'
-            }, status=500)
+        
+        result = resume_tests(tests)
+        return JsonResponse({
+            'success': True,
+            'action': 'resume',
+            'tests_affected': result['tests'],
+            'extended_attempts': result['extended_attempts'],
+            'test_ids': result['test_ids']
+        })
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f'Error in resume_test: {str(e)}', exc_info=True)
+        logger.error(f'Error in bulk_test_control: {str(e)}', exc_info=True)
         return JsonResponse({'error': str(e)}, status=500)
 
 @login_required
@@ -86,7 +162,8 @@ def test_control_view(request, test_id):
     # Test yechayotgan o'quvchilar
     active_attempts = TestAttempt.objects.filter(
         test=test,
-        is_completed=False
+        is_completed=False,
+        is_started=True
     ).select_related('student').order_by('-started_at')
     
     attempts_data = []
@@ -132,22 +209,59 @@ def test_control_view(request, test_id):
 @login_required
 def test_time_view(request, test_id):
     """Server vaqtini qaytarish - Test vaqtini hisoblash uchun"""
-    test = get_object_or_404(Test, id=test_id)
+    return test_time_response(request.user, get_test_status(test_id))
+
+def test_time_response(user, status):
+    """test_time_view javobi - sinxron va async view'lar uchun umumiy"""
+    if status is None:
+        raise Http404('Test topilmadi')
     
     # O'quvchi faqat o'z testi uchun vaqtni olishi mumkin
-    if request.user.role == 'student':
-        if test.grade != request.user.grade:
+    if user.role == 'student':
+        if status['grade'] != user.grade:
             return JsonResponse({'error': 'Access denied'}, status=403)
     
-    # Migration qo'llanmagan bo'lsa ham ishlashi uchun
-    is_paused = getattr(test, 'is_paused', False)
-    
     return JsonResponse({
         'server_time': timezone.now().isoformat(),
-        'test_id': test.id,
-        'is_paused': is_paused
+        'test_id': status['id'],
+        'is_paused': status['is_paused']
     })
 
+def clock_data(status):
+    """Test holati keshidan vaqt va pauza ma'lumotlari (clock endpoint'i va holat oqimi uchun)"""
+    return {
+        'server_time': timezone.now().isoformat(),
+        'test_id': status['id'],
+        'is_paused': status['is_paused'],
+        'paused_at': status['paused_at'].isoformat() if status['paused_at'] else None,
+        'end_time': status['end_time'].isoformat() if status['end_time'] else None
+    }
+
+def test_clock_view(request):
+    """Yengil vaqt va holat endpoint'i - imzolangan urinish tokeni bilan.
+    
+    Sessiya va foydalanuvchi yuklanmaydi (request.user/request.session
+    ishlatilmaydi), Test holati keshdan olinadi.
+    """
+    token = request.GET.get('token', '')
+    try:
+        payload = read_clock_token(token)
+    except signing.BadSignature:
+        return JsonResponse({'error': 'Invalid token'}, status=403)
+    
+    status = get_test_status(payload['t'])
+    if status is None:
+        return JsonResponse({'error': 'Test topilmadi'}, status=404)
+    
+    data = clock_data(status)
+    
+    # Deadline faqat so'ralganda o'qiladi (boshlanishda va pauzadan keyin)
+    if request.GET.get('with_deadline'):
+        deadline = TestAttempt.objects.filter(id=payload['a']).values_list('deadline', flat=True).first()
+        data['deadline'] = deadline.isoformat() if deadline else None
+    
+    return JsonResponse(data)
+
 @login_required
 def monitor_view(request):
     """Test monitoring sahifasi - Admin uchun barcha testlarni nazorat qilish"""
@@ -157,6 +271,12 @@ def monitor_view(request):
     if request.method == 'GET' and request.headers.get('Accept') == 'application/json':
         from django.db import connection
         
+        # Testlar (pauza ham) yoki istalgan urinish o'zgarmagan bo'lsa 304
+        etag = make_etag('monitor', *get_versions([('tests', ALL), ('attempts', ALL)]))
+        response = not_modified_response(request, etag, **MONITOR_CACHE_CONTROL)
+        if response is not None:
+            return response
+        
         try:
             # Raw SQL yordamida test ID'larni olish
             test_ids = []
@@ -185,7 +305,8 @@ def monitor_view(request):
                     # Faol urinishlar (yechilayotgan testlar)
                     active_attempts = TestAttempt.objects.filter(
                         test=test,
-                        is_completed=False
+                        is_completed=False,
+                        is_started=True
                     ).count()
                     
                     # Tugallangan urinishlar
@@ -221,10 +342,10 @@ def monitor_view(request):
                     logger.error(f'Error processing test {test.id} in monitor_view: {str(e)}')
                     continue
             
-            return JsonResponse({
+            return finalize_response(JsonResponse({
                 'tests': tests_data,
                 'total_tests': len(tests_data)
-            })
+            }), etag, **MONITOR_CACHE_CONTROL)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -242,6 +363,16 @@ def test_list_view(request):
     if request.method == 'GET' and request.headers.get('Accept') == 'application/json':
         from django.db import connection
         
+        # ETag: testlar ro'yxati versiyasi + o'quvchining o'z urinishlari (o'qituvchi/admin uchun - barcha urinishlar)
+        if request.user.role == 'student':
+            list_versions = get_versions([('tests', ALL), ('student', request.user.id)])
+        else:
+            list_versions = get_versions([('tests', ALL), ('attempts', ALL)])
+        etag = make_etag('list', request.user.id, request.user.role, request.user.grade, *list_versions)
+        response = not_modified_response(request, etag, **LIST_CACHE_CONTROL)
+        if response is not None:
+            return response
+        
         if request.user.role == 'student':
             try:
                 # Raw SQL yordamida test ID'larni olish (is_paused maydonini tekshirmaslik uchun)
@@ -290,7 +421,7 @@ def test_list_view(request):
                             'time_limit': test.time_limit,
                             'max_attempts': test.max_attempts,
                             'total_questions': test.total_questions,
-                            'has_attempted': attempt is not None,
+                            'has_attempted': attempt is not None and attempt.is_started,
                             'attempt_score': round(attempt.percentage, 1) if attempt and attempt.is_completed else None,
                             'can_attempt': (attempt is None or not attempt.is_completed) and test.is_active,
                             'created_by': test.created_by.get_full_name() if test.created_by and hasattr(test.created_by, 'get_full_name') else (test.created_by.username if test.created_by else 'Noma\'lum'),
@@ -308,10 +439,10 @@ def test_list_view(request):
                 logger = logging.getLogger(__name__)
                 logger.info(f'Student test_list_view: Found {len(test_data)} tests for grade {student_grade}')
                 
-                return JsonResponse({
+                return finalize_response(JsonResponse({
                     'tests': test_data,
                     'user_role': 'student'
-                })
+                }), etag, **LIST_CACHE_CONTROL)
             except Exception as e:
                 import logging
                 logger = logging.getLogger(__name__)
@@ -371,10 +502,10 @@ def test_list_view(request):
                         logger.error(f'Error processing test {test.id}: {str(e)}')
                         continue
                 
-                return JsonResponse({
+                return finalize_response(JsonResponse({
                     'tests': test_data,
                     'user_role': 'teacher'
-                })
+                }), etag, **LIST_CACHE_CONTROL)
             except Exception as e:
                 import logging
                 logger = logging.getLogger(__name__)
@@ -436,10 +567,10 @@ def test_list_view(request):
                 logger = logging.getLogger(__name__)
                 logger.info(f'Admin test_list_view: Found {len(test_data)} tests')
                 
-                return JsonResponse({
+                return finalize_response(JsonResponse({
                     'tests': test_data,
                     'user_role': 'admin'
-                })
+                }), etag, **LIST_CACHE_CONTROL)
             except Exception as e:
                 import logging
                 logger = logging.getLogger(__name__)
@@ -556,7 +687,9 @@ def create_test(request):
                         question_type=q_data['question_type'],
                         points=float(q_data.get('points', 1.0)),
                         order=i + 1,
-                        explanation=q_data.get('explanation', '')
+                        explanation=q_data.get('explanation', ''),
+                        topic=q_data.get('topic') or '',
+                        difficulty=int(q_data.get('difficulty', 2))
                     )
                     
                     # Base64 rasm yuklash (JSON formatida)
@@ -630,49 +763,36 @@ def take_test_view(request, test_id):
             attempt = TestAttempt.objects.create(test=test, student=request.user)
         else:
             attempt = existing_attempt
-        
-        # Barcha savollarni olish
-        all_questions = list(test.questions.all())
-        
-        # Agar 50 dan ko'p savol bo'lsa, random 50 tasini tanlab olish
-        MAX_QUESTIONS = 50
-        if len(all_questions) > MAX_QUESTIONS:
-            # Random 50 ta savolni tanlab olish (har safar turli savollar)
-            selected_questions = random.sample(all_questions, MAX_QUESTIONS)
-        else:
-            selected_questions = all_questions
-        
-        # Savollarni HAR DOIM aralashtirish (avtomatik)
-        random.shuffle(selected_questions)
-        
-        questions_data = []
-        for question in selected_questions:
-            q_data = {
-                'id': question.id,
-                'question_text': question.question_text,
-                'question_type': question.question_type,
-                'points': question.points,
-                'image_url': question.image.url if question.image else None
-            }
-            
-            if question.question_type in ['single_choice', 'multiple_choice']:
-                # Variantlarni olish va HAR DOIM aralashtirish (har safar turli tartibda)
-                choices = list(question.choices.all())
-                random.shuffle(choices)  # Variantlarni avtomatik aralashtirish
-                
-                q_data['choices'] = [{
-                    'id': choice.id,
-                    'text': choice.choice_text
-                } for choice in choices]
-            
-            questions_data.append(q_data)
+            # prewarm_exams oldindan yaratgan urinish - vaqt hozirdan boshlanadi
+            if not attempt.is_started:
+                attempt.start()
+            # Vaqti tugagan urinish qayta ochilmaydi - finish_expired_attempts kutilmasdan shu yerda yakunlanadi
+            elif attempt.is_past_deadline():
+                finish_attempt(attempt, finished_at=attempt.finish_time())
+                return JsonResponse({'error': 'Test vaqti tugagan'}, status=403)
+        
+        # Urug'siz eski urinish - varaqa qayta ochilganda ham o'zgarmasligi uchun urug' beriladi
+        if attempt.seed is None:
+            attempt.seed = paper_seed(test.id, request.user.id, attempt.attempt_number)
+            if not TestAttempt.objects.filter(id=attempt.id, seed__isnull=True).update(seed=attempt.seed):
+                attempt.refresh_from_db(fields=['seed'])
+        
+        # Savollar banki test versiyasi bo'yicha keshlanadi (bir vaqtda boshlaganlar uchun bitta qurish).
+        # Varaqa birinchi ochilishda urug'dan quriladi (oldindan yaratilgan bo'lsa bitta qator
+        # o'qiladi) va urinishga yoziladi: sahifa qayta ochilsa ham, bank o'zgarsa ham o'quvchi
+        # aynan o'sha savollarni o'sha tartibda ko'radi
+        questions_data = attempt_paper(attempt)
         
         return JsonResponse({
             'attempt_id': attempt.id,
             'questions': questions_data,
             'time_limit': test.time_limit,
             'started_at': attempt.started_at.isoformat(),
-            'server_time': timezone.now().isoformat()
+            'deadline': attempt.deadline.isoformat() if attempt.deadline else None,
+            'server_time': timezone.now().isoformat(),
+            'clock_token': make_clock_token(attempt),
+            # ASGI profilida pauza holati polling o'rniga SSE oqimi orqali keladi
+            'status_stream_url': reverse('tests:test_status_stream') if settings.ASYNC_EXAM_VIEWS else None
         })
     
     # GET request uchun server vaqtini qaytarish
@@ -696,27 +816,21 @@ def submit_answer(request, attempt_id):
         
         if attempt.is_completed:
             return JsonResponse({'error': 'Test already completed'}, status=400)
+        if not attempt.is_started:
+            return JsonResponse({'error': 'Test has not started yet'}, status=400)
+        status = get_test_status(attempt.test_id)
+        if attempt.is_past_deadline(is_paused=bool(status and status['is_paused'])):
+            return JsonResponse({'error': 'Test vaqti tugagan'}, status=403)
         
         question_id = data.get('question_id')
-        question = get_object_or_404(Question, id=question_id, test=attempt.test)
-        
-        answer, created = Answer.objects.get_or_create(
-            attempt=attempt,
-            question=question
-        )
-        
-        answer.selected_choices.clear()
-        answer.text_answer = ''
+        question = get_object_or_404(Question, id=question_id, test_id=attempt.test_id)
         
+        # Javob bitta qisqa tranzaksiyada yoziladi (SQLite tuned rejimida boshqa so'rovlar bilan guruhlab)
         if question.question_type == 'text_answer':
-            answer.text_answer = data.get('text_answer', '')
+            write = AnswerWrite(attempt.id, question.id, text_answer=data.get('text_answer', ''))
         else:
-            choice_ids = data.get('choice_ids', [])
-            if choice_ids:
-                choices = Choice.objects.filter(id__in=choice_ids, question=question)
-                answer.selected_choices.set(choices)
-        
-        answer.save()
+            write = AnswerWrite(attempt.id, question.id, choice_ids=[int(choice_id) for choice_id in data.get('choice_ids', [])])
+        save_answer(write)
         
         return JsonResponse({'message': 'Answer saved'})
         
@@ -733,62 +847,14 @@ def finish_test(request, attempt_id):
         return JsonResponse({'error': 'Access denied'}, status=403)
     
     try:
-        attempt = get_object_or_404(TestAttempt, id=attempt_id, student=request.user)
+        attempt = get_object_or_404(TestAttempt.objects.select_related('test'), id=attempt_id, student=request.user)
         
         if attempt.is_completed:
             return JsonResponse({'error': 'Test already completed'}, status=400)
         
-        attempt.finished_at = timezone.now()
-        attempt.is_completed = True
-        attempt.time_taken = attempt.finished_at - attempt.started_at
-        
-        results = attempt.calculate_score()
-        
-        correct_answers = 0
-        incorrect_answers = 0
-        unanswered = 0
-        
-        # Faqat tanlangan savollarni tekshirish (Answer modelida saqlangan savollar)
-        answered_questions = Answer.objects.filter(attempt=attempt).select_related('question')
-        answered_question_ids = set(answer.question_id for answer in answered_questions)
-        
-        # Barcha test savollarini olish
-        all_test_questions_count = attempt.test.questions.count()
-        
-        # Agar 50 dan ko'p savol bo'lsa, faqat javob berilgan savollarni tekshirish
-        # Aks holda barcha savollarni tekshirish
-        if all_test_questions_count > 50:
-            # Faqat javob berilgan savollarni tekshirish
-            for answer in answered_questions:
-                if answer.is_correct():
-                    correct_answers += 1
-                else:
-                    incorrect_answers += 1
-            
-            # Javob berilmagan savollar soni (faqat tanlangan 50 ta savoldan)
-            unanswered = 50 - len(answered_question_ids)
-        else:
-            # Barcha savollarni tekshirish
-            for question in attempt.test.questions.all():
-                answer = Answer.objects.filter(attempt=attempt, question=question).first()
-                if answer:
-                    if answer.is_correct():
-                        correct_answers += 1
-                    else:
-                        incorrect_answers += 1
-                else:
-                    unanswered += 1
-        
-        test_result = TestResult.objects.create(
-            attempt=attempt,
-            correct_answers=correct_answers,
-            incorrect_answers=incorrect_answers,
-            unanswered=unanswered
-        )
-        test_result.grade = test_result.calculate_grade()
-        test_result.save()
-        
-        attempt.save()
+        results = finish_attempt(attempt, finished_at=attempt.finish_time(is_paused=attempt.test.is_paused))
+        if results is None:
+            return JsonResponse({'error': 'Test already completed'}, status=400)
         
         completion_message = "Test yakunlandi!"
         if results.get('all_answered', False):
@@ -802,11 +868,11 @@ def finish_test(request, attempt_id):
                 'score': results['score'],
                 'total_points': results['total_points'],
                 'percentage': results['percentage'],
-                'grade': test_result.grade,
-                'correct_answers': correct_answers,
-                'incorrect_answers': incorrect_answers,
-                'unanswered': unanswered,
-                'time_taken': str(attempt.time_taken),
+                'grade': results['grade'],
+                'correct_answers': results['correct_answers'],
+                'incorrect_answers': results['incorrect_answers'],
+                'unanswered': results['unanswered'],
+                'time_taken': str(results['time_taken']),
                 'all_answered': results.get('all_answered', False),
                 'answered_count': results.get('answered_count', 0),
                 'total_questions': results.get('total_questions', 0),
@@ -827,11 +893,21 @@ def test_results_view(request, test_id):
             if test.grade != request.user.grade:
                 return JsonResponse({'error': 'Access denied'}, status=403)
             
-            attempt = TestAttempt.objects.filter(test=test, student=request.user).first()
+            attempt = TestAttempt.objects.filter(test=test, student=request.user).select_related('result').first()
             if not attempt or not attempt.is_completed:
                 return JsonResponse({'error': 'Test not completed'}, status=404)
             
-            results = attempt.calculate_score() if hasattr(attempt, 'calculate_score') else {}
+            # Yakunlangan natija o'zgarmaydi - faqat test mazmuni va reytinglar o'zgarishi mumkin
+            class_board = class_scope(request.user.grade, request.user.class_name) if request.user.class_name else None
+            versions = get_versions([('test', test.id), ('leaderboard', test_scope(test.id)), ('leaderboard', class_board)])
+            etag = make_etag('result', attempt.id, attempt.finished_at.isoformat(), test.updated_at.isoformat(), *versions)
+            last_modified = max(attempt.finished_at, test.updated_at)
+            response = not_modified_response(request, etag, last_modified, **RESULT_CACHE_CONTROL)
+            if response is not None:
+                return response
+            
+            # Batafsil natija finish paytida saqlangan - qayta baholanmaydi
+            results = get_result_details(attempt) if hasattr(attempt, 'result') else {}
             correct_answers = attempt.result.correct_answers if hasattr(attempt, 'result') else 0
             incorrect_answers = attempt.result.incorrect_answers if hasattr(attempt, 'result') else 0
             unanswered = attempt.result.unanswered if hasattr(attempt, 'result') else 0
@@ -849,9 +925,13 @@ def test_results_view(request, test_id):
                 'all_answered': results.get('all_answered', False),
                 'answered_count': results.get('answered_count', 0),
                 'total_questions': results.get('total_questions', 0),
-                'incorrect_questions': results.get('incorrect_questions', [])
+                'incorrect_questions': results.get('incorrect_questions', []),
+                'ranking': {
+                    'test': get_rank(test_scope(test.id), request.user.id),
+                    'class': get_rank(class_board, request.user.id) if class_board else None
+                }
             }
-            return JsonResponse({'result': result_data})
+            return finalize_response(JsonResponse({'result': result_data}), etag, last_modified, **RESULT_CACHE_CONTROL)
         
         elif request.user.role == 'teacher' and test.created_by == request.user:
             attempts = TestAttempt.objects.filter(test=test, is_completed=True).select_related('student', 'result').order_by('student__grade', 'student__class_name', 'student__first_name', 'student__last_name')
@@ -887,6 +967,78 @@ def test_results_view(request, test_id):
         'user_role': request.user.role
     })
 
+@login_required
+def attempt_review_view(request, attempt_id):
+    """Urinish varaqasini ko'rib chiqish - o'quvchi ko'rgan tartibda, javoblari bilan.
+
+    Varaqa urinishga yozilgan layout'dan, matnlar keshdagi savollardan olinadi.
+    """
+    attempt = get_object_or_404(TestAttempt.objects.select_related('test'), id=attempt_id)
+    test = attempt.test
+    
+    if request.user.role == 'student':
+        if attempt.student_id != request.user.id:
+            return JsonResponse({'error': 'Access denied'}, status=403)
+        if not attempt.is_completed or not test.show_results:
+            return JsonResponse({'error': 'Test not completed'}, status=404)
+    elif not (request.user.role == 'admin' or (request.user.role == 'teacher' and test.created_by_id == request.user.id)):
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    paper = attempt_paper(attempt)
+    if paper is None:
+        return JsonResponse({'error': 'Bu urinish varaqasini qayta qurib bo\'lmaydi'}, status=404)
+    
+    return JsonResponse({
+        'attempt_id': attempt.id,
+        'test_id': test.id,
+        'is_completed': attempt.is_completed,
+        'questions': review_attempt(attempt, paper)
+    })
+
+@login_required
+def leaderboard_view(request):
+    """Reyting: top-K va o'quvchining o'z o'rni
+
+    GET: ?type=test&test_id=5 | type=grade&grade=7 | type=class&grade=7&class_name=A | type=subject&grade=7&subject=...
+    O'quvchi uchun standart - o'z guruhi reytingi. Fan reytingi sinf ichida yuritiladi,
+    o'quvchi faqat o'z sinfinikini ko'radi.
+    """
+    user = request.user
+    board_type = request.GET.get('type', 'class')
+    try:
+        limit = min(int(request.GET.get('limit', LEADERBOARD_LIMIT)), LEADERBOARD_MAX_LIMIT)
+        if board_type == 'test':
+            test = get_object_or_404(Test, id=int(request.GET.get('test_id', 0)))
+            if user.role == 'student' and test.grade != user.grade:
+                return JsonResponse({'error': 'Access denied'}, status=403)
+            scope = test_scope(test.id)
+        elif board_type in ['grade', 'class']:
+            grade = int(request.GET.get('grade') or user.grade or 0)
+            class_name = request.GET.get('class_name') or user.class_name
+            if user.role == 'student' and (grade != user.grade or (board_type == 'class' and class_name != user.class_name)):
+                return JsonResponse({'error': 'Access denied'}, status=403)
+            if board_type == 'class' and not class_name:
+                return JsonResponse({'error': 'class_name ko\'rsatilishi kerak'}, status=400)
+            scope = grade_scope(grade) if board_type == 'grade' else class_scope(grade, class_name)
+        elif board_type == 'subject':
+            subject = request.GET.get('subject')
+            grade = int(request.GET.get('grade') or user.grade or 0)
+            if user.role == 'student' and grade != user.grade:
+                return JsonResponse({'error': 'Access denied'}, status=403)
+            if not subject:
+                return JsonResponse({'error': 'subject ko\'rsatilishi kerak'}, status=400)
+            scope = subject_scope(grade, subject)
+        else:
+            return JsonResponse({'error': 'Noto\'g\'ri reyting turi'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'Noto\'g\'ri parametr'}, status=400)
+
+    return JsonResponse({
+        'scope': scope,
+        'top': get_top(scope, max(limit, 1)),
+        'me': get_rank(scope, user.id) if user.role == 'student' else None
+    })
+
 @login_required
 def export_results(request, test_id):
     """Export test results to Excel - Teachers only"""
@@ -896,7 +1048,9 @@ def export_results(request, test_id):
     test = get_object_or_404(Test, id=test_id, created_by=request.user)
     attempts = TestAttempt.objects.filter(test=test, is_completed=True).select_related('student', 'result').order_by('student__grade', 'student__class_name', 'student__first_name', 'student__last_name')
     
-    
+    # openpyxl faqat eksportda kerak - worker ishga tushishini sekinlashtirmaslik uchun shu yerda
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
     
     wb = Workbook()
     ws = wb.active
@@ -1000,7 +1154,9 @@ def upload_questions(request, test_id):
                         question_type=row_data['question_type'],
                         points=float(row_data.get('points', 1.0)),
                         order=row_num,
-                        explanation=row_data.get('explanation', '')
+                        explanation=row_data.get('explanation', ''),
+                        topic=str(row_data.get('topic') or '').strip(),
+                        difficulty=int(row_data.get('difficulty') or 2)
                     )
                     
                     # Javob variantlarini qo'shish
@@ -1190,32 +1346,37 @@ def create_test_view(request):
             logger.error(f'Error creating test: {str(e)}', exc_info=True)
             return JsonResponse({'success': False, 'error': f'Xatolik: {str(e)}'}, status=500)
 
-@login_required
-def test_info_view(request, test_id):
-    """Get test information for display purposes"""
-    test = get_object_or_404(Test, id=test_id)
+def test_info_response(request, user, test_id):
+    """test_info_view javobi - sinxron va async (async_views) view'lar uchun umumiy"""
+    # O'zgarmas ma'lumotlar test versiyasi bo'yicha keshlanadi, pauza holati - holat keshidan
+    info = get_test_info(test_id)
+    status = get_test_status(test_id)
+    if info is None or status is None:
+        raise Http404('Test not found')
     
     # Check access permissions
-    if request.user.role == 'student' and test.grade != request.user.grade:
+    if user.role == 'student' and info['grade'] != user.grade:
         return JsonResponse({'error': 'Access denied'}, status=403)
-    elif request.user.role == 'teacher' and test.created_by != request.user:
+    elif user.role == 'teacher' and info['created_by_id'] != user.id:
         return JsonResponse({'error': 'Access denied'}, status=403)
     
-    return JsonResponse({
-        'title': test.title,
-        'description': test.description,
-        'subject': test.subject,
-        'grade': test.grade,
-        'time_limit': test.time_limit,
-        'max_attempts': test.max_attempts,
-        'total_questions': test.total_questions,
-        'created_by': test.created_by.get_full_name() or test.created_by.username,
-        'created_at': test.created_at.isoformat(),
-        'start_time': test.start_time.isoformat() if test.start_time else None,
-        'is_paused': getattr(test, 'is_paused', False),
-        'paused_at': test.paused_at.isoformat() if hasattr(test, 'paused_at') and test.paused_at else None,
-        'end_time': test.end_time.isoformat() if test.end_time else None,
-    })
+    # ETag: test versiyasi (mazmun) + updated_at (pauza/davom ettirish) - DB'ga murojaatsiz
+    updated_at = status.get('updated_at')
+    etag = make_etag('info', test_id, get_version('test', test_id), updated_at.isoformat() if updated_at else '')
+    if request.method == 'GET':
+        response = not_modified_response(request, etag, updated_at, **INFO_CACHE_CONTROL)
+        if response is not None:
+            return response
+    
+    data = {key: value for key, value in info.items() if key != 'created_by_id'}
+    data['is_paused'] = status['is_paused']
+    data['paused_at'] = status['paused_at'].isoformat() if status['paused_at'] else None
+    return finalize_response(JsonResponse(data), etag, updated_at, **INFO_CACHE_CONTROL)
+
+@login_required
+def test_info_view(request, test_id):
+    """Get test information for display purposes"""
+    return test_info_response(request, request.user, test_id)
 
 @login_required
 def all_results_view(request):
@@ -1244,7 +1405,10 @@ def all_results_view(request):
         
         attempts = attempts.order_by('student__grade', 'student__class_name', 'student__first_name', '-finished_at')
         
-        # Excel fayl yaratish
+        # Excel fayl yaratish (openpyxl faqat shu yerda import qilinadi)
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, PatternFill
+        
         wb = Workbook()
         ws = wb.active
         ws.title = "Test Natijalari"
@@ -1420,6 +1584,22 @@ def request_retake_view(request, test_id):
     except Exception as e:
         return JsonResponse({'error': 'Xatolik yuz berdi'}, status=500)
 
+RETAKE_PAGE_SIZE = 50
+RETAKE_MAX_PAGE_SIZE = 200
+
+
+def _encode_retake_cursor(retake_request):
+    """Keyset cursor: oxirgi qatorning (created_at, id) juftligi"""
+    delta = retake_request.created_at - _EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return f'{micros}:{retake_request.id}'
+
+
+def _decode_retake_cursor(cursor):
+    micros, request_id = cursor.split(':', 1)
+    return _EPOCH + timedelta(microseconds=int(micros)), int(request_id)
+
+
 @login_required
 def retake_requests_view(request):
     """Admin va O'qituvchilar qayta ishlash so'rovlarini ko'rish va boshqarish"""
@@ -1428,109 +1608,113 @@ def retake_requests_view(request):
     
     if request.method == 'GET' and request.headers.get('Accept') == 'application/json':
         try:
-            # JSON API so'rovi
             status_filter = request.GET.get('status', 'all')
+            if status_filter != 'all' and status_filter not in dict(TestRetakeRequest.STATUS_CHOICES):
+                return JsonResponse({'error': 'Noto\'g\'ri status'}, status=400)
+            try:
+                test_filter = int(request.GET['test']) if request.GET.get('test') else None
+                grade_filter = int(request.GET['grade']) if request.GET.get('grade') else None
+            except ValueError:
+                return JsonResponse({'error': 'test va grade raqam bo\'lishi kerak'}, status=400)
+            class_filter = request.GET.get('class_name', '').strip()
+            search = request.GET.get('search', '').strip()
             
-            # Test modelini yuklashda xatolik bo'lmasligi uchun xavfsir so'rov
-            # Raw SQL yoki values() ishlatish orqali Test modelini to'liq yuklamaslik
             try:
-                # Avval TestRetakeRequest'larni olish, keyin test ma'lumotlarini alohida olish
-                requests_qs = TestRetakeRequest.objects.select_related(
-                    'student', 'previous_attempt', 'approved_by'
-                ).order_by('-created_at')
-                
-                # O'qituvchi uchun faqat o'z testlari so'rovlari
-                # test__created_by filtri Test modelini yuklaydi, shuning uchun xavfsiz qilamiz
-                if request.user.role == 'teacher':
-                    try:
-                        # Raw SQL yordamida test ID'larni olish (Test modelini to'liq yuklamaslik)
-                        from django.db import connection
-                        with connection.cursor() as cursor:
-                            cursor.execute(
-                                "SELECT id FROM tests_app_test WHERE created_by_id = %s",
-                                [request.user.id]
-                            )
-                            teacher_test_ids = [row[0] for row in cursor.fetchall()]
-                        
-                        if teacher_test_ids:
-                            requests_qs = requests_qs.filter(test_id__in=teacher_test_ids)
-                        else:
-                            # O'qituvchining testlari yo'q
-                            requests_qs = requests_qs.none()
-                    except Exception as filter_error:
-                        # Agar Test modelini yuklashda xatolik bo'lsa, bo'sh ro'yxat qaytarish
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.error(f'Error filtering teacher tests: {str(filter_error)}')
-                        return JsonResponse({
-                            'requests': [],
-                            'total_count': 0
-                        })
-                
-                if status_filter != 'all':
-                    requests_qs = requests_qs.filter(status=status_filter)
-            except Exception as db_error:
-                # Database xatolik - migration qo'llanmagan bo'lishi mumkin
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f'Database error in retake_requests_view: {str(db_error)}', exc_info=True)
-                # Bo'sh ro'yxat qaytarish
-                return JsonResponse({
-                    'requests': [],
-                    'total_count': 0
-                })
+                limit = min(max(int(request.GET.get('limit', RETAKE_PAGE_SIZE)), 1), RETAKE_MAX_PAGE_SIZE)
+            except ValueError:
+                limit = RETAKE_PAGE_SIZE
             
-            requests_data = []
-            for req in requests_qs:
+            # Bitta so'rov: talaba, test, oldingi urinish va tasdiqlovchi JOIN orqali olinadi
+            base_qs = TestRetakeRequest.objects.all()
+            
+            # O'qituvchi uchun faqat o'z testlari so'rovlari
+            if request.user.role == 'teacher':
+                base_qs = base_qs.filter(test__created_by=request.user)
+            if test_filter is not None:
+                base_qs = base_qs.filter(test_id=test_filter)
+            if grade_filter is not None:
+                base_qs = base_qs.filter(student__grade=grade_filter)
+            if class_filter:
+                base_qs = base_qs.filter(student__class_name=class_filter)
+            if search:
+                base_qs = base_qs.filter(
+                    Q(student__first_name__icontains=search) |
+                    Q(student__last_name__icontains=search) |
+                    Q(student__username__icontains=search) |
+                    Q(test__title__icontains=search) |
+                    Q(test__subject__icontains=search)
+                )
+            
+            # Status badge'lari uchun barcha sanoqlar bitta aggregate bilan
+            counts = base_qs.aggregate(
+                pending=Count('id', filter=Q(status='pending')),
+                approved=Count('id', filter=Q(status='approved')),
+                rejected=Count('id', filter=Q(status='rejected')),
+            )
+            
+            requests_qs = base_qs.select_related(
+                'student', 'test', 'previous_attempt', 'approved_by'
+            ).order_by('-created_at', '-id')
+            
+            if status_filter != 'all':
+                requests_qs = requests_qs.filter(status=status_filter)
+            
+            # Keyset sahifalash: cursor = "<created_at mikrosekundlarda>:<id>"
+            cursor = request.GET.get('cursor')
+            if cursor:
                 try:
-                    # previous_attempt None bo'lishi mumkinligini tekshirish
-                    previous_score = 0
-                    previous_percentage = 0
-                    if req.previous_attempt:
-                        previous_score = req.previous_attempt.score or 0
-                        previous_percentage = req.previous_attempt.percentage or 0
-                    
-                    # Test ma'lumotlarini xavfsiz olish
-                    test_title = req.test.title if req.test else 'Noma\'lum test'
-                    test_subject = req.test.subject if req.test else '-'
-                    
-                    requests_data.append({
-                        'id': req.id,
-                        'student_name': req.student.get_full_name() or req.student.username if req.student else 'Noma\'lum',
-                        'student_username': req.student.username if req.student else '-',
-                        'student_grade': req.student.grade or '-' if req.student else '-',
-                        'student_class': req.student.class_name or '-' if req.student else '-',
-                        'test_title': test_title,
-                        'test_subject': test_subject,
-                        'previous_score': previous_score,
-                        'previous_percentage': previous_percentage,
-                        'reason': req.reason or '',
-                        'status': req.status,
-                        'status_display': req.get_status_display(),
-                        'admin_response': req.admin_response or '',
-                        'approved_by': req.approved_by.get_full_name() if req.approved_by else None,
-                        'created_at': req.created_at.isoformat() if req.created_at else '',
-                        'updated_at': req.updated_at.isoformat() if req.updated_at else ''
-                    })
-                except Exception as e:
-                    # Xatolikni log qilish va davom etish
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f'Error processing retake request {req.id}: {str(e)}')
-                    continue
+                    cursor_created_at, cursor_id = _decode_retake_cursor(cursor)
+                except ValueError:
+                    return JsonResponse({'error': 'Noto\'g\'ri cursor'}, status=400)
+                requests_qs = requests_qs.filter(
+                    Q(created_at__lt=cursor_created_at) |
+                    Q(created_at=cursor_created_at, id__lt=cursor_id)
+                )
+            
+            page = list(requests_qs[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+            
+            requests_data = []
+            for req in page:
+                previous_attempt = req.previous_attempt
+                requests_data.append({
+                    'id': req.id,
+                    'student_name': req.student.get_full_name() or req.student.username,
+                    'student_username': req.student.username,
+                    'student_grade': req.student.grade or '-',
+                    'student_class': req.student.class_name or '-',
+                    'test_id': req.test_id,
+                    'test_title': req.test.title,
+                    'test_subject': req.test.subject,
+                    'previous_score': previous_attempt.score or 0,
+                    'previous_percentage': previous_attempt.percentage or 0,
+                    'reason': req.reason or '',
+                    'status': req.status,
+                    'status_display': req.get_status_display(),
+                    'admin_response': req.admin_response or '',
+                    'approved_by': req.approved_by.get_full_name() if req.approved_by else None,
+                    'created_at': req.created_at.isoformat() if req.created_at else '',
+                    'updated_at': req.updated_at.isoformat() if req.updated_at else ''
+                })
+            
+            if status_filter == 'all':
+                total_count = counts['pending'] + counts['approved'] + counts['rejected']
+            else:
+                total_count = counts.get(status_filter, 0)
             
             return JsonResponse({
                 'requests': requests_data,
-                'total_count': len(requests_data)
+                'total_count': total_count,
+                'status_counts': counts,
+                'next_cursor': _encode_retake_cursor(page[-1]) if has_more else None,
+                'has_more': has_more
             })
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f'Error in retake_requests_view: {str(e)}', exc_info=True)
-            return JsonResponse({
-                'error': 'Ma\'lumotlarni yuklashda xatolik yuz berdi',
-                'detail': str(e)
-            }, status=500)
+            return JsonResponse({'error': 'Ma\'lumotlarni yuklashda xatolik yuz berdi'}, status=500)
     
     # HTML template
     return render(request, 'tests_app/retake_requests.html', {
@@ -1591,9 +1775,11 @@ def open_test_for_student(request, test_id, student_id):
         student = User.objects.get(id=student_id, role='student')
         
         # O'quvchining bu testdagi avvalgi urinishlarini tekshirish
+        # (prewarm_exams oldindan yaratgan, lekin boshlanmagan urinishlar hisoblanmaydi)
         previous_attempts = TestAttempt.objects.filter(
             student=student,
-            test=test
+            test=test,
+            is_started=True
         ).count()
         
         # Yangi urinish yaratish (qayta ishlash imkoniyati)
@@ -1659,8 +1845,8 @@ def student_test_management(request):
             except Exception:
                 continue
         
-        # Barcha tasdiqlangan o'quvchilar
-        students = User.objects.filter(role='student', is_verified=True)
+        # Barcha tasdiqlangan o'quvchilar (statistika qatori bilan birga)
+        students = User.objects.filter(role='student', is_verified=True).select_related('stats')
         
         # Har bir o'quvchi va test uchun urinishlar ma'lumotlari
         student_test_data = []
@@ -1669,7 +1855,7 @@ def student_test_management(request):
             student_tests = []
             for test in tests:
                 try:
-                    attempts = TestAttempt.objects.filter(student=student, test=test)
+                    attempts = TestAttempt.objects.filter(student=student, test=test, is_started=True)
                     latest_attempt = attempts.order_by('-started_at').first()
                     
                     # Qayta ishlash so'rovlari
@@ -1694,7 +1880,8 @@ def student_test_management(request):
             
             student_test_data.append({
                 'student': student,
-                'tests': student_tests
+                'tests': student_tests,
+                'stats': getattr(student, 'stats', None)
             })
         
         context = {
@@ -1734,6 +1921,11 @@ def edit_test_view(request, test_id):
             test.max_attempts = int(data.get('max_attempts', test.max_attempts))
             test.show_results = data.get('show_results', test.show_results)
             test.is_active = data.get('is_active', test.is_active)
+            if 'blueprint' in data:
+                try:
+                    test.blueprint = validate_blueprint(data['blueprint'])
+                except BlueprintError as e:
+                    return JsonResponse({'success': False, 'error': f'Varaqa rejasi: {e}'}, status=400)
             test.save()
 
             # Update questions
@@ -1750,6 +1942,8 @@ def edit_test_view(request, test_id):
                     question.points = float(q_data.get('points', 1.0))
                     question.order = i + 1
                     question.explanation = q_data.get('explanation', '')
+                    question.topic = q_data.get('topic', question.topic) or ''
+                    question.difficulty = int(q_data.get('difficulty', question.difficulty))
                     question.save()
                     # Update choices
                     if q_data['question_type'] in ['single_choice', 'multiple_choice']:
@@ -1778,7 +1972,9 @@ def edit_test_view(request, test_id):
                         question_type=q_data['question_type'],
                         points=float(q_data.get('points', 1.0)),
                         order=i + 1,
-                        explanation=q_data.get('explanation', '')
+                        explanation=q_data.get('explanation', ''),
+                        topic=q_data.get('topic') or '',
+                        difficulty=int(q_data.get('difficulty', 2))
                     )
                     if q_data['question_type'] in ['single_choice', 'multiple_choice']:
                         for c_data in q_data.get('choices', []):
@@ -1796,6 +1992,8 @@ def edit_test_view(request, test_id):
                     "question_type": q.question_type,
                     "points": q.points,
                     "explanation": q.explanation,
+                    "topic": q.topic,
+                    "difficulty": q.difficulty,
                     "choices": [
                         {"text": c.choice_text, "is_correct": c.is_correct}
                         for c in q.choices.all()
@@ -1816,6 +2014,8 @@ def edit_test_view(request, test_id):
             'question_type': q.question_type,
             'points': q.points,
             'explanation': q.explanation,
+            'topic': q.topic,
+            'difficulty': q.difficulty,
             'choices': []
         }
         if q.question_type in ['single_choice', 'multiple_choice']:
@@ -1826,10 +2026,50 @@ def edit_test_view(request, test_id):
         questions_data.append(q_data)
     context = {
         'test': test,
-        'questions': questions_data
+        'questions': questions_data,
+        'blueprint': test.blueprint
     }
     return render(request, 'tests_app/edit_test.html', context)
 
+@login_required
+@require_http_methods(["GET"])
+def question_search_view(request):
+    """Savollar banki bo'yicha qidiruv (test tuzish/tahrirlashda mavjud savolni topish uchun).
+
+    GET q, ixtiyoriy subject, grade, mine=1 (faqat o'z testlarim), page, limit.
+    Natija moslik bo'yicha tartiblangan; umumiy son o'rniga has_more qaytariladi.
+    """
+    if request.user.role not in ['teacher', 'admin']:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    query = request.GET.get('q', '').strip()
+    subject = request.GET.get('subject', '').strip() or None
+    try:
+        grade = int(request.GET['grade']) if request.GET.get('grade') else None
+        page = max(int(request.GET.get('page', 1)), 1)
+        limit = min(max(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'Noto\'g\'ri parametr'}, status=400)
+    created_by = request.user.id if request.GET.get('mine') == '1' else None
+
+    try:
+        question_ids, has_more = search_question_ids(
+            query, subject=subject, grade=grade, created_by=created_by,
+            offset=(page - 1) * limit, limit=limit
+        )
+        results = load_search_results(question_ids)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f'Error in question_search_view: {str(e)}', exc_info=True)
+        return JsonResponse({'error': 'Qidiruvda xatolik yuz berdi'}, status=500)
+
+    return JsonResponse({
+        'results': results,
+        'page': page,
+        'has_more': has_more
+    })
+
 @login_required
 def start_test_view(request, test_id):
     """Admin tomonidan o'quvchi uchun testi boshlash"""
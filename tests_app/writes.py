@@ -0,0 +1,177 @@
+"""
+Javoblarni yozish - submit_answer uchun.
+
+write_answers() bir nechta javobni bitta qisqa tranzaksiyada, to'plamga
+asoslangan so'rovlar bilan yozadi. AnswerWriteCoalescer esa bir jarayon
+ichida bir vaqtda kelgan javoblarni bitta yozuvchi oqimda guruhlaydi:
+SQLite'da yozish qulfi har bir so'rov uchun emas, har bir guruh uchun
+bir marta olinadi (ANSWER_WRITE_COALESCING, gthread/ASGI worker'larda).
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Answer, Choice
+
+logger = logging.getLogger(__name__)
+
+COALESCE_MAX_BATCH = 200
+COALESCE_MAX_DELAY = 0.005  # guruh yig'ish uchun kutish (soniya)
+COALESCE_WAIT_TIMEOUT = 15
+
+
+@dataclass
+class AnswerWrite:
+    attempt_id: int
+    question_id: int
+    choice_ids: list = field(default_factory=list)
+    text_answer: str = ''
+
+
+def write_answers(writes):
+    """Javoblarni bitta tranzaksiyada yozish (har bir savolga bitta Answer qatori)"""
+    # Bir savolga bir nechta yozuv bo'lsa oxirgisi qoladi
+    latest = {(write.attempt_id, write.question_id): write for write in writes}
+    if not latest:
+        return
+
+    choice_ids = {choice_id for write in latest.values() for choice_id in write.choice_ids}
+    choice_questions = dict(Choice.objects.filter(id__in=choice_ids).values_list('id', 'question_id'))
+    now = timezone.now()
+
+    with transaction.atomic():
+        answers = {}
+        for answer in Answer.objects.filter(
+            attempt_id__in={attempt_id for attempt_id, _ in latest},
+            question_id__in={question_id for _, question_id in latest}
+        ).order_by('-id'):
+            key = (answer.attempt_id, answer.question_id)
+            # Takroriy qatorlar bo'lsa birinchisi (eng kichik id) ishlatiladi - baholash ham shuni oladi
+            if key in latest:
+                answers[key] = answer
+
+        new_answers = [
+            Answer(attempt_id=attempt_id, question_id=question_id)
+            for (attempt_id, question_id) in latest
+            if (attempt_id, question_id) not in answers
+        ]
+        for answer in Answer.objects.bulk_create(new_answers):
+            answers[(answer.attempt_id, answer.question_id)] = answer
+
+        through = Answer.selected_choices.through
+        through.objects.filter(answer_id__in=[answer.id for answer in answers.values()]).delete()
+        selected = []
+        updated = []
+        for key, write in latest.items():
+            answer = answers[key]
+            answer.text_answer = write.text_answer
+            answer.answered_at = now
+            updated.append(answer)
+            selected.extend(
+                through(answer_id=answer.id, choice_id=choice_id)
+                for choice_id in set(write.choice_ids)
+                # Faqat shu savolga tegishli variantlar
+                if choice_questions.get(choice_id) == write.question_id
+            )
+        Answer.objects.bulk_update(updated, ['text_answer', 'answered_at'])
+        through.objects.bulk_create(selected)
+
+
+class _Pending:
+    def __init__(self, write):
+        self.write = write
+        self.done = threading.Event()
+        self.error = None
+
+
+class AnswerWriteCoalescer:
+    """Jarayon ichidagi yagona yozuvchi oqim.
+
+    submit() javobni navbatga qo'yadi va u yozilguncha kutadi, shuning uchun
+    "Answer saved" javobi avvalgidek yozuv tasdiqlangandan keyin qaytadi.
+    """
+
+    def __init__(self, max_batch=COALESCE_MAX_BATCH, max_delay=COALESCE_MAX_DELAY):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, write, timeout=COALESCE_WAIT_TIMEOUT):
+        self._ensure_thread()
+        pending = _Pending(write)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError('Javobni yozish navbati kutish vaqtidan oshdi')
+        if pending.error is not None:
+            raise pending.error
+
+    def _ensure_thread(self):
+        # gunicorn fork'dan keyin oqim bola jarayonda qayta ishga tushiriladi
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='answer-writer', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            close_old_connections()
+            try:
+                write_answers([pending.write for pending in batch])
+            except Exception:
+                # Guruhdagi bitta noto'g'ri yozuv boshqalarini yo'qotmasligi uchun alohida qayta urinish
+                logger.warning(f'Coalesced answer batch of {len(batch)} failed, retrying one by one', exc_info=True)
+                for pending in batch:
+                    try:
+                        write_answers([pending.write])
+                    except Exception as e:
+                        pending.error = e
+            for pending in batch:
+                pending.done.set()
+
+
+answer_writer = AnswerWriteCoalescer()
+
+
+def save_answer(write):
+    """submit_answer uchun: sozlamaga qarab guruhlab yoki darhol yozish"""
+    if settings.ANSWER_WRITE_COALESCING:
+        answer_writer.submit(write)
+    else:
+        write_answers([write])
+
+
+async def asave_answer(write):
+    """save_answer ning async varianti (async_views.submit_answer uchun).
+
+    Guruhlash rejimida kutish umumiy oqimdan tashqarida bo'ladi, aks holda
+    bir vaqtdagi javoblar navbatga birma-bir tushib guruhlanmay qoladi.
+    """
+    if settings.ANSWER_WRITE_COALESCING:
+        await sync_to_async(answer_writer.submit, thread_sensitive=False)(write)
+    else:
+        await sync_to_async(write_answers)([write])